@@ -30,6 +30,10 @@ def create_tables():
     from models.farmer import Base
     # Import cooperative models to register them with the same Base
     from models.cooperative import Cooperative, CooperativeMember, CooperativeResource, CooperativeActivity, CountyLeaderboard, ResourceSharing
+    from models.climate import ClimateDaily
+    from models.behavior import BehaviorDaily, BehaviorFeatures
+    from models.credit import CreditScoreHistory, CreditScoreLatest, JobLease
+    from models.simulation import SimulationRecord
     
     # Create all tables using the unified Base
     Base.metadata.create_all(bind=engine)
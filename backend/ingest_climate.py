@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Append missing daily NASA POWER observations to the local climate store
+Run daily (e.g. from cron) after POWER publishes the previous day
+"""
+
+import asyncio
+
+from database import create_tables
+from services.credit_service import CreditScoringService
+
+async def ingest_climate():
+    create_tables()
+    credit_service = CreditScoringService()
+    
+    try:
+        result = await credit_service.ingest_climate()
+        print(f"✅ Climate store updated: {result['rows_added']} new days "
+              f"across {result['cells_updated']}/{result['cells']} grid cells")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+    finally:
+        await credit_service.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(ingest_climate())
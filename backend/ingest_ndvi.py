@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Append NDVI composites to the local memory-mapped tile store
+Run after each new composite is published, e.g.
+
+    python ingest_ndvi.py --date 2026-10-01 --composite ndvi.npy --bounds -5.5 6.0 33.0 42.5
+    python ingest_ndvi.py --synthetic --days 365 --cadence 5   # local demo data
+
+Composites are north-up float rasters (.npy) at the store resolution; NaN
+marks cloud / missing pixels. An optional --quality raster carries codes
+0-3 (poor, fair, good, excellent).
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from services.geofence import in_kenya_bbox
+from services.ndvi_store import DEFAULT_RESOLUTION, DEFAULT_TILE_DEGREES, NdviTileStore, get_ndvi_store
+
+
+def kenya_mask(store: NdviTileStore) -> np.ndarray:
+    """North-up mask of store cells inside the Kenya bounding box"""
+    south, north, west, east = store.meta["bounds"]
+    resolution = store.meta["resolution"]
+    lats = north - (np.arange(int(round((north - south) / resolution))) + 0.5) * resolution
+    lons = west + (np.arange(int(round((east - west) / resolution))) + 0.5) * resolution
+    grid_lats, grid_lons = np.meshgrid(lats, lons, indexing="ij")
+    return in_kenya_bbox(grid_lats, grid_lons)
+
+
+def synthetic_composite(store: NdviTileStore, day: date, mask: np.ndarray):
+    """Smooth, seasonal demo composite with a little cloud cover, over Kenya only"""
+    south, north, west, east = store.meta["bounds"]
+    resolution = store.meta["resolution"]
+    n_rows = int(round((north - south) / resolution))
+    n_cols = int(round((east - west) / resolution))
+    lats = north - (np.arange(n_rows) + 0.5) * resolution  # north-up
+    lons = west + (np.arange(n_cols) + 0.5) * resolution
+
+    # Greener west and highlands, two rainy seasons a year
+    season = 0.08 * np.sin(2 * np.pi * (day.timetuple().tm_yday - 60) / 182.5)
+    base = 0.55 - 0.04 * (lons[None, :] - 34.0) + 0.02 * np.cos(lats[:, None] * 2.0)
+    rng = np.random.default_rng(day.toordinal())
+    ndvi = np.clip(base + season + rng.normal(0, 0.03, (n_rows, n_cols)), 0.02, 0.9).astype(np.float32)
+    quality = rng.choice(np.arange(4, dtype=np.uint8), size=ndvi.shape, p=[0.05, 0.25, 0.5, 0.2])
+    ndvi[(rng.random(ndvi.shape) < 0.05) | ~mask] = np.nan
+    return ndvi, quality
+
+
+def ingest_ndvi():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", help="Composite date (YYYY-MM-DD)")
+    parser.add_argument("--composite", help="North-up NDVI raster (.npy)")
+    parser.add_argument("--quality", help="Optional quality-code raster (.npy)")
+    parser.add_argument("--bounds", nargs=4, type=float, metavar=("SOUTH", "NORTH", "WEST", "EAST"))
+    parser.add_argument("--synthetic", action="store_true", help="Append synthetic composites up to yesterday")
+    parser.add_argument("--days", type=int, default=365, help="History to seed with --synthetic")
+    parser.add_argument("--cadence", type=int, default=5, help="Days between synthetic composites")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION, help="New stores only")
+    parser.add_argument("--tile-degrees", type=float, default=DEFAULT_TILE_DEGREES, help="New stores only")
+    args = parser.parse_args()
+
+    store = get_ndvi_store()
+    store.initialize(resolution=args.resolution, tile_degrees=args.tile_degrees)
+
+    try:
+        if args.synthetic:
+            yesterday = datetime.utcnow().date() - timedelta(days=1)
+            dates = store.dates()
+            day = (
+                dates[-1].astype(date) + timedelta(days=args.cadence) if len(dates)
+                else yesterday - timedelta(days=args.days - 1)
+            )
+            mask = kenya_mask(store)
+            added = 0
+            while day <= yesterday:
+                ndvi, quality = synthetic_composite(store, day, mask)
+                store.append_composite(day, ndvi, quality=quality)
+                added += 1
+                day += timedelta(days=args.cadence)
+            print(f"✅ NDVI store updated: {added} synthetic composites")
+        else:
+            if not args.date or not args.composite:
+                parser.error("--date and --composite are required (or use --synthetic)")
+            quality = np.load(args.quality) if args.quality else None
+            result = store.append_composite(
+                date.fromisoformat(args.date),
+                np.load(args.composite, mmap_mode="r"),
+                bounds=tuple(args.bounds) if args.bounds else None,
+                quality=quality
+            )
+            print(f"✅ NDVI store updated: {result['date']} written to {result['tiles_written']} tiles")
+        stats = store.stats()
+        print(f"   {stats['composites']} composites ({stats['first_date']} → {stats['last_date']}), "
+              f"{stats['tiles']} tiles, {stats['bytes'] / 1e6:.1f} MB")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+if __name__ == "__main__":
+    ingest_ndvi()
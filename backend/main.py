@@ -3,7 +3,7 @@ EO Farm Navigators - FastAPI Backend
 Main application entry point for hackathon demo
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
@@ -13,12 +13,15 @@ from typing import List, Dict, Any, Optional
 import json
 import os
 
+import numpy as np
+
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
 # Import our modules
 from services.weather_service import WeatherService
 from services.simulation_service import SimulationService
+from services.simulation_jobs import SimulationQueueFull
 from services.advisory_service import AdvisoryService
 from services.carbon_service import CarbonService
 from services.apiary_service import ApiaryService
@@ -26,12 +29,19 @@ from services.farmer_service import FarmerService
 from services.aflatoxin_service import AflatoxinService
 from services.cooperative_service import CooperativeService
 from services.credit_service import CreditScoringService
+from services.portfolio_rescorer import PortfolioRescorer
+from services.county_geocoder import get_county_geocoder
+from services.farm_conditions import FarmConditionsService
+from services.streaming import RunningSeries, ndjson_response
 from database import get_db, create_tables
 from models.schemas import (
     WeatherRequest, WeatherResponse,
     SimulationRequest, SimulationResponse,
     AdvisoryRequest, AdvisoryResponse,
-    CarbonMetricsRequest, CarbonMetricsResponse
+    CarbonMetricsRequest, CarbonMetricsResponse,
+    CreditBatchRequest,
+    MpesaIngestRequest, UssdIngestRequest, LocationScreenRequest,
+    ForecastBatchRequest
 )
 
 # Load environment variables (e.g., Africa's Talking credentials)
@@ -63,6 +73,9 @@ carbon_service = CarbonService()
 apiary_service = ApiaryService()
 aflatoxin_service = AflatoxinService()
 credit_service = CreditScoringService()
+portfolio_rescorer = PortfolioRescorer(credit_service)
+county_geocoder = get_county_geocoder()
+farm_conditions_service = FarmConditionsService(weather_service, aflatoxin_service, credit_service)
 
 
 class USSDAnalysisPayload(BaseModel):
@@ -100,6 +113,14 @@ async def capture_ussd_analysis(payload: USSDAnalysisPayload):
         "timestamp": datetime.utcnow().isoformat(),
     }
 
+    # Every completed USSD credit session counts towards engagement features
+    try:
+        await asyncio.to_thread(credit_service.behavior_store.ingest_ussd_events, [
+            {"msisdn": payload.phone_number, "timestamp": datetime.utcnow(), "event": "session"}
+        ])
+    except Exception as e:
+        print(f"[USSD-ANALYSIS] Failed to record engagement: {e}")
+
     return {"success": True, "message": "USSD analysis captured."}
 
 
@@ -139,6 +160,7 @@ async def health_check():
             "simulation": simulation_service.health_check(),
             "advisory": advisory_service.health_check(),
             "carbon": carbon_service.health_check(),
+            "credit": {**credit_service.health_check(), "rescoring": portfolio_rescorer.status()},
             "apiary": "healthy"
         },
         "timestamp": datetime.utcnow().isoformat()
@@ -158,6 +180,44 @@ async def get_weather_forecast(request: WeatherRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/weather/forecast/batch")
+async def get_weather_forecast_batch(request: ForecastBatchRequest, db=Depends(get_db)):
+    """
+    Forecasts for many farms (by id) and/or coordinates in one call
+    Locations are collapsed to unique weather grid cells, each cell is
+    fetched once, and results come back in request order (farms first)
+    """
+    if not request.farm_ids and not request.points:
+        raise HTTPException(status_code=400, detail="Provide farm_ids and/or points")
+    
+    farms = FarmerService(db).get_farm_coordinates(request.farm_ids)
+    missing = [farm_id for farm_id in request.farm_ids if farm_id not in farms]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Farms not found: {missing[:20]}")
+    
+    try:
+        locations = [farms[farm_id] for farm_id in request.farm_ids] + [
+            (point.latitude, point.longitude) for point in request.points
+        ]
+        batch = await weather_service.get_forecast_batch(locations, request.days)
+        
+        keys = [{"farm_id": farm_id} for farm_id in request.farm_ids] + [
+            {"point_index": i} for i in range(len(request.points))
+        ]
+        return {
+            "success": True,
+            "count": len(locations),
+            "cells": batch["cells"],
+            "cache_misses": batch["cache_misses"],
+            "results": [
+                {**key, **forecast.model_dump()}
+                for key, forecast in zip(keys, batch["forecasts"])
+            ],
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch forecast failed: {str(e)}")
+
 @app.get("/api/v1/weather/current")
 async def get_current_weather(latitude: float, longitude: float):
     """Get current weather conditions"""
@@ -170,10 +230,61 @@ async def get_current_weather(latitude: float, longitude: float):
 # Simulation API Endpoints
 @app.post("/api/v1/simulate", response_model=SimulationResponse)
 async def simulate_crop_yield(request: SimulationRequest):
-    """Simulate crop yield based on farmer inputs"""
+    """
+    Simulate crop yield based on farmer inputs
+    
+    Large runs are computed in the simulation process pool; use
+    /api/v1/simulate/jobs for runs that may exceed the request timeout
+    (SIMULATION_RUN_TIMEOUT_SECONDS; jobs get SIMULATION_JOB_TIMEOUT_SECONDS).
+    """
     try:
         simulation = await simulation_service.run_simulation(request)
         return simulation
+    except SimulationQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Simulation timed out; submit it as a job instead")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/simulate/jobs", status_code=202)
+async def submit_simulation_job(request: SimulationRequest):
+    """Start a simulation in the background; poll /api/v1/simulate/jobs/{job_id}"""
+    try:
+        return await simulation_service.submit_simulation(request)
+    except SimulationQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/simulate/jobs/{job_id}")
+async def get_simulation_job(job_id: str):
+    """Simulation job status (pending, done, failed, timeout)"""
+    try:
+        job = simulation_service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Simulation job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/simulate/jobs/{job_id}/result", response_model=SimulationResponse)
+async def get_simulation_job_result(job_id: str):
+    """Result of a finished simulation job (409 while it is still pending or if it failed)"""
+    try:
+        job = simulation_service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Simulation job not found")
+        if job["status"] != "done":
+            raise HTTPException(status_code=409, detail=job)
+        result = simulation_service.get_simulation(job_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Simulation result expired")
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -185,6 +296,8 @@ async def get_simulation(simulation_id: str):
         if not result:
             raise HTTPException(status_code=404, detail="Simulation not found")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -209,11 +322,33 @@ async def get_farmer_advisory(farmer_id: str):
 
 # Carbon Dashboard API Endpoints
 @app.post("/api/v1/carbon/metrics", response_model=CarbonMetricsResponse)
-async def get_carbon_metrics(request: CarbonMetricsRequest):
-    """Get carbon metrics for an entity"""
+async def get_carbon_metrics(
+    request: CarbonMetricsRequest,
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Get carbon metrics for an entity
+    format=ndjson streams the NDVI series: the metrics without the series
+    first, then one line per month
+    """
     try:
+        if format == "ndjson":
+            if request.end_date < request.start_date:
+                raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+            summary = await carbon_service.get_carbon_metrics_summary(request)
+            series = RunningSeries("avg_ndvi")
+            return ndjson_response(
+                summary,
+                series.track(carbon_service.iter_ndvi_time_series(request.start_date, request.end_date)),
+                lambda: {
+                    "months": series.count,
+                    "average_ndvi": round(series.mean, 3) if series.count else None
+                }
+            )
         metrics = await carbon_service.get_carbon_metrics(request)
         return metrics
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -228,19 +363,62 @@ async def get_entity_dashboard(entity_id: str):
 
 # Market Prices API
 @app.get("/api/v1/market/prices")
-async def get_market_prices(commodity: str = "maize", location: str = "Nairobi"):
-    """Get current market prices for commodities"""
+async def get_market_prices(
+    commodity: str = "maize",
+    location: str = "Nairobi",
+    days: int = Query(7, ge=1, le=3650),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Get current market prices for commodities
+    format=ndjson streams the daily price history row by row
+    """
     try:
-        prices = await advisory_service.get_market_prices(commodity, location)
+        if format == "ndjson":
+            current_price = advisory_service.get_current_price(commodity, location)
+            history = RunningSeries("price", edge=3)
+            return ndjson_response(
+                {
+                    "commodity": commodity,
+                    "location": location,
+                    "current_price": round(current_price, 1),
+                    "currency": "KES",
+                    "unit": "kg",
+                    "days": days
+                },
+                history.track(advisory_service.iter_price_history(current_price, days)),
+                lambda: {"points": history.count, **advisory_service.price_trend(history.tail_mean, history.head_mean)}
+            )
+        prices = await advisory_service.get_market_prices(commodity, location, days)
         return prices
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Satellite Data API
 @app.get("/api/v1/satellite/ndvi")
-async def get_ndvi_data(latitude: float, longitude: float, days: int = 30):
-    """Get NDVI data for a location"""
+async def get_ndvi_data(
+    latitude: float,
+    longitude: float,
+    days: int = Query(30, ge=1, le=3650),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
+    """
+    Get NDVI data for a location
+    format=ndjson streams one data point per line as it is produced, for
+    multi-year ranges
+    """
     try:
+        if format == "ndjson":
+            series = RunningSeries("ndvi_value")
+            return ndjson_response(
+                {"location": {"latitude": latitude, "longitude": longitude}, "days": days},
+                series.track(weather_service.iter_ndvi_data(latitude, longitude, days)),
+                lambda: {
+                    "points": series.count,
+                    "average_ndvi": round(series.mean, 3) if series.count else None,
+                    "trend": "improving" if series.count and series.tail_mean > series.head_mean else "declining"
+                }
+            )
         ndvi = await weather_service.get_ndvi_data(latitude, longitude, days)
         return ndvi
     except Exception as e:
@@ -401,6 +579,48 @@ async def get_farmer_farms(session_token: str, db=Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/farms/{farm_id}/conditions")
+async def get_farm_conditions(
+    farm_id: int,
+    crop_stage: str = "pre-harvest",
+    include_credit: bool = True,
+    timeout: Optional[float] = Query(None, gt=0, le=30),
+    db=Depends(get_db)
+):
+    """
+    Forecast, NDVI, aflatoxin risk and credit score for one farm
+    All sources are fetched concurrently; any that time out or fail are
+    reported per source and the rest are still returned
+    """
+    farm = FarmerService(db).get_farm_by_id(farm_id)
+    if not farm:
+        raise HTTPException(status_code=404, detail="Farm not found")
+    
+    try:
+        phone_number = farm.farmer.phone_number if include_credit and farm.farmer else None
+        conditions = await farm_conditions_service.get_conditions(
+            latitude=farm.latitude,
+            longitude=farm.longitude,
+            phone_number=phone_number,
+            crop_type=farm.primary_crop,
+            farm_size_acres=farm.size_acres,
+            crop_stage=crop_stage,
+            timeout=timeout
+        )
+        return {
+            "farm": {
+                "id": farm.id,
+                "name": farm.name,
+                "coordinates": {"lat": farm.latitude, "lon": farm.longitude},
+                "size_acres": farm.size_acres,
+                "primary_crop": farm.primary_crop
+            },
+            **conditions,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Farm conditions failed: {str(e)}")
+
 @app.post("/api/v1/farmer/logout")
 async def farmer_logout(session_token: str, db=Depends(get_db)):
     """Logout farmer and deactivate session"""
@@ -625,14 +845,33 @@ async def get_credit_score(
     latitude: float,
     longitude: float,
     crop_type: str,
-    farm_size_acres: float = 1.0
+    farm_size_acres: float = 1.0,
+    max_age_minutes: Optional[int] = Query(None, ge=0)
 ):
     """
     Get AI-powered credit score for a farmer
     Uses NASA satellite data + behavioral signals
     No IoT needed - satellites are the sensors!
+    
+    A precomputed score for the same location, crop and farm size is
+    served if it is younger than max_age_minutes (default
+    CREDIT_SCORE_MAX_AGE_HOURS; 0 forces a live rescore)
     """
     try:
+        max_age = timedelta(minutes=max_age_minutes) if max_age_minutes is not None else None
+        precomputed = await asyncio.to_thread(
+            credit_service.score_store.latest,
+            phone_number, latitude, longitude, crop_type, farm_size_acres, max_age=max_age
+        )
+        if precomputed is not None:
+            return {
+                "success": True,
+                **precomputed,
+                "phone_number": phone_number,
+                "source": "precomputed",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        
         score_result = await credit_service.score_farmer(
             phone_number=phone_number,
             latitude=latitude,
@@ -641,35 +880,289 @@ async def get_credit_score(
             farm_size_acres=farm_size_acres
         )
         
-        return {
-            "success": True,
+        result = {
             "phone_number": phone_number,
             "location": {"lat": latitude, "lon": longitude},
             "crop": crop_type,
+            "farm_size_acres": farm_size_acres,
             "credit_score": score_result.score,
             "risk_level": score_result.risk_level,
             "loan_recommendation": score_result.loan_recommendation,
             "top_factors": score_result.top_factors,
+            "score_breakdown": score_result.feature_contributions,
             "yield_estimate_tonnes": score_result.yield_estimate,
             "fraud_score": score_result.fraud_score,
+            "model_version": score_result.model_version,
+            "satellite_status": score_result.satellite_status
+        }
+        
+        # Materialize so the next lookup for this farmer is a primary-key read
+        try:
+            await asyncio.to_thread(credit_service.score_store.record, [result], trigger="request")
+        except Exception as e:
+            print(f"Failed to store credit score: {e}")
+        
+        return {
+            "success": True,
+            **result,
+            "source": "live",
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Credit scoring failed: {str(e)}")
 
+@app.get("/api/v1/credit/score/latest/{phone_number}")
+async def get_latest_credit_score(phone_number: str, max_age_minutes: Optional[int] = Query(None, ge=0)):
+    """
+    Most recent precomputed score for a farmer (constant-time lookup for
+    USSD "check my score"); 404 when missing or older than the freshness bound
+    """
+    max_age = timedelta(minutes=max_age_minutes) if max_age_minutes is not None else None
+    latest = await asyncio.to_thread(credit_service.score_store.latest, phone_number, max_age=max_age)
+    if latest is None:
+        raise HTTPException(status_code=404, detail="No fresh credit score for this number")
+    return {"success": True, **latest, "source": "precomputed"}
+
+@app.get("/api/v1/credit/score/history/{phone_number}")
+async def get_credit_score_history(phone_number: str, limit: int = Query(30, ge=1, le=365)):
+    """Score history for a farmer, newest first"""
+    history = await asyncio.to_thread(credit_service.score_store.history, phone_number, limit)
+    return {"phone_number": phone_number, "count": len(history), "history": history}
+
+@app.post("/api/v1/credit/rescore")
+async def rescore_portfolio():
+    """Rescore every registered farmer now and materialize the results"""
+    try:
+        result = await portfolio_rescorer.rescore("manual")
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Portfolio rescoring failed: {str(e)}")
+
+@app.post("/api/v1/credit/score/batch")
+async def get_credit_scores_batch(request: CreditBatchRequest):
+    """
+    Score a lender portfolio in one call
+    Features are fetched once per satellite grid cell and scored in one
+    vectorized pass - results match /api/v1/credit/score row for row
+    """
+    try:
+        results = await credit_service.score_farmers_batch(
+            [row.model_dump() for row in request.farmers]
+        )
+        
+        return {
+            "success": True,
+            "count": len(results),
+            "results": results,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch credit scoring failed: {str(e)}")
+
+@app.post("/api/v1/credit/fraud/screen-locations")
+async def screen_farm_locations(request: LocationScreenRequest):
+    """
+    Bulk geofence screening: flags farm coordinates outside Kenya; hits on
+    protected areas or urban cores are informational until surveyed
+    boundaries are loaded (one vectorized index lookup)
+    """
+    try:
+        results = credit_service.screen_locations(
+            [p.latitude for p in request.points],
+            [p.longitude for p in request.points]
+        )
+        return {
+            "success": True,
+            "count": len(results),
+            "flagged": sum(1 for r in results if r["flagged"]),
+            "results": results
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Location screening failed: {str(e)}")
+
+@app.get("/api/v1/credit/fraud/duplicate-locations")
+async def get_duplicate_locations(
+    min_msisdns: int = Query(2, ge=2),
+    radius_m: float = Query(10.0, gt=0, le=500)
+):
+    """
+    Batch report: clusters of distinct phone numbers claiming farm
+    coordinates within radius_m of each other (farms + credit requests)
+    """
+    try:
+        report = await asyncio.to_thread(
+            credit_service.location_index.clusters, min_msisdns=min_msisdns, radius_m=radius_m
+        )
+        return {
+            "success": True,
+            "indexed_points": report["indexed_points"],
+            "truncated": report["truncated"],
+            "cluster_count": len(report["clusters"]),
+            "clusters": report["clusters"]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Duplicate location report failed: {str(e)}")
+
+# Drought Monitoring Endpoints
+@app.get("/api/v1/climate/drought-flags")
+async def get_drought_flags(
+    window_days: int = Query(30, ge=1, le=365),
+    threshold_mm: float = Query(50.0, ge=0)
+):
+    """
+    Drought flags for every grid cell holding registered farms
+    Window totals and anomalies come from the rainfall prefix-sum index
+    """
+    try:
+        farm_counts = credit_service.climate_store.farm_cell_counts()
+        cells = list(farm_counts)
+        flags = credit_service.rainfall_index.drought_flags(cells, days=window_days, threshold_mm=threshold_mm)
+        counties = county_geocoder.counties([c[0] for c in cells], [c[1] for c in cells])
+        
+        report = [
+            {
+                "cell": {"lat": cell[0], "lon": cell[1]},
+                "county": counties[i],
+                "farms": farm_counts[cell],
+                "rainfall_mm": round(float(flags["total_mm"][i]), 1) if flags["trusted"][i] else None,
+                "anomaly_percent": round(float(flags["anomaly_percent"][i]), 1) if flags["trusted"][i] else None,
+                "coverage": round(float(flags["coverage"][i]), 2),
+                "drought": bool(flags["drought"][i])
+            }
+            for i, cell in enumerate(cells)
+        ]
+        report.sort(key=lambda row: (not row["drought"], row["rainfall_mm"] if row["rainfall_mm"] is not None else float("inf")))
+        
+        return {
+            "window_days": window_days,
+            "threshold_mm": threshold_mm,
+            "as_of": credit_service.rainfall_index.last_date.isoformat() if credit_service.rainfall_index.last_date else None,
+            "cells": len(cells),
+            "cells_in_drought": int(flags["drought"].sum()),
+            "farms_in_drought": sum(row["farms"] for row in report if row["drought"]),
+            "cells_without_data": int((~flags["trusted"]).sum()),
+            "flags": report
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Drought flags failed: {str(e)}")
+
+# County Reverse-Geocoding Endpoints
+@app.get("/api/v1/geocode/county")
+async def geocode_county(latitude: float, longitude: float):
+    """County (and sub-county, when available) for a coordinate"""
+    return {"location": {"lat": latitude, "lon": longitude}, **county_geocoder.label(latitude, longitude)}
+
+@app.post("/api/v1/geocode/counties")
+async def geocode_counties(request: LocationScreenRequest):
+    """Batch county labels for many coordinates in one vectorized lookup"""
+    try:
+        labels = county_geocoder.label_many(
+            [p.latitude for p in request.points],
+            [p.longitude for p in request.points]
+        )
+        return {
+            "success": True,
+            "count": len(labels),
+            "results": [
+                {"location": {"lat": p.latitude, "lon": p.longitude}, **label}
+                for p, label in zip(request.points, labels)
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"County geocoding failed: {str(e)}")
+
+# Behavioral Feature Store Endpoints
+@app.post("/api/v1/behavior/mpesa/ingest")
+async def ingest_mpesa_transactions(request: MpesaIngestRequest):
+    """Bulk-ingest M-Pesa transaction logs into the MSISDN feature store"""
+    try:
+        result = await asyncio.to_thread(
+            credit_service.behavior_store.ingest_mpesa_transactions,
+            [txn.model_dump() for txn in request.transactions]
+        )
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"M-Pesa ingest failed: {str(e)}")
+
+@app.post("/api/v1/behavior/ussd/ingest")
+async def ingest_ussd_events(request: UssdIngestRequest):
+    """Bulk-ingest USSD engagement events into the MSISDN feature store"""
+    try:
+        result = await asyncio.to_thread(
+            credit_service.behavior_store.ingest_ussd_events,
+            [event.model_dump() for event in request.events]
+        )
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"USSD ingest failed: {str(e)}")
+
+@app.get("/api/v1/behavior/{phone_number}")
+async def get_behavior_features(phone_number: str):
+    """Current 30/90-day behavioral features for an MSISDN"""
+    features = await asyncio.to_thread(credit_service.behavior_store.get_features, phone_number)
+    if features is None:
+        raise HTTPException(status_code=404, detail="No behavioral history for this number")
+    return {"phone_number": phone_number, "features": features}
+
+@app.get("/api/v1/credit/model")
+async def get_credit_model():
+    """Active credit model version and the versions available to swap in"""
+    return credit_service.model_runtime.info()
+
+@app.post("/api/v1/credit/model/reload")
+async def reload_credit_model(model_name: Optional[str] = None):
+    """Hot-swap the credit model (reloads the active one if no name is given)"""
+    try:
+        return credit_service.model_runtime.reload(model_name)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/v1/credit/simulate-risk")
 async def simulate_risk_scenario(
     phone_number: str,
     latitude: float,
     longitude: float,
     crop_type: str,
-    rainfall_change_percent: float = 0.0
+    rainfall_change_percent: float = 0.0,
+    rainfall_changes: Optional[List[float]] = Query(None),
+    rainfall_min: Optional[float] = None,
+    rainfall_max: Optional[float] = None,
+    rainfall_step: float = 5.0,
+    temperature_changes: Optional[List[float]] = Query(None),
+    ndvi_changes: Optional[List[float]] = Query(None),
+    farm_size_acres: Optional[float] = None
 ):
     """
     Simulate how credit score changes with weather scenarios
     E.g., "What if rainfall drops by 20%?"
+    
+    Sweep mode: pass rainfall_changes (repeatable) or rainfall_min/max/step,
+    optionally with temperature_changes and ndvi_changes, to get the whole
+    sensitivity curve from one scoring pass.
     """
+    sweep_rainfall = rainfall_changes
+    if sweep_rainfall is None and rainfall_min is not None and rainfall_max is not None:
+        if rainfall_step <= 0 or rainfall_max < rainfall_min:
+            raise HTTPException(status_code=400, detail="Invalid rainfall range")
+        sweep_rainfall = np.arange(rainfall_min, rainfall_max + rainfall_step / 2, rainfall_step).tolist()
+    if sweep_rainfall is None and (temperature_changes or ndvi_changes):
+        sweep_rainfall = [rainfall_change_percent]
+    
+    if sweep_rainfall is not None:
+        scenario_count = len(sweep_rainfall) * len(temperature_changes or [0]) * len(ndvi_changes or [0])
+        if scenario_count > 10000:
+            raise HTTPException(status_code=400, detail="Too many scenarios (max 10000)")
+    
     try:
+        if sweep_rainfall is not None:
+            return await credit_service.simulate_risk_sweep(
+                phone_number, latitude, longitude, crop_type,
+                rainfall_changes_percent=sweep_rainfall,
+                temperature_changes_c=temperature_changes,
+                ndvi_changes=ndvi_changes,
+                farm_size_acres=farm_size_acres
+            )
+        
         # Get baseline score
         baseline = await credit_service.score_farmer(
             phone_number, latitude, longitude, crop_type
@@ -706,8 +1199,8 @@ async def get_credit_dashboard(
             phone_number, latitude, longitude, crop_type
         )
         
-        # Get satellite features for display
-        satellite_features = await credit_service._fetch_satellite_features(latitude, longitude)
+        # Satellite features for display come from the same scoring pass
+        satellite_features = score_result.satellite_features
         
         return {
             "farmer": {
@@ -726,6 +1219,7 @@ async def get_credit_dashboard(
                 "ndvi_mean": satellite_features.get("ndvi_mean_90d"),
                 "ndvi_trend": "↑ Healthy" if satellite_features.get("ndvi_trend_90d", 0) > 0 else "↓ Declining",
                 "drought_risk": "High" if satellite_features.get("drought_flag") else "Low",
+                "data_status": score_result.satellite_status,
                 "last_updated": "3 hours ago (Near Real-Time)"
             },
             "loan_offer": score_result.loan_recommendation,
@@ -748,8 +1242,17 @@ async def startup_event():
     """Initialize database tables on startup"""
     create_tables()
     print("✅ Database tables created/verified")
+    await credit_service.startup()
+    portfolio_rescorer.start()
     print("🌟 MavunoAI Credit - AI-Powered Agri-Finance Ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and release pooled connections on shutdown"""
+    await portfolio_rescorer.stop()
+    await simulation_service.shutdown()
+    await credit_service.shutdown()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
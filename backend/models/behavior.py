@@ -0,0 +1,44 @@
+"""
+Behavioral Feature Store Models
+M-Pesa and USSD signals per MSISDN: daily buckets plus incrementally
+maintained 30/90-day rolling aggregates read by credit scoring
+"""
+
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime
+from datetime import datetime
+
+# Import Base from farmer models to ensure same metadata
+from models.farmer import Base
+
+class BehaviorDaily(Base):
+    """One MSISDN's activity on one day"""
+    __tablename__ = "behavior_daily"
+    
+    msisdn = Column(String(15), primary_key=True)
+    day = Column(Date, primary_key=True)
+    mpesa_txn_count = Column(Integer, default=0)
+    mpesa_deposit_kes = Column(Float, default=0.0)
+    mpesa_withdraw_kes = Column(Float, default=0.0)
+    mpesa_balance_sum_kes = Column(Float, default=0.0)  # sum of reported balances
+    mpesa_balance_count = Column(Integer, default=0)
+    ussd_sessions = Column(Integer, default=0)
+    training_sessions = Column(Integer, default=0)
+
+class BehaviorFeatures(Base):
+    """Rolling aggregates per MSISDN, valid through window_end"""
+    __tablename__ = "behavior_features"
+    
+    msisdn = Column(String(15), primary_key=True)
+    first_seen = Column(Date, nullable=False)
+    window_end = Column(Date, nullable=False)
+    mpesa_txn_count_30d = Column(Integer, default=0)
+    mpesa_txn_count_90d = Column(Integer, default=0)
+    mpesa_deposit_kes_90d = Column(Float, default=0.0)
+    mpesa_withdraw_kes_90d = Column(Float, default=0.0)
+    mpesa_balance_sum_kes_90d = Column(Float, default=0.0)
+    mpesa_balance_count_90d = Column(Integer, default=0)
+    ussd_sessions_30d = Column(Integer, default=0)
+    ussd_sessions_90d = Column(Integer, default=0)
+    training_sessions_total = Column(Integer, default=0)
+    cooperative_member = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,24 @@
+"""
+Climate Time-Series Models
+Daily NASA POWER observations stored per grid cell so scoring reads
+rolling windows locally instead of downloading them on every request
+"""
+
+from sqlalchemy import Column, Float, Date, DateTime
+from datetime import datetime
+
+# Import Base from farmer models to ensure same metadata
+from models.farmer import Base
+
+class ClimateDaily(Base):
+    """One day of POWER data for one 0.5° x 0.625° grid cell"""
+    __tablename__ = "climate_daily"
+    
+    cell_lat = Column(Float, primary_key=True)
+    cell_lon = Column(Float, primary_key=True)
+    date = Column(Date, primary_key=True)
+    rainfall_mm = Column(Float, nullable=False)  # PRECTOTCORR
+    et_mm = Column(Float, nullable=False)  # EVPTRNS
+    temp_c = Column(Float, nullable=False)  # T2M
+    humidity_percent = Column(Float, nullable=False)  # RH2M
+    ingested_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,62 @@
+"""
+Credit Score Models
+Materialized credit scores: an append-only history plus one latest row
+per MSISDN so USSD/API lookups are a single primary-key read
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from datetime import datetime
+
+# Import Base from farmer models to ensure same metadata
+from models.farmer import Base
+
+class CreditScoreHistory(Base):
+    """Every score ever produced (scheduled rescoring and live requests)"""
+    __tablename__ = "credit_score_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    msisdn = Column(String(15), index=True, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    crop_type = Column(String(50), nullable=False)
+    farm_size_acres = Column(Float, nullable=False)
+    credit_score = Column(Float, nullable=False)
+    risk_level = Column(String(20), nullable=False)
+    fraud_score = Column(Float, nullable=False)
+    yield_estimate = Column(Float, nullable=False)
+    model_version = Column(String(50))
+    satellite_status = Column(String(10))  # fresh, stale or fallback
+    trigger = Column(String(20))  # schedule, climate, request, manual
+    scored_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class CreditScoreLatest(Base):
+    """Most recent score per MSISDN with everything needed to answer a request"""
+    __tablename__ = "credit_score_latest"
+    
+    msisdn = Column(String(15), primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    cell_lat = Column(Float, nullable=False)
+    cell_lon = Column(Float, nullable=False)
+    crop_type = Column(String(50), nullable=False)
+    farm_size_acres = Column(Float, nullable=False)
+    credit_score = Column(Float, nullable=False)
+    risk_level = Column(String(20), nullable=False)
+    fraud_score = Column(Float, nullable=False)
+    yield_estimate = Column(Float, nullable=False)
+    loan_recommendation = Column(Text)  # JSON
+    top_factors = Column(Text)  # JSON
+    score_breakdown = Column(Text)  # JSON
+    model_version = Column(String(50))
+    satellite_status = Column(String(10))
+    trigger = Column(String(20))
+    scored_at = Column(DateTime, default=datetime.utcnow)
+
+
+class JobLease(Base):
+    """Lease naming the one process allowed to run a background job"""
+    __tablename__ = "job_leases"
+    
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -64,6 +64,10 @@ class SimulationRequest(BaseModel):
     farm_size_ha: float = Field(2.0, ge=0.1, le=1000)
     inputs: SimulationInputs
     scenarios: List[str] = ["current", "optimal", "budget"]
+    ensemble_size: Optional[int] = Field(None, ge=100, le=100000, description="Monte Carlo weather realizations (omit for a single draw)")
+    seed: Optional[int] = Field(None, description="Random seed for a reproducible ensemble")
+    budget_usd: Optional[float] = Field(None, gt=0, description="Input budget for the whole farm (optimal scenario)")
+    timestep: str = Field("season", pattern="^(season|daily)$", description="season: one multiplier per season; daily: soil water balance over the growing season")
 
 class SimulationResult(BaseModel):
     predicted_yield_kg_ha: float
@@ -75,6 +79,13 @@ class SimulationResult(BaseModel):
     revenue_estimate_usd: float
     net_profit_usd: float
     roi_percent: float
+    inputs: Optional[SimulationInputs] = None
+    ensemble_size: Optional[int] = None
+    yield_percentiles_kg_ha: Optional[Dict[str, float]] = None  # p10 / p50 / p90
+    net_profit_percentiles_usd: Optional[Dict[str, float]] = None
+    expected_net_profit_usd: Optional[float] = None
+    probability_of_loss: Optional[float] = None
+    water_balance: Optional[Dict[str, float]] = None  # daily timestep, medians over runs
 
 class SimulationResponse(BaseModel):
     simulation_id: str
@@ -144,6 +155,48 @@ class MarketPrice(BaseModel):
     trend: str
     historical_data: List[Dict[str, Any]]
 
+# Credit Models
+class CreditScoreRow(BaseModel):
+    phone_number: str
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    crop_type: str
+    farm_size_acres: Optional[float] = Field(1.0, gt=0)
+
+class CreditBatchRequest(BaseModel):
+    farmers: List[CreditScoreRow] = Field(..., min_length=1, max_length=10000)
+
+class GeoPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class LocationScreenRequest(BaseModel):
+    points: List[GeoPoint] = Field(..., min_length=1, max_length=100000)
+
+class ForecastBatchRequest(BaseModel):
+    farm_ids: List[int] = Field(default_factory=list, max_length=5000)
+    points: List[GeoPoint] = Field(default_factory=list, max_length=5000)
+    days: int = Field(7, ge=1, le=14, description="Number of forecast days")
+
+# Behavioral Feature Store Models
+class MpesaTransactionRecord(BaseModel):
+    msisdn: str
+    timestamp: datetime
+    amount_kes: float
+    direction: str = Field("in", pattern="^(in|out)$")
+    balance_kes: Optional[float] = None
+
+class MpesaIngestRequest(BaseModel):
+    transactions: List[MpesaTransactionRecord] = Field(..., min_length=1)
+
+class UssdEventRecord(BaseModel):
+    msisdn: str
+    timestamp: datetime
+    event: str = Field("session", pattern="^(session|training)$")
+
+class UssdIngestRequest(BaseModel):
+    events: List[UssdEventRecord] = Field(..., min_length=1)
+
 # NDVI Models
 class NDVIDataPoint(BaseModel):
     date: str
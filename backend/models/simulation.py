@@ -0,0 +1,21 @@
+"""
+Simulation Result Models
+Finished simulations stored once, compressed, so any worker can serve
+/api/v1/simulate/{id}; rows expire and the table is capped in size
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from datetime import datetime
+
+# Import Base from farmer models to ensure same metadata
+from models.farmer import Base
+
+class SimulationRecord(Base):
+    """One SimulationResponse as zlib-compressed JSON"""
+    __tablename__ = "simulation_results"
+    
+    simulation_id = Column(String(32), primary_key=True)
+    payload = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -3,17 +3,20 @@ Advisory Service - Agricultural recommendations and alerts
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import random
 from models.schemas import (
     AdvisoryRequest, AdvisoryResponse, Alert, Recommendation,
     Priority, AdvisoryType, CropType
 )
+from services.grid_cache import snap_to_grid
+from services.rainfall_index import DROUGHT_WINDOW_DAYS, get_rainfall_index
 
 class AdvisoryService:
     def __init__(self):
         self.advisories = {}  # In-memory storage for demo
         self.market_prices = self._initialize_market_prices()
+        self.rainfall_index = get_rainfall_index()
     
     def health_check(self) -> Dict[str, Any]:
         """Check if advisory service is healthy"""
@@ -134,6 +137,20 @@ class AdvisoryService:
                 expires_at=datetime.utcnow() + timedelta(days=5)
             ))
         
+        # Observed dry spell over the last 30 days (rainfall index)
+        drought = self.rainfall_index.drought_flags([snap_to_grid(request.latitude, request.longitude)])
+        if drought["drought"][0]:
+            alerts.append(Alert(
+                id=f"weather_{random.randint(1000, 9999)}",
+                priority=Priority.HIGH,
+                type=AdvisoryType.WEATHER,
+                title="Dry Spell Alert",
+                message=f"Only {drought['total_mm'][0]:.0f}mm of rain in the last {DROUGHT_WINDOW_DAYS} days "
+                        f"({drought['anomaly_percent'][0]:+.0f}% vs normal). Mulch, harvest water and delay top-dressing until rains return.",
+                action_required=True,
+                expires_at=datetime.utcnow() + timedelta(days=3)
+            ))
+        
         # Temperature alerts
         if temperature > 30:
             alerts.append(Alert(
@@ -285,30 +302,17 @@ class AdvisoryService:
         """Get latest advisory for a farmer"""
         return self.advisories.get(farmer_id)
     
-    async def get_market_prices(self, commodity: str, location: str) -> Dict[str, Any]:
+    async def get_market_prices(self, commodity: str, location: str, days: int = 7) -> Dict[str, Any]:
         """Get market prices for a commodity and location"""
-        prices = self.market_prices.get(commodity.lower(), {})
-        current_price = prices.get(location, prices.get("Nairobi", 0))
-        
-        # Add some price variation
-        variation = random.uniform(-0.1, 0.1)
-        adjusted_price = current_price * (1 + variation)
+        adjusted_price = self.get_current_price(commodity, location)
         
         # Generate historical data
-        historical_data = []
-        for i in range(7):
-            date_obj = datetime.now() - timedelta(days=6-i)
-            price_variation = random.uniform(-0.05, 0.05)
-            historical_price = adjusted_price * (1 + price_variation)
-            historical_data.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "price": round(historical_price, 1)
-            })
+        historical_data = list(self.iter_price_history(adjusted_price, days))
         
         # Calculate trend
-        recent_avg = sum(d["price"] for d in historical_data[-3:]) / 3
-        older_avg = sum(d["price"] for d in historical_data[:3]) / 3
-        trend = "increasing" if recent_avg > older_avg else "decreasing" if recent_avg < older_avg else "stable"
+        edge = min(3, len(historical_data))
+        recent_avg = sum(d["price"] for d in historical_data[-edge:]) / edge
+        older_avg = sum(d["price"] for d in historical_data[:edge]) / edge
         
         return {
             "commodity": commodity,
@@ -316,9 +320,36 @@ class AdvisoryService:
             "current_price": round(adjusted_price, 1),
             "currency": "KES",
             "unit": "kg",
-            "price_change_7d_percent": round((recent_avg - older_avg) / older_avg * 100, 1),
+            **self.price_trend(recent_avg, older_avg),
+            "historical_data": historical_data
+        }
+    
+    def get_current_price(self, commodity: str, location: str) -> float:
+        """Today's price for a commodity at a market (falls back to Nairobi)"""
+        prices = self.market_prices.get(commodity.lower(), {})
+        current_price = prices.get(location, prices.get("Nairobi", 0))
+        
+        # Add some price variation
+        variation = random.uniform(-0.1, 0.1)
+        return current_price * (1 + variation)
+    
+    def iter_price_history(self, current_price: float, days: int) -> Iterator[Dict[str, Any]]:
+        """Daily price history oldest first, generated row by row"""
+        now = datetime.now()
+        for i in range(days):
+            date_obj = now - timedelta(days=days - 1 - i)
+            price_variation = random.uniform(-0.05, 0.05)
+            yield {
+                "date": date_obj.strftime("%Y-%m-%d"),
+                "price": round(current_price * (1 + price_variation), 1)
+            }
+    
+    def price_trend(self, recent_avg: float, older_avg: float) -> Dict[str, Any]:
+        """Trend, 7-day change and recommendation from the newest and oldest price averages"""
+        trend = "increasing" if recent_avg > older_avg else "decreasing" if recent_avg < older_avg else "stable"
+        return {
+            "price_change_7d_percent": round((recent_avg - older_avg) / older_avg * 100, 1) if older_avg else 0.0,
             "trend": trend,
-            "historical_data": historical_data,
             "recommendation": self._get_price_recommendation(trend, recent_avg, older_avg)
         }
     
@@ -0,0 +1,293 @@
+"""
+Behavior Store - persistent M-Pesa / USSD feature store keyed by MSISDN
+Bulk ingest lands in daily buckets; 30/90-day aggregates are maintained
+incrementally (add on ingest, subtract as days slide out of the window)
+so scoring reads one primary-key row instead of recomputing features
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from database import SessionLocal
+from models.behavior import BehaviorDaily, BehaviorFeatures
+from models.cooperative import CooperativeMember
+from models.farmer import Farmer
+
+# Daily bucket columns
+DAILY_FIELDS = [
+    "mpesa_txn_count",
+    "mpesa_deposit_kes",
+    "mpesa_withdraw_kes",
+    "mpesa_balance_sum_kes",
+    "mpesa_balance_count",
+    "ussd_sessions",
+    "training_sessions"
+]
+
+# Daily columns holding counts (everything else is KES)
+COUNT_FIELDS = {"mpesa_txn_count", "mpesa_balance_count", "ussd_sessions", "training_sessions"}
+
+# Rolling aggregate column -> (daily column, window in days)
+ROLLING_FIELDS = {
+    "mpesa_txn_count_30d": ("mpesa_txn_count", 30),
+    "mpesa_txn_count_90d": ("mpesa_txn_count", 90),
+    "mpesa_deposit_kes_90d": ("mpesa_deposit_kes", 90),
+    "mpesa_withdraw_kes_90d": ("mpesa_withdraw_kes", 90),
+    "mpesa_balance_sum_kes_90d": ("mpesa_balance_sum_kes", 90),
+    "mpesa_balance_count_90d": ("mpesa_balance_count", 90),
+    "ussd_sessions_30d": ("ussd_sessions", 30),
+    "ussd_sessions_90d": ("ussd_sessions", 90)
+}
+
+# SQLite caps bound parameters per statement
+IN_CLAUSE_CHUNK = 500
+
+
+def normalize_msisdn(phone_number: str) -> str:
+    """Canonical Kenyan MSISDN: 2547XXXXXXXX (accepts +254..., 254..., 07...)"""
+    digits = "".join(ch for ch in str(phone_number) if ch.isdigit())
+    if digits.startswith("0") and len(digits) == 10:
+        digits = "254" + digits[1:]
+    return digits
+
+
+def _as_date(value: Any) -> date:
+    """UTC day bucket for a timestamp (naive values are taken as UTC, like today's date)"""
+    if not isinstance(value, date):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def _chunks(items: List[Any], size: int = IN_CLAUSE_CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BehaviorStore:
+    """Behavioral features per MSISDN for credit scoring"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    # Ingest
+
+    def ingest_mpesa_transactions(self, transactions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bulk-ingest M-Pesa transaction log rows:
+        {msisdn, timestamp, amount_kes, direction: "in"|"out", balance_kes?}
+        """
+        deltas: Dict[Tuple[str, date], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for txn in transactions:
+            bucket = deltas[(normalize_msisdn(txn["msisdn"]), _as_date(txn["timestamp"]))]
+            bucket["mpesa_txn_count"] += 1
+            amount = abs(float(txn.get("amount_kes", 0.0)))
+            if txn.get("direction", "in") == "in":
+                bucket["mpesa_deposit_kes"] += amount
+            else:
+                bucket["mpesa_withdraw_kes"] += amount
+            if txn.get("balance_kes") is not None:
+                bucket["mpesa_balance_sum_kes"] += float(txn["balance_kes"])
+                bucket["mpesa_balance_count"] += 1
+        return self._apply(deltas)
+
+    def ingest_ussd_events(self, events: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bulk-ingest USSD engagement events:
+        {msisdn, timestamp, event: "session"|"training"}
+        """
+        deltas: Dict[Tuple[str, date], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for event in events:
+            bucket = deltas[(normalize_msisdn(event["msisdn"]), _as_date(event["timestamp"]))]
+            if event.get("event", "session") == "training":
+                bucket["training_sessions"] += 1
+            else:
+                bucket["ussd_sessions"] += 1
+        return self._apply(deltas)
+
+    def _apply(self, deltas: Dict[Tuple[str, date], Dict[str, float]]) -> Dict[str, int]:
+        """Merge per-(msisdn, day) deltas into daily buckets and rolling aggregates"""
+        if not deltas:
+            return {"msisdns": 0, "days": 0}
+
+        today = datetime.utcnow().date()
+        msisdns = sorted({msisdn for msisdn, _ in deltas})
+        days = sorted({day for _, day in deltas})
+
+        db = self.session_factory()
+        try:
+            features = self._load_features(db, msisdns, today)
+
+            # Roll existing aggregates to today *before* new buckets land, so
+            # late-arriving old days are never subtracted twice
+            self._roll_forward(db, list(features.values()), today)
+
+            daily = {}
+            for chunk in _chunks(msisdns):
+                for row in db.query(BehaviorDaily).filter(
+                    BehaviorDaily.msisdn.in_(chunk),
+                    BehaviorDaily.day >= days[0],
+                    BehaviorDaily.day <= days[-1]
+                ):
+                    daily[(row.msisdn, row.day)] = row
+
+            for (msisdn, day), delta in deltas.items():
+                row = daily.get((msisdn, day))
+                if row is None:
+                    row = BehaviorDaily(msisdn=msisdn, day=day, **{f: 0 for f in DAILY_FIELDS})
+                    db.add(row)
+                    daily[(msisdn, day)] = row
+                for field, value in delta.items():
+                    if field in COUNT_FIELDS:
+                        delta[field] = value = int(value)
+                    setattr(row, field, (getattr(row, field) or 0) + value)
+
+                feature = features[msisdn]
+                if day < feature.first_seen:
+                    feature.first_seen = day
+                feature.training_sessions_total += int(delta.get("training_sessions", 0))
+                for column, (field, window) in ROLLING_FIELDS.items():
+                    if today - timedelta(days=window) < day <= today and field in delta:
+                        setattr(feature, column, (getattr(feature, column) or 0) + delta[field])
+
+            db.commit()
+            return {"msisdns": len(msisdns), "days": len(deltas)}
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _load_features(self, db, msisdns: List[str], today: date) -> Dict[str, BehaviorFeatures]:
+        """Feature rows for msisdns, creating empty ones for first-time numbers"""
+        features = {}
+        for chunk in _chunks(msisdns):
+            for row in db.query(BehaviorFeatures).filter(BehaviorFeatures.msisdn.in_(chunk)):
+                features[row.msisdn] = row
+
+        new_msisdns = [m for m in msisdns if m not in features]
+        members = self._cooperative_members(db, new_msisdns)
+        for msisdn in new_msisdns:
+            row = BehaviorFeatures(
+                msisdn=msisdn,
+                first_seen=today,
+                window_end=today,
+                training_sessions_total=0,
+                cooperative_member=1 if msisdn in members else 0,
+                **{column: 0 for column in ROLLING_FIELDS}
+            )
+            db.add(row)
+            features[msisdn] = row
+        return features
+
+    def _cooperative_members(self, db, msisdns: List[str]) -> set:
+        """MSISDNs of registered farmers that belong to a cooperative"""
+        # Farmers may be registered as +254..., 254... or 07...
+        variants = [v for m in msisdns for v in (m, "+" + m, "0" + m[3:])]
+        members = set()
+        for chunk in _chunks(variants):
+            rows = db.query(Farmer.phone_number).join(
+                CooperativeMember, CooperativeMember.farmer_id == Farmer.id
+            ).filter(Farmer.phone_number.in_(chunk)).distinct()
+            members.update(normalize_msisdn(phone) for (phone,) in rows)
+        return members
+
+    def _roll_forward(self, db, features: List[BehaviorFeatures], today: date):
+        """Subtract buckets that slid out of each window since window_end"""
+        stale: Dict[date, List[BehaviorFeatures]] = defaultdict(list)
+        for row in features:
+            if row.window_end < today:
+                stale[row.window_end].append(row)
+
+        for window_end, rows in stale.items():
+            by_msisdn = {row.msisdn: row for row in rows}
+            for window in (30, 90):
+                # Days in (window_end - window, today - window] have expired
+                first = window_end - timedelta(days=window - 1)
+                last = today - timedelta(days=window)
+                if last < first:
+                    continue
+                for chunk in _chunks(list(by_msisdn)):
+                    for daily in db.query(BehaviorDaily).filter(
+                        BehaviorDaily.msisdn.in_(chunk),
+                        BehaviorDaily.day >= first,
+                        BehaviorDaily.day <= last
+                    ):
+                        row = by_msisdn[daily.msisdn]
+                        for column, (field, w) in ROLLING_FIELDS.items():
+                            if w == window:
+                                setattr(row, column, getattr(row, column) - (getattr(daily, field) or 0))
+            for row in rows:
+                row.window_end = today
+
+    def roll_all(self) -> int:
+        """Nightly maintenance: roll every stale aggregate forward to today"""
+        today = datetime.utcnow().date()
+        db = self.session_factory()
+        try:
+            rows = db.query(BehaviorFeatures).filter(BehaviorFeatures.window_end < today).all()
+            self._roll_forward(db, rows, today)
+            db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    # Reads
+
+    def get_features(self, phone_number: str) -> Optional[Dict[str, float]]:
+        """Scoring features for one MSISDN, or None if it has never been seen"""
+        return self.get_many([phone_number]).get(phone_number)
+
+    def get_many(self, phone_numbers: List[str]) -> Dict[str, Dict[str, float]]:
+        """Scoring features keyed by the phone numbers passed in (unknown ones omitted)"""
+        today = datetime.utcnow().date()
+        canonical = {phone: normalize_msisdn(phone) for phone in phone_numbers}
+        msisdns = sorted(set(canonical.values()))
+
+        db = self.session_factory()
+        try:
+            rows = {}
+            for chunk in _chunks(msisdns):
+                for row in db.query(BehaviorFeatures).filter(BehaviorFeatures.msisdn.in_(chunk)):
+                    rows[row.msisdn] = row
+
+            stale = [row for row in rows.values() if row.window_end < today]
+            if stale:
+                self._roll_forward(db, stale, today)
+                db.commit()
+
+            features = {msisdn: self._to_scoring_features(row, today) for msisdn, row in rows.items()}
+        finally:
+            db.close()
+
+        return {
+            phone: features[msisdn]
+            for phone, msisdn in canonical.items() if msisdn in features
+        }
+
+    def _to_scoring_features(self, row: BehaviorFeatures, today: date) -> Dict[str, float]:
+        deposits = row.mpesa_deposit_kes_90d or 0.0
+        withdrawals = row.mpesa_withdraw_kes_90d or 0.0
+        if withdrawals > 0:
+            deposit_ratio = min(10.0, deposits / withdrawals)
+        else:
+            deposit_ratio = 10.0 if deposits > 0 else 0.0
+
+        return {
+            "mpesa_txn_count_30d": row.mpesa_txn_count_30d,
+            "mpesa_txn_count_90d": row.mpesa_txn_count_90d,
+            "mpesa_avg_balance": (
+                row.mpesa_balance_sum_kes_90d / row.mpesa_balance_count_90d
+                if row.mpesa_balance_count_90d else 0.0
+            ),
+            "deposit_to_withdraw_ratio": round(deposit_ratio, 3),
+            "ussd_engagement_count_30d": row.ussd_sessions_30d,
+            "ussd_engagement_count_90d": row.ussd_sessions_90d,
+            "account_age_days": (today - row.first_seen).days,
+            "cooperative_member": row.cooperative_member,
+            "training_sessions_attended": row.training_sessions_total
+        }
@@ -3,9 +3,10 @@ Carbon Service - Carbon metrics and sustainability tracking for Carbon Corp enti
 """
 
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import random
 from models.schemas import CarbonMetricsRequest, CarbonMetricsResponse
+from services.county_geocoder import get_county_geocoder
 
 class CarbonService:
     def __init__(self):
@@ -74,7 +75,25 @@ class CarbonService:
         
         return response
     
-    async def _generate_carbon_metrics(self, entity_id: str, start_date: date, end_date: date) -> Dict[str, Any]:
+    async def get_carbon_metrics_summary(self, request: CarbonMetricsRequest) -> Dict[str, Any]:
+        """Carbon metrics without the NDVI series, for streaming the series separately"""
+        entity_info = self.entities.get(request.entity_id, self.entities["entity_001"])
+        metrics = await self._generate_carbon_metrics(
+            request.entity_id, request.start_date, request.end_date, include_ndvi_series=False
+        )
+        return {
+            "entity_id": request.entity_id,
+            "entity_name": entity_info["name"],
+            "reporting_period": {
+                "start": request.start_date.isoformat(),
+                "end": request.end_date.isoformat()
+            },
+            **metrics
+        }
+    
+    async def _generate_carbon_metrics(
+        self, entity_id: str, start_date: date, end_date: date, include_ndvi_series: bool = True
+    ) -> Dict[str, Any]:
         """Generate carbon metrics for an entity"""
         
         # Base metrics that vary by entity
@@ -129,12 +148,13 @@ class CarbonService:
         
         # Spatial data (NDVI time series)
         spatial_data = {
-            "ndvi_time_series": self._generate_ndvi_time_series(start_date, end_date),
             "land_cover_change": {
                 "cropland_increase_ha": int(base_hectares * time_factor * random.uniform(0.02, 0.05)),
                 "degraded_land_rehabilitated_ha": int(base_hectares * time_factor * random.uniform(0.01, 0.03))
             }
         }
+        if include_ndvi_series:
+            spatial_data = {"ndvi_time_series": self._generate_ndvi_time_series(start_date, end_date), **spatial_data}
         
         # Data quality metrics
         data_quality = {
@@ -156,8 +176,11 @@ class CarbonService:
     
     def _generate_ndvi_time_series(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
         """Generate NDVI time series data"""
-        time_series = []
-        current_date = start_date
+        return list(self.iter_ndvi_time_series(start_date, end_date))
+    
+    def iter_ndvi_time_series(self, start_date: date, end_date: date) -> Iterator[Dict[str, Any]]:
+        """Monthly NDVI series oldest first, generated row by row"""
+        current_date = start_date.replace(day=1)  # month steps must not land on e.g. Feb 31
         base_ndvi = 0.4
         
         while current_date <= end_date:
@@ -167,18 +190,16 @@ class CarbonService:
             ndvi_value = base_ndvi * seasonal_factor + random.uniform(-0.05, 0.05)
             ndvi_value = max(0, min(1, ndvi_value))  # Clamp between 0 and 1
             
-            time_series.append({
+            yield {
                 "date": current_date.strftime("%Y-%m"),
                 "avg_ndvi": round(ndvi_value, 3)
-            })
+            }
             
             # Move to next month
             if current_date.month == 12:
                 current_date = current_date.replace(year=current_date.year + 1, month=1)
             else:
                 current_date = current_date.replace(month=current_date.month + 1)
-        
-        return time_series
     
     async def get_entity_dashboard(self, entity_id: str) -> Dict[str, Any]:
         """Get comprehensive dashboard data for an entity"""
@@ -286,12 +307,19 @@ class CarbonService:
     
     def _generate_map_data(self, entity_id: str) -> Dict[str, Any]:
         """Generate map visualization data"""
+        farm_locations = [
+            {"lat": -1.2921, "lng": 36.8219, "farmer_id": "farmer_001", "status": "active"},
+            {"lat": -1.3500, "lng": 37.0000, "farmer_id": "farmer_002", "status": "active"},
+            {"lat": -1.1000, "lng": 36.9000, "farmer_id": "farmer_003", "status": "inactive"}
+        ]
+        counties = get_county_geocoder().counties(
+            [farm["lat"] for farm in farm_locations], [farm["lng"] for farm in farm_locations]
+        )
+        for farm, county in zip(farm_locations, counties):
+            farm["county"] = county
+        
         return {
-            "farm_locations": [
-                {"lat": -1.2921, "lng": 36.8219, "farmer_id": "farmer_001", "status": "active"},
-                {"lat": -1.3500, "lng": 37.0000, "farmer_id": "farmer_002", "status": "active"},
-                {"lat": -1.1000, "lng": 36.9000, "farmer_id": "farmer_003", "status": "inactive"}
-            ],
+            "farm_locations": farm_locations,
             "ndvi_heatmap": {
                 "center": {"lat": -1.2921, "lng": 36.8219},
                 "radius": 50000,  # 50km radius
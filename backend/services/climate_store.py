@@ -0,0 +1,218 @@
+"""
+Climate Store - local daily climate time-series per NASA POWER grid cell
+Holds rainfall, ET, temperature and humidity so credit scoring reads
+30/90-day windows from disk; an ingest job appends only the missing days
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, tuple_
+
+from database import SessionLocal
+from models.climate import ClimateDaily
+from models.farmer import Farm
+from services.grid_cache import snap_to_grid
+
+# POWER parameter -> ClimateDaily column
+POWER_PARAMETERS = {
+    "PRECTOTCORR": "rainfall_mm",
+    "EVPTRNS": "et_mm",
+    "T2M": "temp_c",
+    "RH2M": "humidity_percent"
+}
+CLIMATE_FIELDS = list(POWER_PARAMETERS.values())
+
+# POWER marks days it has not processed yet with this fill value
+POWER_FILL_VALUE = -999.0
+
+Cell = Tuple[float, float]
+
+# SQLite caps bound parameters per statement (two per cell)
+CELL_CHUNK = 250
+
+
+def parse_power_response(payload: Dict[str, Any]) -> Dict[date, Dict[str, float]]:
+    """Turn a POWER daily JSON payload into {day: {field: value}}, skipping fill values"""
+    parameters = payload.get("properties", {}).get("parameter", {})
+    days: Dict[date, Dict[str, float]] = {}
+
+    for power_name, field in POWER_PARAMETERS.items():
+        for day_str, value in parameters.get(power_name, {}).items():
+            day = datetime.strptime(day_str, "%Y%m%d").date()
+            days.setdefault(day, {})[field] = value
+
+    return {
+        day: values for day, values in days.items()
+        if len(values) == len(CLIMATE_FIELDS)
+        and all(v is not None and v > POWER_FILL_VALUE for v in values.values())
+    }
+
+
+class ClimateStore:
+    """Daily climate observations keyed by (grid cell, date)"""
+
+    def __init__(self, session_factory=SessionLocal, max_staleness_days: int = 7):
+        self.session_factory = session_factory
+        # POWER lags real time by a few days; older windows are treated as missing
+        self.max_staleness_days = max_staleness_days
+
+    def latest_date(self, cell: Cell) -> Optional[date]:
+        """Most recent stored day for a cell"""
+        db = self.session_factory()
+        try:
+            return db.query(func.max(ClimateDaily.date)).filter(
+                ClimateDaily.cell_lat == cell[0],
+                ClimateDaily.cell_lon == cell[1]
+            ).scalar()
+        finally:
+            db.close()
+
+    def missing_range(
+        self, cell: Cell, end_date: date, history_days: int
+    ) -> Optional[Tuple[date, date]]:
+        """Day range that still has to be downloaded for a cell, or None if up to date"""
+        latest = self.latest_date(cell)
+        start = latest + timedelta(days=1) if latest else end_date - timedelta(days=history_days - 1)
+        if start > end_date:
+            return None
+        return start, end_date
+
+    def append(self, cell: Cell, days: Dict[date, Dict[str, float]]) -> int:
+        """Insert days not already stored; returns the number of rows added"""
+        if not days:
+            return 0
+
+        db = self.session_factory()
+        try:
+            existing = {
+                row[0] for row in db.query(ClimateDaily.date).filter(
+                    ClimateDaily.cell_lat == cell[0],
+                    ClimateDaily.cell_lon == cell[1],
+                    ClimateDaily.date >= min(days),
+                    ClimateDaily.date <= max(days)
+                )
+            }
+            rows = [
+                {"cell_lat": cell[0], "cell_lon": cell[1], "date": day, **values}
+                for day, values in sorted(days.items())
+                if day not in existing
+            ]
+            if rows:
+                db.bulk_insert_mappings(ClimateDaily, rows)
+                db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def read_window(
+        self,
+        cell: Cell,
+        days: int,
+        end_date: Optional[date] = None,
+        max_staleness_days: Optional[int] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Latest `days` stored observations up to end_date, oldest first.
+        Returns None when the cell is missing, too short or stale.
+        """
+        end_date = end_date or datetime.utcnow().date()
+        if max_staleness_days is None:
+            max_staleness_days = self.max_staleness_days
+
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                ClimateDaily.date,
+                ClimateDaily.rainfall_mm,
+                ClimateDaily.et_mm,
+                ClimateDaily.temp_c,
+                ClimateDaily.humidity_percent
+            ).filter(
+                ClimateDaily.cell_lat == cell[0],
+                ClimateDaily.cell_lon == cell[1],
+                ClimateDaily.date <= end_date
+            ).order_by(ClimateDaily.date.desc()).limit(days).all()
+        finally:
+            db.close()
+
+        if len(rows) < days or (end_date - rows[0][0]).days > max_staleness_days:
+            return None
+
+        rows.reverse()
+        values = np.array([row[1:] for row in rows], dtype=float)
+        window = {field: values[:, i] for i, field in enumerate(CLIMATE_FIELDS)}
+        window["dates"] = [row[0] for row in rows]
+        return window
+
+    def rainfall_rows(self, cells: Optional[List[Cell]] = None) -> List[Tuple[float, float, date, float, datetime]]:
+        """(cell_lat, cell_lon, date, rainfall_mm, ingested_at) for the given cells, or every cell"""
+        columns = (
+            ClimateDaily.cell_lat,
+            ClimateDaily.cell_lon,
+            ClimateDaily.date,
+            ClimateDaily.rainfall_mm,
+            ClimateDaily.ingested_at
+        )
+        db = self.session_factory()
+        try:
+            if cells is None:
+                return db.query(*columns).all()
+            rows = []
+            for i in range(0, len(cells), CELL_CHUNK):
+                rows.extend(db.query(*columns).filter(
+                    tuple_(ClimateDaily.cell_lat, ClimateDaily.cell_lon).in_(cells[i:i + CELL_CHUNK])
+                ).all())
+            return rows
+        finally:
+            db.close()
+
+    def cells_ingested_since(self, since: datetime) -> List[Cell]:
+        """Cells with rows ingested after `since` (by any process)"""
+        db = self.session_factory()
+        try:
+            return [
+                (row[0], row[1]) for row in
+                db.query(ClimateDaily.cell_lat, ClimateDaily.cell_lon).filter(
+                    ClimateDaily.ingested_at > since
+                ).distinct()
+            ]
+        finally:
+            db.close()
+
+    def cells(self) -> List[Cell]:
+        """Grid cells already present in the store"""
+        db = self.session_factory()
+        try:
+            return [
+                (row[0], row[1]) for row in
+                db.query(ClimateDaily.cell_lat, ClimateDaily.cell_lon).distinct()
+            ]
+        finally:
+            db.close()
+
+    def farm_cells(self) -> List[Cell]:
+        """Grid cells covering every active registered farm"""
+        db = self.session_factory()
+        try:
+            coords = db.query(Farm.latitude, Farm.longitude).filter(Farm.is_active == True).all()  # noqa: E712
+        finally:
+            db.close()
+        return list(dict.fromkeys(snap_to_grid(lat, lon) for lat, lon in coords))
+
+    def farm_cell_counts(self) -> Dict[Cell, int]:
+        """Active registered farms per grid cell"""
+        db = self.session_factory()
+        try:
+            coords = db.query(Farm.latitude, Farm.longitude).filter(Farm.is_active == True).all()  # noqa: E712
+        finally:
+            db.close()
+        counts: Dict[Cell, int] = {}
+        for lat, lon in coords:
+            cell = snap_to_grid(lat, lon)
+            counts[cell] = counts.get(cell, 0) + 1
+        return counts
@@ -7,12 +7,13 @@ Multi-player features: leaderboards, resource sharing, collective bargaining
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import and_, desc, func, or_
 from models.cooperative import (
     Cooperative, CooperativeMember, CooperativeResource, 
     CooperativeActivity, CountyLeaderboard, ResourceSharing
 )
 from models.farmer import Farmer
+from services.county_geocoder import get_county_geocoder
 
 class CooperativeService:
     """Service for cooperative and community features"""
@@ -296,6 +297,14 @@ class CooperativeService:
             'status': 'scheduled'
         }
     
+    def _farmer_county(self, farmer: Farmer) -> Optional[str]:
+        """County from the farmer's home location, falling back to the registered location"""
+        if farmer.home_latitude is not None and farmer.home_longitude is not None:
+            county = get_county_geocoder().county(farmer.home_latitude, farmer.home_longitude)
+            if county:
+                return county
+        return farmer.location
+    
     def get_peer_mentorship_matches(self, farmer_id: str) -> Dict:
         """Get peer mentorship matches based on complementary skills"""
         # Get farmer's profile
@@ -305,10 +314,36 @@ class CooperativeService:
         
         # Find farmers with complementary skills in same county
         # This is a simplified matching algorithm
-        potential_mentors = self.db.query(Farmer).filter(
-            Farmer.county == farmer.county,
-            Farmer.id != farmer_id
-        ).limit(5).all()
+        county = self._farmer_county(farmer)
+        if county is None:
+            candidates = []
+        else:
+            # Narrow to the county's bounding box (or its registered name) in SQL,
+            # then geocode only those candidates
+            bounds = get_county_geocoder().bounds(county)
+            in_county = Farmer.location == county
+            if bounds is not None:
+                south, north, west, east = bounds
+                in_county = or_(
+                    in_county,
+                    and_(
+                        Farmer.home_latitude.between(south, north),
+                        Farmer.home_longitude.between(west, east)
+                    )
+                )
+            candidates = self.db.query(Farmer).filter(
+                Farmer.id != farmer.id,
+                Farmer.is_active == True,
+                in_county
+            ).all()
+        candidate_counties = get_county_geocoder().counties(
+            [c.home_latitude if c.home_latitude is not None else float("nan") for c in candidates],
+            [c.home_longitude if c.home_longitude is not None else float("nan") for c in candidates]
+        )
+        potential_mentors = [
+            candidate for candidate, candidate_county in zip(candidates, candidate_counties)
+            if (candidate_county or candidate.location) == county
+        ][:5]
         
         matches = []
         for mentor in potential_mentors:
@@ -0,0 +1,208 @@
+"""
+County Geocoder - reverse-geocode coordinates to Kenya's 47 counties
+Built once on top of the geofence raster: when county polygons are present
+in the geofence file they are used directly, otherwise every cell inside
+the Kenya bounding box is assigned to the county of the nearest reference
+town (an approximate Voronoi partition). Lookups are array indexing,
+single or batch.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.geofence import KENYA_BBOX, GeofenceIndex, get_geofence_index, in_kenya_bbox
+
+# Reference towns per county (code order), headquarters first, used when no
+# county polygons are supplied. Several towns per county keep the
+# nearest-town partition close to the real boundaries, including border
+# and coastal towns
+COUNTY_REFERENCE_TOWNS = [
+    ("Mombasa", [(-4.04, 39.67), (-4.09, 39.66), (-3.99, 39.72)]),
+    ("Kwale", [(-4.17, 39.45), (-4.28, 39.57), (-4.47, 39.48), (-4.55, 39.12), (-4.14, 39.32), (-4.66, 39.22)]),
+    ("Kilifi", [(-3.63, 39.85), (-3.22, 40.12), (-3.94, 39.74), (-3.86, 39.47), (-3.35, 40.02), (-3.55, 39.68)]),
+    ("Tana River", [(-1.50, 40.03), (-2.27, 40.12), (-1.10, 39.95), (-2.53, 40.53), (-1.30, 39.30)]),
+    ("Lamu", [(-2.27, 40.90), (-2.39, 40.70), (-2.39, 40.44), (-1.75, 41.48), (-2.05, 41.10)]),
+    ("Taita-Taveta", [(-3.50, 38.38), (-3.39, 38.56), (-3.40, 38.36), (-3.40, 37.68), (-3.41, 38.13), (-2.90, 38.50)]),
+    ("Garissa", [(-0.45, 39.65), (0.05, 40.31), (-1.70, 40.13), (-1.60, 40.52), (0.36, 40.86)]),
+    ("Wajir", [(1.75, 40.06), (1.01, 39.49), (2.78, 39.52), (2.20, 40.12), (2.47, 39.55)]),
+    ("Mandera", [(3.94, 41.86), (2.80, 40.93), (3.40, 40.22), (3.93, 41.22), (3.95, 40.33), (3.15, 41.18)]),
+    ("Marsabit", [(2.33, 37.98), (3.52, 39.05), (3.55, 38.65), (3.32, 37.07), (2.76, 36.72), (1.60, 37.81), (4.31, 36.23)]),
+    ("Isiolo", [(0.35, 37.58), (0.53, 38.52), (1.06, 38.66), (0.32, 38.20)]),
+    ("Meru", [(0.05, 37.65), (0.23, 37.94), (-0.07, 37.67), (0.08, 37.24)]),
+    ("Tharaka-Nithi", [(-0.34, 37.87), (-0.33, 37.65), (-0.23, 37.62), (-0.15, 37.98)]),
+    ("Embu", [(-0.54, 37.46), (-0.42, 37.57), (-0.58, 37.63), (-0.68, 37.65), (-0.45, 37.78)]),
+    ("Kitui", [(-1.37, 38.01), (-0.93, 38.06), (-1.85, 38.21), (-2.07, 38.18), (-0.56, 38.21), (-0.28, 38.23), (-1.28, 38.55)]),
+    ("Machakos", [(-1.52, 37.26), (-1.45, 36.98), (-1.30, 37.35), (-1.15, 37.54), (-1.35, 37.45), (-1.39, 36.94)]),
+    ("Makueni", [(-1.78, 37.63), (-2.28, 37.82), (-2.42, 37.97), (-2.69, 38.17), (-2.02, 37.37), (-2.08, 37.47), (-1.63, 37.45)]),
+    ("Nyandarua", [(-0.27, 36.38), (-0.73, 36.66), (-0.06, 36.53), (-0.03, 36.36)]),
+    ("Nyeri", [(-0.42, 36.95), (-0.48, 37.13), (-0.55, 36.94), (-0.32, 36.90), (-0.16, 37.02)]),
+    ("Kirinyaga", [(-0.50, 37.28), (-0.56, 37.32), (-0.67, 37.21), (-0.70, 37.37)]),
+    ("Murang'a", [(-0.72, 37.15), (-0.69, 36.96), (-0.90, 37.19), (-0.90, 36.99)]),
+    ("Kiambu", [(-1.17, 36.83), (-1.03, 37.07), (-1.15, 36.96), (-1.10, 36.64), (-1.25, 36.66), (-1.00, 36.91), (-0.93, 36.57)]),
+    ("Turkana", [(3.12, 35.60), (3.72, 34.86), (4.20, 34.35), (2.38, 35.65), (3.53, 35.86), (1.95, 36.02), (4.27, 35.76)]),
+    ("West Pokot", [(1.24, 35.11), (1.31, 35.20), (1.48, 35.47), (1.49, 34.99), (1.43, 35.36)]),
+    ("Samburu", [(1.10, 36.70), (1.78, 36.79), (0.98, 37.32), (0.64, 37.68), (2.10, 36.92)]),
+    ("Trans Nzoia", [(1.02, 35.00), (1.07, 34.85), (0.90, 34.92)]),
+    ("Uasin Gishu", [(0.51, 35.27), (0.22, 35.43), (0.63, 35.05), (0.88, 35.12), (0.68, 35.16)]),
+    ("Elgeyo-Marakwet", [(0.67, 35.51), (0.98, 35.56), (1.18, 35.60)]),
+    ("Nandi", [(0.20, 35.10), (0.10, 35.18), (0.32, 35.17)]),
+    ("Baringo", [(0.49, 35.74), (0.47, 35.98), (0.05, 35.72), (-0.02, 35.97), (0.96, 36.02), (0.62, 36.03)]),
+    ("Laikipia", [(0.27, 36.54), (0.01, 37.07), (0.03, 36.36), (0.40, 37.17)]),
+    ("Nakuru", [(-0.30, 36.07), (-0.72, 36.43), (-0.25, 35.73), (-0.33, 35.94), (-0.50, 36.32), (0.00, 36.23), (-0.99, 36.58)]),
+    ("Narok", [(-1.08, 35.87), (-1.00, 34.88), (-1.23, 34.80), (-1.01, 35.66), (-0.93, 35.44), (-1.55, 35.37), (-1.15, 36.35)]),
+    ("Kajiado", [(-1.85, 36.78), (-1.48, 36.96), (-1.36, 36.67), (-2.55, 36.79), (-2.93, 37.51), (-1.90, 36.29), (-1.68, 36.84), (-1.40, 36.76)]),
+    ("Kericho", [(-0.37, 35.28), (-0.58, 35.19), (-0.17, 35.60), (-0.20, 35.47)]),
+    ("Bomet", [(-0.78, 35.34), (-0.68, 35.11), (-0.86, 35.39)]),
+    ("Kakamega", [(0.28, 34.75), (0.34, 34.49), (0.44, 34.85), (0.21, 34.49), (0.62, 34.90)]),
+    ("Vihiga", [(0.08, 34.72), (0.03, 34.59)]),
+    ("Bungoma", [(0.56, 34.56), (0.61, 34.77), (0.79, 34.72), (0.74, 34.62), (0.81, 34.45)]),
+    ("Busia", [(0.46, 34.11), (0.64, 34.28), (0.45, 34.25), (0.10, 33.98), (0.34, 34.33)]),
+    ("Siaya", [(0.06, 34.29), (-0.10, 34.27), (0.18, 34.29), (0.10, 34.53)]),
+    ("Kisumu", [(-0.09, 34.77), (-0.17, 34.92), (-0.16, 35.20), (-0.10, 34.51), (-0.16, 35.08)]),
+    ("Homa Bay", [(-0.53, 34.46), (-0.43, 34.21), (-0.51, 34.74), (-0.36, 34.64), (-0.73, 34.37)]),
+    ("Migori", [(-1.06, 34.47), (-0.76, 34.60), (-0.91, 34.53), (-1.23, 34.48), (-1.19, 34.62)]),
+    ("Kisii", [(-0.68, 34.77), (-0.80, 34.72), (-0.85, 34.80)]),
+    ("Nyamira", [(-0.57, 34.94), (-0.65, 35.00), (-0.47, 34.92)]),
+    ("Nairobi", [(-1.29, 36.82), (-1.32, 36.71), (-1.22, 36.90), (-1.32, 36.90), (-1.27, 36.99)])
+]
+
+# County headquarters; each must geocode back to its own county
+COUNTY_HEADQUARTERS = {name: towns[0] for name, towns in COUNTY_REFERENCE_TOWNS}
+
+
+class CountyGeocoder:
+    """O(1) county (and sub-county, when polygons exist) labels for coordinates"""
+
+    def __init__(self, index: Optional[GeofenceIndex] = None):
+        self.index = index or get_geofence_index()
+
+        self.from_polygons = bool(self.index.features["county"])
+        if self.from_polygons:
+            self.county_names = self.index.names("county")
+            self._raster = None
+        else:
+            self.county_names = [name for name, _ in COUNTY_REFERENCE_TOWNS]
+            self._raster = self._nearest_reference_raster()
+
+        self._bounds: Optional[Dict[str, Tuple[float, float, float, float]]] = None
+
+        self.headquarters_mismatches = self.check_headquarters()
+        for name, found in self.headquarters_mismatches.items():
+            print(f"County geocoder: {name} headquarters labelled {found}")
+
+    def _nearest_reference_raster(self) -> np.ndarray:
+        """County id (1-based) of the nearest reference town for every raster cell"""
+        index = self.index
+        ref_ids = np.array([
+            county_id for county_id, (_, towns) in enumerate(COUNTY_REFERENCE_TOWNS, start=1) for _ in towns
+        ], dtype=np.int16)
+        ref_lats = np.array([lat for _, towns in COUNTY_REFERENCE_TOWNS for lat, _ in towns])
+        ref_lons = np.array([lon for _, towns in COUNTY_REFERENCE_TOWNS for _, lon in towns])
+        lons = index.west + (np.arange(index.n_cols) + 0.5) * index.resolution
+
+        raster = np.empty((index.n_rows, index.n_cols), dtype=np.int16)
+        for row in range(index.n_rows):
+            lat = index.south + (row + 0.5) * index.resolution
+            # Equirectangular distance: scale longitude by cos(latitude)
+            dx = (lons[:, None] - ref_lons[None, :]) * np.cos(np.radians(lat))
+            dy = lat - ref_lats[None, :]
+            raster[row] = ref_ids[np.argmin(dx * dx + dy * dy, axis=1)]
+        return raster
+
+    def _county_ids(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        if self.from_polygons:
+            return self.index.lookup(lats, lons)["county"]
+        rows, cols, valid = self.index.cell_indices(lats, lons)
+        return np.where(valid & in_kenya_bbox(lats, lons), self._raster[rows, cols], 0)
+
+    def bounds(self, county: str) -> Optional[Tuple[float, float, float, float]]:
+        """(south, north, west, east) box enclosing a county, for coarse prefilters such as SQL ranges"""
+        if self._bounds is None:
+            self._bounds = self._county_bounds()
+        return self._bounds.get(county)
+
+    def _county_bounds(self) -> Dict[str, Tuple[float, float, float, float]]:
+        bounds: Dict[str, Tuple[float, float, float, float]] = {}
+        if self.from_polygons:
+            for feature in self.index.features["county"]:
+                south, north, west, east = feature["bbox"]
+                if feature["name"] in bounds:
+                    s0, n0, w0, e0 = bounds[feature["name"]]
+                    south, north, west, east = min(south, s0), max(north, n0), min(west, w0), max(east, e0)
+                bounds[feature["name"]] = (south, north, west, east)
+            return bounds
+
+        index = self.index
+        box_south, box_north, box_west, box_east = KENYA_BBOX
+        for county_id, name in enumerate(self.county_names, start=1):
+            rows, cols = np.nonzero(self._raster == county_id)
+            if not len(rows):
+                continue
+            bounds[name] = (
+                max(float(index.south + rows.min() * index.resolution), box_south),
+                min(float(index.south + (rows.max() + 1) * index.resolution), box_north),
+                max(float(index.west + cols.min() * index.resolution), box_west),
+                min(float(index.west + (cols.max() + 1) * index.resolution), box_east)
+            )
+        return bounds
+
+    def check_headquarters(self) -> Dict[str, Optional[str]]:
+        """Counties whose headquarters town does not geocode back to them ({county: label found})"""
+        names = list(COUNTY_HEADQUARTERS)
+        found = self.counties(
+            [COUNTY_HEADQUARTERS[name][0] for name in names], [COUNTY_HEADQUARTERS[name][1] for name in names]
+        )
+        return {name: county for name, county in zip(names, found) if county != name}
+
+    def counties(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> List[Optional[str]]:
+        """County name per point (None outside Kenya)"""
+        ids = self._county_ids(np.asarray(latitudes, dtype=float), np.asarray(longitudes, dtype=float))
+        return [self.county_names[i - 1] if i else None for i in ids.tolist()]
+
+    def county(self, latitude: float, longitude: float) -> Optional[str]:
+        """County name for one point (None outside Kenya)"""
+        if self.from_polygons:
+            return self.index.name("county", self.index.lookup_point(latitude, longitude)["county"])
+        if not in_kenya_bbox(latitude, longitude):
+            return None
+        row = int((latitude - self.index.south) // self.index.resolution)
+        col = int((longitude - self.index.west) // self.index.resolution)
+        return self.county_names[int(self._raster[row, col]) - 1]
+
+    def label_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> List[Dict[str, Optional[str]]]:
+        """County and sub-county labels per point"""
+        lats = np.asarray(latitudes, dtype=float)
+        lons = np.asarray(longitudes, dtype=float)
+        counties = self.counties(lats, lons)
+        subcounty_ids = self.index.lookup(lats, lons)["subcounty"].tolist()
+        return [
+            {"county": county, "subcounty": self.index.name("subcounty", sub)}
+            for county, sub in zip(counties, subcounty_ids)
+        ]
+
+    def label(self, latitude: float, longitude: float) -> Dict[str, Optional[str]]:
+        """County and sub-county label for one point"""
+        return {
+            "county": self.county(latitude, longitude),
+            "subcounty": self.index.name("subcounty", self.index.lookup_point(latitude, longitude)["subcounty"])
+        }
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "counties": len(self.county_names),
+            "source": "polygons" if self.from_polygons else "nearest_reference_town",
+            "headquarters_mismatches": self.headquarters_mismatches,
+            "subcounties": len(self.index.features["subcounty"])
+        }
+
+
+_geocoder: Optional[CountyGeocoder] = None
+
+
+def get_county_geocoder() -> CountyGeocoder:
+    """Process-wide geocoder (built on first use, typically at startup)"""
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = CountyGeocoder()
+    return _geocoder
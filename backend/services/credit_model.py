@@ -0,0 +1,283 @@
+"""
+Credit Model Runtime - serialized credit models loaded once, shared by
+the USSD/API path and batch jobs, hot-swappable without a restart
+Supports linear (capped additive terms) and tree-ensemble models
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+MODEL_DIR = Path(os.getenv("CREDIT_MODEL_DIR", Path(__file__).resolve().parent.parent / "ml_models"))
+DEFAULT_MODEL_NAME = os.getenv("CREDIT_MODEL_NAME", "credit_linear_v1")
+
+
+class LinearCreditModel:
+    """
+    score = clip(intercept + sum(weight * min(cap, x / divisor)))
+    Terms are applied in file order so results are bit-for-bit reproducible.
+    """
+
+    model_type = "linear"
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.version = spec["version"]
+        self.intercept = float(spec.get("intercept", 0.0))
+        self.terms = spec["terms"]
+        self.feature_names = [term["feature"] for term in self.terms]
+        self.clip = tuple(spec.get("clip", (0.0, 1.0)))
+
+        self._divisors = [float(term.get("divisor", 1.0)) for term in self.terms]
+        self._caps = [term.get("cap") for term in self.terms]
+        self._weights = [float(term.get("weight", 1.0)) for term in self.terms]
+
+    def predict_many(self, X: np.ndarray, explain: bool = False):
+        """
+        Scores for an (n_rows, len(feature_names)) matrix. With explain=True
+        also returns (contributions, bias): each term's contribution is
+        exactly what it added to the score.
+        """
+        score = np.full(len(X), self.intercept)
+        contributions = np.empty(X.shape) if explain else None
+        for i in range(len(self.terms)):
+            term = X[:, i] / self._divisors[i]
+            if self._caps[i] is not None:
+                term = np.minimum(self._caps[i], term)
+            term = term * self._weights[i]
+            score = score + term
+            if explain:
+                contributions[:, i] = term
+
+        score = np.clip(score, *self.clip)
+        if explain:
+            return score, contributions, np.full(len(X), self.intercept)
+        return score
+
+
+class TreeEnsembleCreditModel:
+    """
+    Additive ensemble of binary trees in flat array form (scikit-learn /
+    LightGBM dump layout): per node feature, threshold, left, right, value;
+    left == -1 marks a leaf. score = clip(base_score + sum(leaf values)).
+    """
+
+    model_type = "tree_ensemble"
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.version = spec["version"]
+        self.feature_names = spec["features"]
+        self.base_score = float(spec.get("base_score", 0.0))
+        self.clip = tuple(spec.get("clip", (0.0, 1.0)))
+        self.trees = [
+            {
+                "feature": np.asarray(tree["feature"], dtype=np.int64),
+                "threshold": np.asarray(tree["threshold"], dtype=float),
+                "left": np.asarray(tree["left"], dtype=np.int64),
+                "right": np.asarray(tree["right"], dtype=np.int64),
+                "value": np.asarray(tree["value"], dtype=float)
+            }
+            for tree in spec["trees"]
+        ]
+        self.max_depth = max((self._depth(tree) for tree in self.trees), default=0)
+
+    @staticmethod
+    def _depth(tree: Dict[str, np.ndarray]) -> int:
+        depth, frontier = 0, [0]
+        while frontier:
+            frontier = [
+                child for node in frontier if tree["left"][node] != -1
+                for child in (tree["left"][node], tree["right"][node])
+            ]
+            depth += 1 if frontier else 0
+        return depth
+
+    def _descend(self, tree: Dict[str, np.ndarray], X: np.ndarray, contributions: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Leaf index reached by every row (all rows descend one level per step).
+        When contributions is given, each split's value change is credited
+        to the split feature on the way down (Saabas path attribution).
+        """
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.int64)
+        for _ in range(self.max_depth):
+            is_leaf = tree["left"][node] == -1
+            feature = np.maximum(tree["feature"][node], 0)
+            go_left = X[rows, feature] <= tree["threshold"][node]
+            child = np.where(is_leaf, node, np.where(go_left, tree["left"][node], tree["right"][node]))
+            if contributions is not None:
+                contributions[rows, feature] += tree["value"][child] - tree["value"][node]
+            node = child
+        return node
+
+    def predict_many(self, X: np.ndarray, explain: bool = False):
+        """
+        Scores for an (n_rows, len(feature_names)) matrix. With explain=True
+        also returns (contributions, bias) from the same traversal.
+        """
+        score = np.full(len(X), self.base_score)
+        contributions = np.zeros(X.shape) if explain else None
+        bias = self.base_score
+        for tree in self.trees:
+            score = score + tree["value"][self._descend(tree, X, contributions)]
+            bias += tree["value"][0]
+
+        score = np.clip(score, *self.clip)
+        if explain:
+            return score, contributions, np.full(len(X), bias)
+        return score
+
+
+MODEL_TYPES = {
+    LinearCreditModel.model_type: LinearCreditModel,
+    TreeEnsembleCreditModel.model_type: TreeEnsembleCreditModel
+}
+
+
+def load_model(path: Path):
+    """Deserialize a credit model from a JSON spec"""
+    with open(path) as f:
+        spec = json.load(f)
+
+    model_class = MODEL_TYPES.get(spec.get("type"))
+    if model_class is None:
+        raise ValueError(f"Unknown credit model type: {spec.get('type')}")
+    try:
+        return model_class(spec)
+    except (KeyError, TypeError, IndexError) as e:
+        raise ValueError(f"Invalid credit model spec {path.name}: {e}")
+
+
+class ModelRuntime:
+    """
+    Holds the active credit model. Callers read the model reference once per
+    call, so a hot swap never mixes two versions inside one batch.
+    """
+
+    def __init__(self, model_dir: Path = MODEL_DIR, model_name: str = DEFAULT_MODEL_NAME):
+        self.model_dir = Path(model_dir)
+        self._lock = threading.Lock()
+        self._column_index: Dict[tuple, np.ndarray] = {}
+        # Feature columns callers can supply; reloads needing others are rejected
+        self.feature_columns: Optional[List[str]] = None
+        self._model = load_model(self._model_path(model_name))
+        self.loaded_from = model_name
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def version(self) -> str:
+        return self._model.version
+
+    def _model_path(self, model_name: str) -> Path:
+        path = (self.model_dir / f"{model_name}.json").resolve()
+        if path.parent != self.model_dir.resolve():
+            raise ValueError(f"Invalid model name: {model_name}")
+        return path
+
+    def available_models(self) -> List[str]:
+        """Model files that can be swapped in"""
+        return sorted(path.stem for path in self.model_dir.glob("*.json"))
+
+    def validate(self, model) -> None:
+        """Raise ValueError if a model needs unknown features or fails a trial prediction"""
+        if self.feature_columns is not None:
+            missing = sorted(set(model.feature_names) - set(self.feature_columns))
+            if missing:
+                raise ValueError(f"Model {model.version} needs unknown features: {', '.join(missing)}")
+
+        trial = np.zeros((1, len(model.feature_names)))
+        try:
+            score = model.predict_many(trial)
+            explained = model.predict_many(trial, explain=True)
+        except Exception as e:
+            raise ValueError(f"Model {model.version} failed a trial prediction: {e}")
+        if np.shape(score) != (1,) or not np.all(np.isfinite(score)) or not np.all(np.isfinite(explained[1])):
+            raise ValueError(f"Model {model.version} returned an invalid trial score")
+
+    def reload(self, model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Load and validate a model version, then swap it in atomically (the old model stays on failure)"""
+        model_name = model_name or self.loaded_from
+        new_model = load_model(self._model_path(model_name))
+        self.validate(new_model)
+
+        with self._lock:
+            previous = self._model.version
+            self._model = new_model
+            self.loaded_from = model_name
+            self._column_index.clear()
+
+        return {"previous_version": previous, "active_version": new_model.version}
+
+    def _columns(self, model, feature_names: Sequence[str]) -> np.ndarray:
+        key = (id(model), tuple(feature_names))
+        index = self._column_index.get(key)
+        if index is None:
+            index = np.array([list(feature_names).index(name) for name in model.feature_names], dtype=np.int64)
+            self._column_index[key] = index
+        return index
+
+    def predict_many(self, X: np.ndarray, feature_names: Sequence[str]) -> np.ndarray:
+        """Batched scores; X columns are named by feature_names"""
+        model = self._model
+        return model.predict_many(X[:, self._columns(model, feature_names)])
+
+    def explain_many(self, X: np.ndarray, feature_names: Sequence[str]) -> Dict[str, Any]:
+        """
+        Scores plus exact additive attributions from one model pass:
+        bias + contributions.sum(axis=1) + adjustment == score for every row,
+        where adjustment absorbs clipping to the score range.
+        """
+        model = self._model
+        scores, contributions, bias = model.predict_many(
+            X[:, self._columns(model, feature_names)], explain=True
+        )
+
+        # Fold repeated features into one column per distinct feature
+        names = list(dict.fromkeys(model.feature_names))
+        if len(names) != len(model.feature_names):
+            folded = np.zeros((len(X), len(names)))
+            for i, name in enumerate(model.feature_names):
+                folded[:, names.index(name)] += contributions[:, i]
+            contributions = folded
+
+        return {
+            "scores": scores,
+            "contributions": contributions,
+            "feature_names": names,
+            "bias": bias,
+            "adjustment": scores - (bias + contributions.sum(axis=1)),
+            "model_version": model.version
+        }
+
+    def predict(self, features: Dict[str, float]) -> float:
+        """Single-row score from a feature dict"""
+        model = self._model
+        row = np.array([[features.get(name, 0.0) for name in model.feature_names]], dtype=float)
+        return float(model.predict_many(row)[0])
+
+    def info(self) -> Dict[str, Any]:
+        model = self._model
+        return {
+            "active_version": model.version,
+            "type": model.model_type,
+            "features": model.feature_names,
+            "loaded_from": self.loaded_from,
+            "available": self.available_models()
+        }
+
+
+_runtime: Optional[ModelRuntime] = None
+
+
+def get_model_runtime() -> ModelRuntime:
+    """Process-wide runtime (loaded on first use, typically at startup)"""
+    global _runtime
+    if _runtime is None:
+        _runtime = ModelRuntime()
+    return _runtime
@@ -0,0 +1,137 @@
+"""
+Farm Conditions - one aggregate view of a farm for dashboards
+Forecast, NDVI, aflatoxin risk and credit score are independent, so all
+of them start at once; each source has its own timeout and a slow or
+failing source is reported as such instead of failing the whole view.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.aflatoxin_service import AflatoxinService
+from services.credit_service import CreditScoringService
+from services.weather_service import WeatherService
+
+# Per-source timeouts in seconds
+SOURCE_TIMEOUTS = {
+    "forecast": float(os.getenv("CONDITIONS_FORECAST_TIMEOUT_SECONDS", "3")),
+    "ndvi": float(os.getenv("CONDITIONS_NDVI_TIMEOUT_SECONDS", "3")),
+    "aflatoxin": float(os.getenv("CONDITIONS_AFLATOXIN_TIMEOUT_SECONDS", "2")),
+    "credit": float(os.getenv("CONDITIONS_CREDIT_TIMEOUT_SECONDS", "5"))
+}
+
+DEFAULT_CROP_STAGE = "pre-harvest"
+NDVI_DAYS = 30
+
+
+class FarmConditionsService:
+    """Concurrent fan-out over the per-farm data sources"""
+
+    def __init__(
+        self,
+        weather_service: WeatherService,
+        aflatoxin_service: AflatoxinService,
+        credit_service: CreditScoringService,
+        timeouts: Optional[Dict[str, float]] = None
+    ):
+        self.weather_service = weather_service
+        self.aflatoxin_service = aflatoxin_service
+        self.credit_service = credit_service
+        self.timeouts = {**SOURCE_TIMEOUTS, **(timeouts or {})}
+
+    async def _run(self, name: str, call: Callable[[], Awaitable[Any]], timeout: float) -> Dict[str, Any]:
+        """One source under its timeout: {status, elapsed_ms, data | error}"""
+        started = time.perf_counter()
+        try:
+            data = await asyncio.wait_for(call(), timeout=timeout)
+            result = {"status": "ok", "data": data}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout", "error": f"{name} exceeded {timeout:g}s"}
+        except Exception as e:
+            print(f"Farm conditions source {name} failed: {e}")
+            result = {"status": "error", "error": str(e)}
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def get_conditions(
+        self,
+        latitude: float,
+        longitude: float,
+        phone_number: Optional[str] = None,
+        crop_type: Optional[str] = None,
+        farm_size_acres: Optional[float] = None,
+        crop_stage: str = DEFAULT_CROP_STAGE,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Every source for one farm location, fetched concurrently
+
+        Args:
+            timeout: optional cap applied on top of each source's own timeout
+
+        Returns:
+            Dict with one entry per source plus overall status and timing
+        """
+        calls: Dict[str, Callable[[], Awaitable[Any]]] = {
+            "forecast": lambda: self.weather_service.get_forecast(latitude, longitude),
+            "ndvi": lambda: self.weather_service.get_ndvi_data(latitude, longitude, NDVI_DAYS),
+            # Synchronous service; keep it off the event loop
+            "aflatoxin": lambda: asyncio.to_thread(
+                self.aflatoxin_service.check_aflatoxin_risk,
+                {"lat": latitude, "lon": longitude},
+                crop_stage
+            )
+        }
+        if phone_number:
+            calls["credit"] = lambda: self._credit(phone_number, latitude, longitude, crop_type, farm_size_acres)
+
+        started = time.perf_counter()
+        names = list(calls)
+        results = await asyncio.gather(*[
+            self._run(
+                name,
+                calls[name],
+                min(self.timeouts[name], timeout) if timeout is not None else self.timeouts[name]
+            )
+            for name in names
+        ])
+        sources = dict(zip(names, results))
+
+        ok = sum(1 for result in results if result["status"] == "ok")
+        return {
+            "status": "complete" if ok == len(results) else ("partial" if ok else "unavailable"),
+            "sources": sources,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    async def _credit(
+        self,
+        phone_number: str,
+        latitude: float,
+        longitude: float,
+        crop_type: Optional[str],
+        farm_size_acres: Optional[float]
+    ) -> Dict[str, Any]:
+        """Latest stored score when fresh, otherwise a live score"""
+        crop_type = crop_type or "maize"
+        stored = await asyncio.to_thread(
+            self.credit_service.score_store.latest,
+            phone_number, latitude, longitude, crop_type, farm_size_acres
+        )
+        if stored is not None:
+            return {**stored, "source": "precomputed"}
+
+        score = await self.credit_service.score_farmer(
+            phone_number, latitude, longitude, crop_type, farm_size_acres
+        )
+        return {
+            "credit_score": score.score,
+            "risk_level": score.risk_level,
+            "loan_recommendation": score.loan_recommendation,
+            "fraud_score": score.fraud_score,
+            "yield_estimate_tonnes": score.yield_estimate,
+            "satellite_status": score.satellite_status,
+            "source": "live"
+        }
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from models.farmer import Farmer, Farm, FarmActivity, FarmerSession
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import secrets
 import hashlib
@@ -78,6 +78,16 @@ class FarmerService:
         """Get farm by ID"""
         return self.db.query(Farm).filter(Farm.id == farm_id).first()
     
+    def get_farm_coordinates(self, farm_ids: List[int]) -> Dict[int, Tuple[float, float]]:
+        """(latitude, longitude) per farm id; unknown ids are omitted"""
+        coordinates = {}
+        for i in range(0, len(farm_ids), 500):  # SQLite caps bound parameters
+            rows = self.db.query(Farm.id, Farm.latitude, Farm.longitude).filter(
+                Farm.id.in_(farm_ids[i:i + 500])
+            )
+            coordinates.update({row.id: (row.latitude, row.longitude) for row in rows})
+        return coordinates
+    
     def create_farm_activity(self, farm_id: int, activity_type: str, date: datetime,
                            crop_type: Optional[str] = None, notes: Optional[str] = None) -> FarmActivity:
         """Create a farm activity record"""
@@ -0,0 +1,238 @@
+"""
+Geofence Index - land-use lookups for credit fraud screening
+Boundary polygons (Kenya outline, protected areas, urban cores, counties)
+are rasterized once onto a fine lat/lon grid at startup. A lookup is an
+array index; only points in cells a boundary crosses fall back to an exact
+point-in-polygon test, so whole portfolios are screened in one pass.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+GEOFENCE_PATH = Path(os.getenv(
+    "GEOFENCE_PATH", Path(__file__).resolve().parent.parent / "data" / "geofences.json"
+))
+
+# Raster extent (covers Kenya with a margin) and resolution in degrees
+GEOFENCE_BOUNDS = (-5.5, 6.0, 33.0, 42.5)  # south, north, west, east
+GEOFENCE_RESOLUTION = 0.01  # ~1.1 km
+
+LAYERS = ["country", "county", "subcounty", "protected", "urban"]
+
+# Country check used for scoring and masking. The shipped outline polygon is
+# hand-simplified and clips real border and coastal towns, so the box wins
+KENYA_BBOX = (-5.0, 5.0, 33.0, 42.0)  # south, north, west, east
+
+
+def in_kenya_bbox(latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """Per-point flag: inside the Kenya bounding box"""
+    lats = np.asarray(latitudes, dtype=float)
+    lons = np.asarray(longitudes, dtype=float)
+    south, north, west, east = KENYA_BBOX
+    return (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+
+
+def points_in_rings(lats: np.ndarray, lons: np.ndarray, rings: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Even-odd ray casting for many points against one polygon given as
+    rings of (lon, lat) vertices; holes and multipolygons work because
+    every ring toggles insideness
+    """
+    inside = np.zeros(lats.shape, dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        for j in range(len(x1)):
+            crosses = (y1[j] > lats) != (y2[j] > lats)
+            if not crosses.any():
+                continue
+            x_cross = x1[j] + (lats - y1[j]) * (x2[j] - x1[j]) / (y2[j] - y1[j] or 1e-12)
+            inside ^= crosses & (lons < x_cross)
+    return inside
+
+
+def _feature_rings(geometry: Dict[str, Any]) -> List[np.ndarray]:
+    """Closed (lon, lat) rings of a GeoJSON Polygon / MultiPolygon"""
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geofence geometry: {geometry['type']}")
+
+    rings = []
+    for polygon in polygons:
+        for ring in polygon:
+            ring = np.asarray(ring, dtype=float)[:, :2]
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack([ring, ring[:1]])
+            rings.append(ring)
+    return rings
+
+
+class GeofenceIndex:
+    """
+    One int16 raster per layer: 0 = no feature, k = k-th feature of the
+    layer (1-based; later features win where they overlap). A parallel
+    boolean raster marks cells a boundary passes through.
+    """
+
+    def __init__(
+        self,
+        features: List[Dict[str, Any]],
+        resolution: float = GEOFENCE_RESOLUTION,
+        bounds: Tuple[float, float, float, float] = GEOFENCE_BOUNDS,
+        surveyed: bool = False
+    ):
+        # Only surveyed boundaries may carry fraud weight; placeholders are informational
+        self.surveyed = surveyed
+        self.resolution = resolution
+        self.south, self.north, self.west, self.east = bounds
+        self.n_rows = int(round((self.north - self.south) / resolution))
+        self.n_cols = int(round((self.east - self.west) / resolution))
+
+        self.features: Dict[str, List[Dict[str, Any]]] = {layer: [] for layer in LAYERS}
+        for feature in features:
+            layer = feature["properties"].get("layer")
+            if layer not in self.features:
+                continue
+            rings = _feature_rings(feature["geometry"])
+            stacked = np.vstack(rings)
+            self.features[layer].append({
+                "name": feature["properties"].get("name", ""),
+                "properties": feature["properties"],
+                "rings": rings,
+                "bbox": (stacked[:, 1].min(), stacked[:, 1].max(), stacked[:, 0].min(), stacked[:, 0].max())
+            })
+
+        self.rasters: Dict[str, np.ndarray] = {}
+        self.edges: Dict[str, np.ndarray] = {}
+        for layer in LAYERS:
+            self.rasters[layer], self.edges[layer] = self._rasterize(self.features[layer])
+
+    @classmethod
+    def from_file(cls, path: Path = GEOFENCE_PATH, **kwargs) -> "GeofenceIndex":
+        """Build from a GeoJSON FeatureCollection whose features carry a `layer` property"""
+        with open(path) as f:
+            collection = json.load(f)
+        return cls(collection["features"], surveyed=bool(collection.get("surveyed", False)), **kwargs)
+
+    def _rasterize(self, features: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        raster = np.zeros((self.n_rows, self.n_cols), dtype=np.int16)
+        for k, feature in enumerate(features, start=1):
+            south, north, west, east = feature["bbox"]
+            r0, r1 = self._row_range(south, north)
+            c0, c1 = self._col_range(west, east)
+            if r0 >= r1 or c0 >= c1:
+                continue
+            lats = self.south + (np.arange(r0, r1) + 0.5) * self.resolution
+            lons = self.west + (np.arange(c0, c1) + 0.5) * self.resolution
+            grid_lats, grid_lons = np.meshgrid(lats, lons, indexing="ij")
+            inside = points_in_rings(grid_lats, grid_lons, feature["rings"])
+            raster[r0:r1, c0:c1][inside] = k
+
+        # A cell is on an edge when any 8-neighbour holds a different feature
+        padded = np.pad(raster, 1, mode="edge")
+        edge = np.zeros(raster.shape, dtype=bool)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr or dc:
+                    shifted = padded[1 + dr:1 + dr + self.n_rows, 1 + dc:1 + dc + self.n_cols]
+                    edge |= shifted != raster
+        return raster, edge
+
+    def _row_range(self, south: float, north: float) -> Tuple[int, int]:
+        r0 = max(0, int(np.floor((south - self.south) / self.resolution)))
+        r1 = min(self.n_rows, int(np.ceil((north - self.south) / self.resolution)) + 1)
+        return r0, r1
+
+    def _col_range(self, west: float, east: float) -> Tuple[int, int]:
+        c0 = max(0, int(np.floor((west - self.west) / self.resolution)))
+        c1 = min(self.n_cols, int(np.ceil((east - self.west) / self.resolution)) + 1)
+        return c0, c1
+
+    def cell_indices(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Raster (row, col) per point plus a mask of points inside the raster extent"""
+        rows = np.floor((lats - self.south) / self.resolution)
+        cols = np.floor((lons - self.west) / self.resolution)
+        # NaN coordinates compare False and end up invalid
+        valid = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        return (
+            np.where(valid, rows, 0).astype(np.int64),
+            np.where(valid, cols, 0).astype(np.int64),
+            valid
+        )
+
+    def lookup(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Feature id (0 = none) per point for every layer"""
+        lats = np.asarray(latitudes, dtype=float)
+        lons = np.asarray(longitudes, dtype=float)
+        rows, cols, valid = self.cell_indices(lats, lons)
+
+        result = {}
+        for layer in LAYERS:
+            ids = np.where(valid, self.rasters[layer][rows, cols], 0).astype(np.int64)
+            refine = np.flatnonzero(valid & self.edges[layer][rows, cols])
+            if refine.size:
+                ids[refine] = self._exact(layer, lats[refine], lons[refine])
+            result[layer] = ids
+        return result
+
+    def lookup_point(self, latitude: float, longitude: float) -> Dict[str, int]:
+        """Scalar fast path for single requests"""
+        row = int((latitude - self.south) // self.resolution)
+        col = int((longitude - self.west) // self.resolution)
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            return {layer: 0 for layer in LAYERS}
+
+        result = {}
+        for layer in LAYERS:
+            if self.edges[layer][row, col]:
+                result[layer] = int(self._exact(layer, np.array([latitude]), np.array([longitude]))[0])
+            else:
+                result[layer] = int(self.rasters[layer][row, col])
+        return result
+
+    def _exact(self, layer: str, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Exact point-in-polygon ids for points near a boundary"""
+        ids = np.zeros(len(lats), dtype=np.int64)
+        for k, feature in enumerate(self.features[layer], start=1):
+            south, north, west, east = feature["bbox"]
+            near = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+            if near.any():
+                idx = np.flatnonzero(near)
+                ids[idx[points_in_rings(lats[idx], lons[idx], feature["rings"])]] = k
+        return ids
+
+    def name(self, layer: str, feature_id: int) -> Optional[str]:
+        """Feature name for an id returned by lookup (None for 0)"""
+        if feature_id <= 0:
+            return None
+        return self.features[layer][feature_id - 1]["name"]
+
+    def names(self, layer: str) -> List[str]:
+        return [feature["name"] for feature in self.features[layer]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "surveyed": self.surveyed,
+            "resolution_deg": self.resolution,
+            "grid": [self.n_rows, self.n_cols],
+            "features": {layer: len(self.features[layer]) for layer in LAYERS},
+            "approx_bytes": sum(r.nbytes + e.nbytes for r, e in zip(self.rasters.values(), self.edges.values()))
+        }
+
+
+_index: Optional[GeofenceIndex] = None
+
+
+def get_geofence_index() -> GeofenceIndex:
+    """Process-wide index (built on first use, typically at startup)"""
+    global _index
+    if _index is None:
+        _index = GeofenceIndex.from_file()
+    return _index
@@ -0,0 +1,173 @@
+"""
+Grid Cell Cache - TTL + LRU cache keyed on snapped satellite grid cells
+NASA POWER serves MERRA-2 data on a 0.5° x 0.625° grid, so every farm
+inside one cell gets identical values - fetch once, share across farmers
+"""
+
+import asyncio
+import math
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# NASA POWER (MERRA-2) grid resolution in degrees
+POWER_LAT_STEP = 0.5
+POWER_LON_STEP = 0.625
+
+
+def snap_to_grid(
+    latitude: float,
+    longitude: float,
+    lat_step: float = POWER_LAT_STEP,
+    lon_step: float = POWER_LON_STEP
+) -> Tuple[float, float]:
+    """Snap a coordinate to the centre of its grid cell"""
+    cell_lat = math.floor(latitude / lat_step + 0.5) * lat_step
+    cell_lon = math.floor(longitude / lon_step + 0.5) * lon_step
+    return (round(cell_lat, 4), round(cell_lon, 4))
+
+
+def seconds_until_next_utc_day(now: Optional[datetime] = None) -> float:
+    """Seconds left until the next UTC midnight (POWER's daily rollover)"""
+    now = now or datetime.utcnow()
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough in-memory size of a cached value (shallow dicts/lists of scalars)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+class GridCellCache:
+    """
+    LRU cache with a per-entry TTL and an approximate memory cap.
+    Entries never outlive the current UTC day (unless day_bound=False), so
+    a cell refreshes as soon as NASA POWER publishes the next daily value.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_seconds: float = 24 * 3600,
+        sizer: Callable[[Any], int] = _estimate_size,
+        day_bound: bool = True
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizer = sizer
+        self.day_bound = day_bound
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None (counts a hit or a miss)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting least-recently-used entries to stay in bounds"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if self.day_bound:
+            ttl = min(ttl, seconds_until_next_utc_day())
+        size = self._sizer(value)
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry"""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current footprint"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "approx_bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical fetches: the first caller for a key starts
+    the work, everyone arriving while it is in flight awaits the same task.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch() once per key at a time and share its result"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled caller does not cancel the shared fetch
+        return await asyncio.shield(task)
@@ -0,0 +1,321 @@
+"""
+Location Index - duplicate farm-location detection for credit fraud
+The database (registered farms + credit score history) is the source of
+truth, so every API worker sees the same claims. A lookup reads only the
+rows inside the search radius's bounding box and buckets them by geohash;
+the point's bucket and its neighbours are then scanned, so finding the
+other MSISDNs claiming (almost) the same spot stays cheap. Buckets are
+keyed by the geohash cell's integer (row, col) - a geohash of fixed
+precision is exactly that grid - so neighbours are found by arithmetic.
+"""
+
+import math
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, or_
+
+from database import SessionLocal
+from models.credit import CreditScoreHistory
+from models.farmer import Farm, Farmer
+from services.behavior_store import normalize_msisdn
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision 8 cells are ~38 m x 19 m at the equator
+DEFAULT_PRECISION = 8
+DEFAULT_RADIUS_M = 10.0
+
+# Upper bound on points loaded for the full cluster report (most recent first)
+LOCATION_INDEX_MAX_POINTS = int(os.getenv("LOCATION_INDEX_MAX_POINTS", "200000"))
+
+# Bounding boxes OR-ed into one query when screening a batch
+BOX_QUERY_CHUNK = 100
+
+METERS_PER_DEG_LAT = 110_540.0
+METERS_PER_DEG_LON = 111_320.0
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = DEFAULT_PRECISION) -> str:
+    """Standard base-32 geohash"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int = DEFAULT_PRECISION) -> Tuple[float, float]:
+    """(lat, lon) height and width in degrees of a geohash cell"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Equirectangular distance in metres (exact enough at farm scale)"""
+    dy = (lat2 - lat1) * METERS_PER_DEG_LAT
+    dx = (lon2 - lon1) * METERS_PER_DEG_LON * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(dx, dy)
+
+
+Cell = Tuple[int, int]
+Point = Tuple[str, float, float, str]
+
+
+class GeohashBuckets:
+    """Geohash buckets of (msisdn, lat, lon, source) points"""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, radius_m: float = DEFAULT_RADIUS_M):
+        self.precision = precision
+        self.radius_m = radius_m
+        self.cell_lat, self.cell_lon = geohash_cell_size(precision)
+        self._buckets: Dict[Cell, Set[Point]] = defaultdict(set)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        """Geohash cell of a point as (row, col)"""
+        return (
+            math.floor((latitude + 90.0) / self.cell_lat),
+            math.floor((longitude + 180.0) / self.cell_lon)
+        )
+
+    def add(self, phone_number: str, latitude: float, longitude: float, source: str = "request"):
+        """Index one claimed location (duplicates of the same msisdn+point are ignored)"""
+        point = (normalize_msisdn(phone_number), round(latitude, 6), round(longitude, 6), source)
+        bucket = self._buckets[self._cell(latitude, longitude)]
+        if point not in bucket:
+            bucket.add(point)
+            self._size += 1
+
+    def add_many(self, points: Iterable[Tuple[str, float, float]], source: str = "request"):
+        for phone_number, latitude, longitude in points:
+            self.add(phone_number, latitude, longitude, source)
+
+    def add_points(self, points: Iterable[Point]):
+        for phone_number, latitude, longitude, source in points:
+            self.add(phone_number, latitude, longitude, source)
+
+    def _neighbour_cells(self, latitude: float, longitude: float, radius_m: float) -> List[Cell]:
+        """Every cell within radius_m of the point"""
+        lat_cell_m = self.cell_lat * METERS_PER_DEG_LAT
+        lon_cell_m = self.cell_lon * METERS_PER_DEG_LON * max(0.01, math.cos(math.radians(latitude)))
+        lat_steps = max(1, math.ceil(radius_m / lat_cell_m))
+        lon_steps = max(1, math.ceil(radius_m / lon_cell_m))
+        row, col = self._cell(latitude, longitude)
+        return [
+            (row + i, col + j)
+            for i in range(-lat_steps, lat_steps + 1)
+            for j in range(-lon_steps, lon_steps + 1)
+        ]
+
+    def nearby_msisdns(
+        self,
+        latitude: float,
+        longitude: float,
+        exclude: Optional[str] = None,
+        radius_m: Optional[float] = None
+    ) -> Set[str]:
+        """Distinct MSISDNs (other than `exclude`) with a point within radius_m"""
+        radius_m = self.radius_m if radius_m is None else radius_m
+        exclude = normalize_msisdn(exclude) if exclude else None
+
+        found = set()
+        for cell in self._neighbour_cells(latitude, longitude, radius_m):
+            for msisdn, lat, lon, _ in self._buckets.get(cell, ()):
+                if msisdn != exclude and msisdn not in found and distance_m(latitude, longitude, lat, lon) <= radius_m:
+                    found.add(msisdn)
+        return found
+
+    def duplicate_counts(
+        self, phone_numbers: List[str], latitudes: List[float], longitudes: List[float]
+    ) -> List[int]:
+        """Number of other MSISDNs claiming each location"""
+        return [
+            len(self.nearby_msisdns(lat, lon, exclude=phone))
+            for phone, lat, lon in zip(phone_numbers, latitudes, longitudes)
+        ]
+
+    def clusters(self, min_msisdns: int = 2, radius_m: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Batch report over every indexed point: groups of points chained
+        within radius_m that span at least min_msisdns distinct MSISDNs
+        """
+        radius_m = self.radius_m if radius_m is None else radius_m
+        points = [point for bucket in self._buckets.values() for point in bucket]
+        position = {point: i for i, point in enumerate(points)}
+
+        parent = list(range(len(points)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, (_, lat, lon, _) in enumerate(points):
+            for cell in self._neighbour_cells(lat, lon, radius_m):
+                for other in self._buckets.get(cell, ()):
+                    j = position[other]
+                    if j > i and distance_m(lat, lon, other[1], other[2]) <= radius_m:
+                        parent[find(j)] = find(i)
+
+        groups: Dict[int, List[Point]] = defaultdict(list)
+        for i, point in enumerate(points):
+            groups[find(i)].append(point)
+
+        report = []
+        for members in groups.values():
+            msisdns = sorted({m[0] for m in members})
+            if len(msisdns) < min_msisdns:
+                continue
+            report.append({
+                "msisdn_count": len(msisdns),
+                "msisdns": msisdns,
+                "points": len(members),
+                "sources": sorted({m[3] for m in members}),
+                "centroid": {
+                    "lat": round(sum(m[1] for m in members) / len(members), 6),
+                    "lon": round(sum(m[2] for m in members) / len(members), 6)
+                },
+                "geohash": geohash_encode(members[0][1], members[0][2], self.precision)
+            })
+        report.sort(key=lambda cluster: cluster["msisdn_count"], reverse=True)
+        return report
+
+
+class DuplicateLocationIndex:
+    """
+    Duplicate-location lookups against the database. Every call reads the
+    claims it needs, so results do not depend on which worker served the
+    earlier requests and nothing accumulates in process memory. Calls do
+    blocking DB I/O; async callers run them with asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        precision: int = DEFAULT_PRECISION,
+        radius_m: float = DEFAULT_RADIUS_M,
+        max_points: int = LOCATION_INDEX_MAX_POINTS,
+        session_factory=SessionLocal
+    ):
+        self.precision = precision
+        self.radius_m = radius_m
+        self.max_points = max_points
+        self.session_factory = session_factory
+
+    def _box(self, latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+        """(min_lat, max_lat, min_lon, max_lon) enclosing the search circle"""
+        dlat = radius_m / METERS_PER_DEG_LAT
+        dlon = radius_m / (METERS_PER_DEG_LON * max(0.01, math.cos(math.radians(latitude))))
+        return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+    def _load(self, boxes: Optional[List[Tuple[float, float, float, float]]] = None) -> List[Point]:
+        """
+        Farm and credit-request points, either inside any of the boxes or
+        (boxes=None) the most recent max_points of each
+        """
+        def within(lat_col, lon_col, box_chunk):
+            return or_(*(
+                and_(lat_col.between(min_lat, max_lat), lon_col.between(min_lon, max_lon))
+                for min_lat, max_lat, min_lon, max_lon in box_chunk
+            ))
+
+        chunks = [None] if boxes is None else [
+            boxes[i:i + BOX_QUERY_CHUNK] for i in range(0, len(boxes), BOX_QUERY_CHUNK)
+        ]
+        points: List[Point] = []
+        db = self.session_factory()
+        try:
+            for chunk in chunks:
+                farms = db.query(Farmer.phone_number, Farm.latitude, Farm.longitude).join(
+                    Farm, Farm.farmer_id == Farmer.id
+                ).filter(Farm.is_active == True)  # noqa: E712
+                requests = db.query(
+                    CreditScoreHistory.msisdn, CreditScoreHistory.latitude, CreditScoreHistory.longitude
+                ).group_by(
+                    CreditScoreHistory.msisdn, CreditScoreHistory.latitude, CreditScoreHistory.longitude
+                )
+                if chunk is None:
+                    farms = farms.order_by(Farm.updated_at.desc()).limit(self.max_points)
+                    requests = requests.order_by(func.max(CreditScoreHistory.scored_at).desc()).limit(self.max_points)
+                else:
+                    farms = farms.filter(within(Farm.latitude, Farm.longitude, chunk))
+                    requests = requests.filter(
+                        within(CreditScoreHistory.latitude, CreditScoreHistory.longitude, chunk)
+                    )
+                points.extend((phone, lat, lon, "farm") for phone, lat, lon in farms.all())
+                points.extend((msisdn, lat, lon, "request") for msisdn, lat, lon in requests.all())
+        finally:
+            db.close()
+        return points
+
+    def _buckets(self, points: Iterable[Point], radius_m: float) -> GeohashBuckets:
+        buckets = GeohashBuckets(self.precision, radius_m)
+        buckets.add_points(points)
+        return buckets
+
+    def nearby_msisdns(
+        self,
+        latitude: float,
+        longitude: float,
+        exclude: Optional[str] = None,
+        radius_m: Optional[float] = None
+    ) -> Set[str]:
+        """Distinct MSISDNs (other than `exclude`) with a stored point within radius_m"""
+        radius_m = self.radius_m if radius_m is None else radius_m
+        points = self._load([self._box(latitude, longitude, radius_m)])
+        return self._buckets(points, radius_m).nearby_msisdns(latitude, longitude, exclude=exclude)
+
+    def duplicate_counts(
+        self, phone_numbers: List[str], latitudes: List[float], longitudes: List[float]
+    ) -> List[int]:
+        """
+        Number of other MSISDNs claiming each location, counting stored
+        points and the other rows of this batch
+        """
+        boxes = [self._box(lat, lon, self.radius_m) for lat, lon in zip(latitudes, longitudes)]
+        buckets = self._buckets(self._load(boxes), self.radius_m)
+        buckets.add_many(zip(phone_numbers, latitudes, longitudes))
+        return buckets.duplicate_counts(phone_numbers, latitudes, longitudes)
+
+    def clusters(self, min_msisdns: int = 2, radius_m: Optional[float] = None) -> Dict[str, Any]:
+        """Cluster report over the most recent stored points (see GeohashBuckets.clusters)"""
+        radius_m = self.radius_m if radius_m is None else radius_m
+        points = self._load()
+        buckets = self._buckets(points, radius_m)
+        return {
+            "indexed_points": len(buckets),
+            "truncated": any(
+                sum(1 for point in points if point[3] == source) >= self.max_points
+                for source in ("farm", "request")
+            ),
+            "clusters": buckets.clusters(min_msisdns=min_msisdns)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": "database",
+            "precision": self.precision,
+            "radius_m": self.radius_m,
+            "max_points": self.max_points
+        }
@@ -0,0 +1,357 @@
+"""
+NDVI Tile Store - local NDVI data cube on memory-mapped NumPy tiles
+The lat/lon grid is cut into square tiles; each tile is one append-only
+file laid out date x row x col (int16, scaled), so adding a composite is
+a file append and a point's time series is a strided, zero-copy slice of
+the mapped file. Files are opened read-only with np.memmap, so every
+worker process shares the same OS page cache. A sidecar index.json holds
+the grid definition and the composite dates; a single ingest process
+appends and then atomically replaces the index.
+"""
+
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.geofence import GEOFENCE_BOUNDS
+
+NDVI_STORE_PATH = Path(os.getenv(
+    "NDVI_STORE_PATH", Path(__file__).resolve().parent.parent / "data" / "ndvi"
+))
+
+DEFAULT_RESOLUTION = 0.01  # ~1.1 km cells
+DEFAULT_TILE_DEGREES = 1.0  # 100 x 100 cells per tile at the default resolution
+
+NDVI_SCALE = 10000
+NDVI_NODATA = -32768
+
+# Per-pixel quality codes stored alongside NDVI
+QUALITY_LABELS = ["poor", "fair", "good", "excellent"]
+DEFAULT_QUALITY = 2
+
+TileKey = Tuple[int, int]
+
+
+class NdviTileStore:
+    """Read side and append side of the on-disk NDVI cube"""
+
+    def __init__(self, root: Path = NDVI_STORE_PATH):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.meta: Optional[Dict[str, Any]] = None
+        self._dates = np.array([], dtype="datetime64[D]")
+        self._index_mtime: Optional[int] = None
+        self._tiles: Dict[TileKey, Tuple[np.ndarray, np.ndarray]] = {}
+        self._refresh()
+
+    # Index
+
+    def _refresh(self):
+        """Reload index and drop mapped tiles when the ingest tool has published new composites"""
+        try:
+            mtime = self.index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.meta, self._index_mtime = None, None
+            self._tiles.clear()
+            return
+        if mtime == self._index_mtime:
+            return
+
+        with open(self.index_path) as f:
+            self.meta = json.load(f)
+        self._dates = np.array(self.meta["dates"], dtype="datetime64[D]")
+        self._index_mtime = mtime
+        self._tiles.clear()
+
+    @property
+    def available(self) -> bool:
+        self._refresh()
+        return self.meta is not None and len(self._dates) > 0
+
+    def initialize(
+        self,
+        resolution: float = DEFAULT_RESOLUTION,
+        tile_degrees: float = DEFAULT_TILE_DEGREES,
+        bounds: Tuple[float, float, float, float] = GEOFENCE_BOUNDS,
+        source: str = "Digital Earth Africa (Sentinel-2)"
+    ):
+        """Create an empty store (no-op if one already exists)"""
+        if self.index_path.exists():
+            self._refresh()
+            return
+        tile_cells = int(round(tile_degrees / resolution))
+        if tile_cells < 1 or abs(tile_cells * resolution - tile_degrees) > 1e-9:
+            raise ValueError("tile_degrees must be a whole number of cells")
+
+        (self.root / "tiles").mkdir(parents=True, exist_ok=True)
+        self._write_index({
+            "version": 1,
+            "resolution": resolution,
+            "tile_cells": tile_cells,
+            "bounds": list(bounds),
+            "scale": NDVI_SCALE,
+            "nodata": NDVI_NODATA,
+            "source": source,
+            "dates": []
+        })
+
+    def _write_index(self, meta: Dict[str, Any]):
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.index_path)
+        self._refresh()
+
+    def dates(self) -> np.ndarray:
+        """Composite dates (datetime64[D], ascending)"""
+        self._refresh()
+        return self._dates
+
+    # Grid
+
+    def _cell(self, latitude: float, longitude: float) -> Optional[Tuple[int, int]]:
+        """Global (row, col) of a point, row 0 at the southern edge"""
+        south, north, west, east = self.meta["bounds"]
+        resolution = self.meta["resolution"]
+        row = int((latitude - south) // resolution)
+        col = int((longitude - west) // resolution)
+        n_rows = int(round((north - south) / resolution))
+        n_cols = int(round((east - west) / resolution))
+        if not (0 <= row < n_rows and 0 <= col < n_cols):
+            return None
+        return row, col
+
+    def _tile_path(self, key: TileKey, kind: str) -> Path:
+        return self.root / "tiles" / f"{key[0]}_{key[1]}.{kind}"
+
+    def _frame_cells(self) -> int:
+        return self.meta["tile_cells"] ** 2
+
+    def _tile(self, key: TileKey) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Read-only (ndvi, quality) maps of a tile, shaped (dates, rows, cols)"""
+        if key in self._tiles:
+            return self._tiles[key]
+
+        ndvi_path = self._tile_path(key, "ndvi.i16")
+        if not ndvi_path.exists():
+            return None
+        n = self.meta["tile_cells"]
+        # Tiles not touched by recent composites are shorter than the index
+        frames = min(os.path.getsize(ndvi_path) // (2 * self._frame_cells()), len(self._dates))
+        if frames == 0:
+            return None
+        tile = (
+            np.memmap(ndvi_path, dtype=np.int16, mode="r", shape=(frames, n, n)),
+            np.memmap(self._tile_path(key, "qa.u8"), dtype=np.uint8, mode="r", shape=(frames, n, n))
+        )
+        self._tiles[key] = tile
+        return tile
+
+    def _date_range(self, start: date, end: date) -> Tuple[int, int]:
+        """Composite positions with start <= date < end"""
+        return (
+            int(np.searchsorted(self._dates, np.datetime64(start, "D"), side="left")),
+            int(np.searchsorted(self._dates, np.datetime64(end, "D"), side="left"))
+        )
+
+    # Reads
+
+    def point_series(
+        self, latitude: float, longitude: float, start: date, end: date
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Valid composites for one point with start <= date < end:
+        {dates, ndvi (float32), quality (uint8 codes)}, or None when the
+        store has no tile for the point
+        """
+        self._refresh()
+        if self.meta is None:
+            return None
+        cell = self._cell(latitude, longitude)
+        if cell is None:
+            return None
+        n = self.meta["tile_cells"]
+        tile = self._tile((cell[0] // n, cell[1] // n))
+        if tile is None:
+            return None
+
+        t0, t1 = self._date_range(start, end)
+        t1 = min(t1, tile[0].shape[0])
+        r, c = cell[0] % n, cell[1] % n
+        # Strided views into the mapped file; only the selected days are decoded
+        raw = tile[0][t0:t1, r, c]
+        valid = raw != self.meta["nodata"]
+        return {
+            "dates": self._dates[t0:t1][valid],
+            "ndvi": raw[valid].astype(np.float32) / self.meta["scale"],
+            "quality": np.asarray(tile[1][t0:t1, r, c][valid])
+        }
+
+    def window(
+        self, south: float, north: float, west: float, east: float, start: date, end: date
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Raw int16 cube (dates x rows x cols, row 0 south) for a bounding box.
+        A box inside one tile is returned as a view of the mapped file;
+        boxes spanning tiles are assembled, with nodata where tiles are missing
+        """
+        self._refresh()
+        if self.meta is None:
+            return None
+        lower = self._cell(south, west)
+        upper = self._cell(north, east)
+        if lower is None or upper is None:
+            return None
+        n = self.meta["tile_cells"]
+        t0, t1 = self._date_range(start, end)
+        (r0, c0), (r1, c1) = lower, (upper[0] + 1, upper[1] + 1)
+
+        tile_rows = range(r0 // n, (r1 - 1) // n + 1)
+        tile_cols = range(c0 // n, (c1 - 1) // n + 1)
+        if len(tile_rows) == 1 and len(tile_cols) == 1:
+            tile = self._tile((tile_rows[0], tile_cols[0]))
+            if tile is not None and tile[0].shape[0] >= t1:
+                cube = tile[0][t0:t1, r0 % n:(r1 - 1) % n + 1, c0 % n:(c1 - 1) % n + 1]
+                return {"dates": self._dates[t0:t1], "ndvi": cube, "scale": self.meta["scale"], "nodata": self.meta["nodata"]}
+
+        cube = np.full((t1 - t0, r1 - r0, c1 - c0), self.meta["nodata"], dtype=np.int16)
+        for ti in tile_rows:
+            for tj in tile_cols:
+                tile = self._tile((ti, tj))
+                if tile is None:
+                    continue
+                gr0, gr1 = max(r0, ti * n), min(r1, (ti + 1) * n)
+                gc0, gc1 = max(c0, tj * n), min(c1, (tj + 1) * n)
+                frames = min(t1, tile[0].shape[0])
+                if frames <= t0:
+                    continue
+                cube[:frames - t0, gr0 - r0:gr1 - r0, gc0 - c0:gc1 - c0] = tile[0][
+                    t0:frames, gr0 - ti * n:gr1 - ti * n, gc0 - tj * n:gc1 - tj * n
+                ]
+        return {"dates": self._dates[t0:t1], "ndvi": cube, "scale": self.meta["scale"], "nodata": self.meta["nodata"]}
+
+    # Ingest
+
+    def append_composite(
+        self,
+        day: date,
+        ndvi: np.ndarray,
+        bounds: Optional[Tuple[float, float, float, float]] = None,
+        quality: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """
+        Append one composite. `ndvi` is a north-up float raster at the store
+        resolution covering `bounds` (default: the whole store); NaN marks
+        missing pixels. Composites must arrive in date order.
+        """
+        self._refresh()
+        if self.meta is None:
+            raise ValueError("NDVI store is not initialized")
+        day_np = np.datetime64(day, "D")
+        if len(self._dates) and day_np <= self._dates[-1]:
+            raise ValueError(f"Composite {day} is not newer than the last stored date {self._dates[-1]}")
+
+        resolution = self.meta["resolution"]
+        store_south, store_north, store_west, store_east = self.meta["bounds"]
+        south, north, west, east = bounds or self.meta["bounds"]
+        row_offset = (south - store_south) / resolution
+        col_offset = (west - store_west) / resolution
+        if abs(row_offset - round(row_offset)) > 1e-6 or abs(col_offset - round(col_offset)) > 1e-6:
+            raise ValueError("Composite bounds are not aligned to the store grid")
+        row_offset, col_offset = int(round(row_offset)), int(round(col_offset))
+
+        values = np.asarray(ndvi, dtype=np.float32)[::-1]  # row 0 south, like the store
+        n_rows = int(round((north - south) / resolution))
+        n_cols = int(round((east - west) / resolution))
+        if values.shape != (n_rows, n_cols):
+            raise ValueError(f"Composite shape {values.shape} does not match bounds ({n_rows}, {n_cols})")
+        if row_offset < 0 or col_offset < 0 or \
+                row_offset + n_rows > int(round((store_north - store_south) / resolution)) or \
+                col_offset + n_cols > int(round((store_east - store_west) / resolution)):
+            raise ValueError("Composite extends beyond the store bounds")
+
+        scaled = np.where(
+            np.isnan(values), NDVI_NODATA,
+            np.clip(np.round(values * self.meta["scale"]), -self.meta["scale"], self.meta["scale"])
+        ).astype(np.int16)
+        codes = (
+            np.full(values.shape, DEFAULT_QUALITY, dtype=np.uint8) if quality is None
+            else np.asarray(quality, dtype=np.uint8)[::-1]
+        )
+
+        n = self.meta["tile_cells"]
+        position = len(self._dates)
+        frame = self._frame_cells()
+        tiles_written = 0
+        for ti in range(row_offset // n, (row_offset + n_rows - 1) // n + 1):
+            for tj in range(col_offset // n, (col_offset + n_cols - 1) // n + 1):
+                gr0, gr1 = max(row_offset, ti * n), min(row_offset + n_rows, (ti + 1) * n)
+                gc0, gc1 = max(col_offset, tj * n), min(col_offset + n_cols, (tj + 1) * n)
+                block = scaled[gr0 - row_offset:gr1 - row_offset, gc0 - col_offset:gc1 - col_offset]
+                if (block == NDVI_NODATA).all():
+                    continue
+
+                ndvi_frame = np.full((n, n), NDVI_NODATA, dtype=np.int16)
+                qa_frame = np.zeros((n, n), dtype=np.uint8)
+                ndvi_frame[gr0 - ti * n:gr1 - ti * n, gc0 - tj * n:gc1 - tj * n] = block
+                qa_frame[gr0 - ti * n:gr1 - ti * n, gc0 - tj * n:gc1 - tj * n] = \
+                    codes[gr0 - row_offset:gr1 - row_offset, gc0 - col_offset:gc1 - col_offset]
+
+                ndvi_path = self._tile_path((ti, tj), "ndvi.i16")
+                existing = os.path.getsize(ndvi_path) // (2 * frame) if ndvi_path.exists() else 0
+                # Pad dates this tile missed (and drop any frame a failed run left behind)
+                gap = position - existing
+                with open(ndvi_path, "r+b" if ndvi_path.exists() else "wb") as f:
+                    f.truncate(min(existing, position) * 2 * frame)
+                    f.seek(0, os.SEEK_END)
+                    if gap > 0:
+                        f.write(np.full(gap * frame, NDVI_NODATA, dtype=np.int16).tobytes())
+                    f.write(ndvi_frame.tobytes())
+                qa_path = self._tile_path((ti, tj), "qa.u8")
+                with open(qa_path, "r+b" if qa_path.exists() else "wb") as f:
+                    f.truncate(min(existing, position) * frame)
+                    f.seek(0, os.SEEK_END)
+                    if gap > 0:
+                        f.write(bytes(gap * frame))
+                    f.write(qa_frame.tobytes())
+                tiles_written += 1
+
+        # Publishing the date makes the new frames visible to readers
+        meta = dict(self.meta)
+        meta["dates"] = self.meta["dates"] + [day.isoformat()]
+        self._write_index(meta)
+        return {"date": day.isoformat(), "tiles_written": tiles_written, "composites": len(meta["dates"])}
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        if self.meta is None:
+            return {"available": False, "path": str(self.root)}
+        tiles_dir = self.root / "tiles"
+        tile_files = list(tiles_dir.glob("*.ndvi.i16")) if tiles_dir.exists() else []
+        return {
+            "available": len(self._dates) > 0,
+            "path": str(self.root),
+            "resolution_deg": self.meta["resolution"],
+            "tile_cells": self.meta["tile_cells"],
+            "composites": len(self._dates),
+            "first_date": str(self._dates[0]) if len(self._dates) else None,
+            "last_date": str(self._dates[-1]) if len(self._dates) else None,
+            "tiles": len(tile_files),
+            "mapped_tiles": len(self._tiles),
+            "bytes": sum(path.stat().st_size for path in tile_files)
+        }
+
+
+_store: Optional[NdviTileStore] = None
+
+
+def get_ndvi_store() -> NdviTileStore:
+    """Process-wide store (tiles are mapped lazily on first read)"""
+    global _store
+    if _store is None:
+        _store = NdviTileStore()
+    return _store
@@ -0,0 +1,201 @@
+"""
+Portfolio Rescorer - background job that keeps materialized credit scores fresh
+Rescores every registered farmer on a schedule, and rescores the farms in a
+grid cell as soon as the climate ingest lands new days for that cell.
+With several server workers only the holder of a DB lease runs the loop;
+CREDIT_RESCORE_INTERVAL_MINUTES=0 disables it in a process entirely.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from models.credit import JobLease
+from models.farmer import Farm, Farmer
+from services.grid_cache import snap_to_grid
+
+RESCORE_INTERVAL_MINUTES = float(os.getenv("CREDIT_RESCORE_INTERVAL_MINUTES", "360"))
+CLIMATE_POLL_MINUTES = float(os.getenv("CREDIT_CLIMATE_POLL_MINUTES", "60"))
+
+LEASE_NAME = "portfolio_rescorer"
+# A crashed holder's lease lapses after this long and another worker takes over
+LEASE_MIN_SECONDS = 600
+
+
+class PortfolioRescorer:
+    """Scheduled portfolio rescoring writing to the credit service's ScoreStore"""
+
+    def __init__(
+        self,
+        credit_service,
+        interval_minutes: float = RESCORE_INTERVAL_MINUTES,
+        poll_minutes: float = CLIMATE_POLL_MINUTES,
+        chunk_size: int = 1000,
+        session_factory=SessionLocal
+    ):
+        self.credit_service = credit_service
+        self.interval_seconds = interval_minutes * 60
+        self.poll_seconds = poll_minutes * 60
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_full_run: Optional[float] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        # Renewed every poll, so it must outlive one poll plus one tick
+        self.lease_seconds = max(2 * self.poll_seconds, LEASE_MIN_SECONDS)
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_held = False
+
+    def acquire_lease(self) -> bool:
+        """Take or renew the scheduler lease; False while another live process holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        db = self.session_factory()
+        try:
+            renewed = db.query(JobLease).filter(
+                JobLease.name == LEASE_NAME,
+                or_(JobLease.holder == self.holder_id, JobLease.expires_at < now)
+            ).update({"holder": self.holder_id, "expires_at": expires_at}, synchronize_session=False)
+            if not renewed:
+                db.add(JobLease(name=LEASE_NAME, holder=self.holder_id, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Row exists and belongs to a live holder
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    def release_lease(self):
+        """Let another process take over immediately"""
+        db = self.session_factory()
+        try:
+            db.query(JobLease).filter(
+                JobLease.name == LEASE_NAME, JobLease.holder == self.holder_id
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def portfolio(self, cells: Optional[Set[Tuple[float, float]]] = None) -> List[Dict[str, Any]]:
+        """One scoring row per active farmer (their first active farm), optionally limited to grid cells"""
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                Farmer.phone_number, Farm.latitude, Farm.longitude, Farm.primary_crop, Farm.size_acres
+            ).join(Farm, Farm.farmer_id == Farmer.id).filter(
+                Farmer.is_active == True,  # noqa: E712
+                Farm.is_active == True  # noqa: E712
+            ).order_by(Farm.id).all()
+        finally:
+            db.close()
+
+        farmers = {}
+        for phone, lat, lon, crop, size in rows:
+            if phone in farmers:
+                continue
+            if cells is not None and snap_to_grid(lat, lon) not in cells:
+                continue
+            farmers[phone] = {
+                "phone_number": phone,
+                "latitude": lat,
+                "longitude": lon,
+                "crop_type": (crop or "maize").lower(),
+                "farm_size_acres": size or 1.0
+            }
+        return list(farmers.values())
+
+    async def rescore(
+        self, trigger: str = "manual", cells: Optional[Set[Tuple[float, float]]] = None
+    ) -> Dict[str, Any]:
+        """Score the portfolio (or the farms in `cells`) in batches and materialize the results"""
+        async with self._lock:
+            started = time.monotonic()
+            farmers = await asyncio.to_thread(self.portfolio, cells)
+            written = 0
+            for i in range(0, len(farmers), self.chunk_size):
+                results = await self.credit_service.score_farmers_batch(farmers[i:i + self.chunk_size])
+                written += await asyncio.to_thread(self.credit_service.score_store.record, results, trigger)
+
+            if cells is None:
+                self._last_full_run = time.monotonic()
+            self.last_run = {
+                "trigger": trigger,
+                "farmers": len(farmers),
+                "scores_written": written,
+                "duration_seconds": round(time.monotonic() - started, 3),
+                "finished_at": datetime.utcnow().isoformat()
+            }
+            return self.last_run
+
+    async def tick(self) -> Dict[str, Any]:
+        """
+        One scheduler step: ingest new climate days, roll behavior windows,
+        then rescore either the whole portfolio (when due) or just the cells
+        that received new data
+        """
+        ingest = await self.credit_service.ingest_climate()
+        await asyncio.to_thread(self.credit_service.behavior_store.roll_all)
+
+        full_due = (
+            self._last_full_run is None
+            or time.monotonic() - self._last_full_run >= self.interval_seconds
+        )
+        if full_due:
+            return await self.rescore("schedule")
+        if ingest["updated_cells"]:
+            return await self.rescore("climate", set(ingest["updated_cells"]))
+        return {"trigger": None, "farmers": 0, "scores_written": 0}
+
+    async def run(self):
+        """Scheduler loop (runs until cancelled); ticks only while holding the lease"""
+        while True:
+            try:
+                self.lease_held = await asyncio.to_thread(self.acquire_lease)
+                if self.lease_held:
+                    await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Portfolio rescoring failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        """Start the scheduler on the running event loop (no-op if disabled or running)"""
+        if self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Cancel the scheduler loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease_held:
+            try:
+                await asyncio.to_thread(self.release_lease)
+            except Exception as e:
+                print(f"Failed to release rescoring lease: {e}")
+            self.lease_held = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "lease_held": self.lease_held,
+            "interval_minutes": self.interval_seconds / 60,
+            "poll_minutes": self.poll_seconds / 60,
+            "last_run": self.last_run
+        }
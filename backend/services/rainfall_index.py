@@ -0,0 +1,273 @@
+"""
+Rainfall Index - prefix sums of daily rainfall per grid cell
+Stored POWER rainfall is laid out as a dense cell x day matrix on one
+shared calendar and kept as cumulative sums (plus cumulative counts of
+observed days), so any accumulation window - total, average or anomaly -
+is two array reads and a subtraction, for one cell or for many cells and
+end dates at once. Drought flags and dry-spell advisories for the whole
+farm base are computed from it in a single vectorized pass.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.climate_store import ClimateStore
+
+Cell = Tuple[float, float]
+
+# Standard accumulation windows reported alongside rainfall data
+ACCUMULATION_WINDOWS = (7, 30, 90)
+
+# 30-day total below which a cell is flagged as in drought (matches credit scoring)
+DROUGHT_THRESHOLD_MM = 50.0
+DROUGHT_WINDOW_DAYS = 30
+
+# Windows with fewer observed days than this fraction are not trusted
+MIN_COVERAGE = 0.8
+
+
+class RainfallIndex:
+    """Cumulative rainfall arrays for every cell in the climate store"""
+
+    def __init__(self, climate_store: Optional[ClimateStore] = None):
+        self.climate_store = climate_store or ClimateStore()
+        self.origin: Optional[date] = None  # calendar day of column 1 in the cumulative arrays
+        self.cells: List[Cell] = []
+        self._position: Dict[Cell, int] = {}
+        # (cells, days + 1): column j holds the sum over the first j days
+        self._cum = np.zeros((0, 1))
+        self._obs = np.zeros((0, 1), dtype=np.int32)
+        self._daily_mean = np.zeros(0)
+        self.watermark: Optional[datetime] = None  # newest ingested_at loaded
+        self.built_at: Optional[datetime] = None
+
+    @property
+    def n_days(self) -> int:
+        return self._cum.shape[1] - 1
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.origin + timedelta(days=self.n_days - 1) if self.origin and self.n_days else None
+
+    # Maintenance
+
+    def build(self) -> int:
+        """Rebuild from every stored cell; returns the number of cells"""
+        rows = self.climate_store.rainfall_rows()
+        self.origin = None
+        self.cells, self._position = [], {}
+        self._cum = np.zeros((0, 1))
+        self._obs = np.zeros((0, 1), dtype=np.int32)
+        self._daily_mean = np.zeros(0)
+        self.watermark = None
+        self._load(rows)
+        self.built_at = datetime.utcnow()
+        return len(self.cells)
+
+    def refresh(self, cells: Iterable[Cell], rows: Optional[List[Tuple[float, float, date, float, datetime]]] = None) -> int:
+        """
+        Reload the given cells after new days were appended; returns cells
+        reloaded. rows: their rainfall_rows, when already read off the event loop
+        """
+        cells = list(dict.fromkeys(cells))
+        if not cells:
+            return 0
+        if rows is None:
+            rows = self.climate_store.rainfall_rows(cells)
+        if rows and self.origin is not None and min(row[2] for row in rows) < self.origin:
+            # Backfilled history moves the calendar start; cheaper to rebuild
+            return self.build()
+        self._load(rows)
+        return len(cells)
+
+    def sync(self) -> int:
+        """Pick up rows ingested since the last load (by this or any other process)"""
+        if self.watermark is None:
+            return self.build()
+        return self.refresh(self.climate_store.cells_ingested_since(self.watermark))
+
+    def _load(self, rows: List[Tuple[float, float, date, float, datetime]]):
+        """Replace the rows of every cell present in `rows`"""
+        if not rows:
+            return
+        lats = np.array([row[0] for row in rows])
+        lons = np.array([row[1] for row in rows])
+        ordinals = np.array([row[2].toordinal() for row in rows])
+        rain = np.array([row[3] for row in rows], dtype=float)
+        ingested = [row[4] for row in rows if row[4] is not None]
+
+        origin = self.origin or date.fromordinal(int(ordinals.min()))
+        n_days = max(self.n_days, int(ordinals.max()) - origin.toordinal() + 1)
+
+        # Grow the calendar (carrying totals forward) and register new cells
+        if n_days > self.n_days:
+            extra = n_days - self.n_days
+            self._cum = np.pad(self._cum, ((0, 0), (0, extra)), mode="edge")
+            self._obs = np.pad(self._obs, ((0, 0), (0, extra)), mode="edge")
+        cells = list(dict.fromkeys(zip(lats.tolist(), lons.tolist())))
+        new_cells = [cell for cell in cells if cell not in self._position]
+        for cell in new_cells:
+            self._position[cell] = len(self.cells)
+            self.cells.append(cell)
+        if new_cells:
+            self._cum = np.vstack([self._cum, np.zeros((len(new_cells), n_days + 1))])
+            self._obs = np.vstack([self._obs, np.zeros((len(new_cells), n_days + 1), dtype=np.int32)])
+            self._daily_mean = np.concatenate([self._daily_mean, np.full(len(new_cells), np.nan)])
+        self.origin = origin
+
+        # Dense daily matrix for the touched cells, then cumulative sums
+        touched = np.array([self._position[cell] for cell in cells])
+        local = {cell: i for i, cell in enumerate(cells)}
+        rows_local = np.array([local[cell] for cell in zip(lats.tolist(), lons.tolist())])
+        days = ordinals - origin.toordinal()
+        daily = np.zeros((len(cells), n_days))
+        observed = np.zeros((len(cells), n_days), dtype=np.int32)
+        daily[rows_local, days] = rain
+        observed[rows_local, days] = 1
+
+        self._cum[touched, 1:] = np.cumsum(daily, axis=1)
+        self._cum[touched, 0] = 0.0
+        self._obs[touched, 1:] = np.cumsum(observed, axis=1)
+        self._obs[touched, 0] = 0
+        counts = self._obs[touched, -1]
+        self._daily_mean[touched] = np.where(counts > 0, self._cum[touched, -1] / np.maximum(counts, 1), np.nan)
+
+        if ingested:
+            newest = max(ingested)
+            self.watermark = newest if self.watermark is None else max(self.watermark, newest)
+
+    # Queries
+
+    def positions(self, cells: Sequence[Cell]) -> np.ndarray:
+        """Row of each cell in the index (-1 when not indexed)"""
+        return np.array([self._position.get(tuple(cell), -1) for cell in cells], dtype=np.int64)
+
+    def windows(
+        self,
+        cells: Sequence[Cell],
+        end_dates: Optional[Sequence[date]] = None,
+        days: Any = DROUGHT_WINDOW_DAYS
+    ) -> Dict[str, np.ndarray]:
+        """
+        Accumulation windows ending on (and including) each end date, for
+        every cell x end date combination
+
+        Args:
+            cells: grid cells (n)
+            end_dates: window end days (m); default the last indexed day
+            days: window length, scalar or broadcastable to (n, m)
+
+        Returns:
+            (n, m) arrays: total_mm, mean_mm (per observed day), expected_mm,
+            anomaly_mm, anomaly_percent, coverage (observed / window days).
+            Cells not in the index are NaN with zero coverage.
+        """
+        rows = self.positions(cells)
+        if end_dates is None:
+            end_dates = [self.last_date] if self.last_date else []
+        if self.origin is None or not len(end_dates):
+            shape = (len(rows), len(end_dates))
+            empty = np.full(shape, np.nan)
+            return {
+                "total_mm": empty, "mean_mm": empty, "expected_mm": empty,
+                "anomaly_mm": empty, "anomaly_percent": empty, "coverage": np.zeros(shape)
+            }
+
+        ends = np.array([d.toordinal() for d in end_dates]) - self.origin.toordinal() + 1
+        days = np.broadcast_to(np.asarray(days, dtype=np.int64), (len(rows), len(ends)))
+        end = np.clip(ends[None, :], 0, self.n_days)
+        start = np.clip(ends[None, :] - days, 0, self.n_days)
+        end = np.broadcast_to(end, days.shape)
+
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)[:, None]
+        total = self._cum[safe_rows, end] - self._cum[safe_rows, start]
+        observed = self._obs[safe_rows, end] - self._obs[safe_rows, start]
+        expected = self._daily_mean[safe_rows] * days
+
+        total = np.where(known[:, None], total, np.nan)
+        anomaly = total - expected
+        return {
+            "total_mm": total,
+            "mean_mm": np.where(observed > 0, total / np.maximum(observed, 1), np.nan),
+            "expected_mm": np.where(known[:, None], expected, np.nan),
+            "anomaly_mm": anomaly,
+            "anomaly_percent": np.where(expected > 0, anomaly / np.where(expected > 0, expected, 1) * 100, 0.0),
+            "coverage": np.where(known[:, None], observed / np.maximum(days, 1), 0.0)
+        }
+
+    def totals(self, cell: Cell, end_date: date, windows: Sequence[int]) -> Optional[List[float]]:
+        """Window totals for one cell, or None unless every window is fully observed"""
+        if cell not in self._position:
+            return None
+        # One column per window length, all ending on end_date
+        stats = self.windows([cell], [end_date] * len(windows), np.asarray(windows)[None, :])
+        if (stats["coverage"][0] < 1.0).any():
+            return None
+        return stats["total_mm"][0].tolist()
+
+    def cell_last_date(self, cell: Cell) -> Optional[date]:
+        """Newest observed day for a cell"""
+        row = self._position.get(cell)
+        if row is None or not self._obs[row, -1]:
+            return None
+        # First column reaching the final count is the last observed day
+        return self.origin + timedelta(days=int(np.searchsorted(self._obs[row], self._obs[row, -1])) - 1)
+
+    def daily(self, cell: Cell, days: int, end_date: Optional[date] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Observed daily rainfall for the `days` days ending end_date (default
+        the cell's newest day), or None unless fully observed
+        """
+        row = self._position.get(cell)
+        end_date = end_date or self.cell_last_date(cell)
+        if row is None or end_date is None:
+            return None
+        end = min(end_date.toordinal() - self.origin.toordinal() + 1, self.n_days)
+        start = end - days
+        if start < 0 or self._obs[row, end] - self._obs[row, start] < days:
+            return None
+        values = np.diff(self._cum[row, start:end + 1])
+        first = self.origin + timedelta(days=start)
+        return [
+            {"date": (first + timedelta(days=i)).strftime("%Y-%m-%d"), "rainfall_mm": round(float(v), 1)}
+            for i, v in enumerate(values)
+        ]
+
+    def drought_flags(
+        self,
+        cells: Sequence[Cell],
+        end_date: Optional[date] = None,
+        days: int = DROUGHT_WINDOW_DAYS,
+        threshold_mm: float = DROUGHT_THRESHOLD_MM
+    ) -> Dict[str, np.ndarray]:
+        """Per-cell window total, anomaly and drought flag (only where coverage is trusted)"""
+        stats = self.windows(cells, [end_date] if end_date else None, days)
+        stats = {key: value[:, 0] if value.shape[1] else np.full(len(cells), np.nan) for key, value in stats.items()}
+        trusted = stats["coverage"] >= MIN_COVERAGE
+        stats["drought"] = trusted & (stats["total_mm"] < threshold_mm)
+        stats["trusted"] = trusted
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cells": len(self.cells),
+            "days": self.n_days,
+            "first_date": self.origin.isoformat() if self.origin else None,
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "bytes": self._cum.nbytes + self._obs.nbytes,
+            "built_at": self.built_at.isoformat() if self.built_at else None
+        }
+
+
+_index: Optional[RainfallIndex] = None
+
+
+def get_rainfall_index() -> RainfallIndex:
+    """Process-wide index (built on startup, kept current by the climate ingest)"""
+    global _index
+    if _index is None:
+        _index = RainfallIndex()
+    return _index
@@ -0,0 +1,177 @@
+"""
+Score Store - materialized credit scores per MSISDN
+Scoring runs (scheduled or live) append to the history table and upsert
+the latest row, so "check my score" is one primary-key read
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from database import SessionLocal
+from models.credit import CreditScoreHistory, CreditScoreLatest
+from services.behavior_store import normalize_msisdn
+from services.grid_cache import snap_to_grid
+from services.location_index import distance_m
+
+# Precomputed scores older than this are not served without rescoring
+DEFAULT_MAX_AGE = timedelta(hours=float(os.getenv("CREDIT_SCORE_MAX_AGE_HOURS", "24")))
+
+# A stored score is reused only for the point it was computed at: its fraud
+# inputs (geofences, duplicate-location check) are per point, not per cell
+SCORE_LOCATION_TOLERANCE_M = 5.0
+
+# SQLite caps bound parameters per statement
+IN_CLAUSE_CHUNK = 500
+
+
+class ScoreStore:
+    """Score history plus latest-score lookups with a freshness bound"""
+
+    def __init__(self, session_factory=SessionLocal, max_age: timedelta = DEFAULT_MAX_AGE):
+        self.session_factory = session_factory
+        self.max_age = max_age
+
+    def record(self, results: List[Dict[str, Any]], trigger: str) -> int:
+        """
+        Persist scoring results (score_farmers_batch row format plus
+        farm_size_acres); returns the number of rows written
+        """
+        if not results:
+            return 0
+
+        now = datetime.utcnow()
+        rows = {}
+        for result in results:
+            # Last result wins when an MSISDN appears twice in one run
+            rows[normalize_msisdn(result["phone_number"])] = result
+
+        db = self.session_factory()
+        try:
+            latest = {}
+            msisdns = list(rows)
+            for i in range(0, len(msisdns), IN_CLAUSE_CHUNK):
+                for row in db.query(CreditScoreLatest).filter(
+                    CreditScoreLatest.msisdn.in_(msisdns[i:i + IN_CLAUSE_CHUNK])
+                ):
+                    latest[row.msisdn] = row
+
+            history = []
+            for msisdn, result in rows.items():
+                lat, lon = result["location"]["lat"], result["location"]["lon"]
+                values = {
+                    "latitude": lat,
+                    "longitude": lon,
+                    "crop_type": result["crop"].lower(),
+                    "farm_size_acres": result.get("farm_size_acres") or 1.0,
+                    "credit_score": result["credit_score"],
+                    "risk_level": result["risk_level"],
+                    "fraud_score": result["fraud_score"],
+                    "yield_estimate": result["yield_estimate_tonnes"],
+                    "model_version": result.get("model_version"),
+                    "satellite_status": result.get("satellite_status"),
+                    "trigger": trigger,
+                    "scored_at": now
+                }
+                history.append({"msisdn": msisdn, **values})
+
+                cell_lat, cell_lon = snap_to_grid(lat, lon)
+                latest_values = {
+                    **values,
+                    "cell_lat": cell_lat,
+                    "cell_lon": cell_lon,
+                    "loan_recommendation": json.dumps(result["loan_recommendation"]),
+                    "top_factors": json.dumps(result["top_factors"]),
+                    "score_breakdown": json.dumps(result.get("score_breakdown"))
+                }
+                row = latest.get(msisdn)
+                if row is None:
+                    db.add(CreditScoreLatest(msisdn=msisdn, **latest_values))
+                else:
+                    for field, value in latest_values.items():
+                        setattr(row, field, value)
+
+            db.bulk_insert_mappings(CreditScoreHistory, history)
+            db.commit()
+            return len(history)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def latest(
+        self,
+        phone_number: str,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        crop_type: Optional[str] = None,
+        farm_size_acres: Optional[float] = None,
+        max_age: Optional[timedelta] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Latest score for an MSISDN, or None if missing, older than max_age,
+        or computed for a different location / crop / farm size than asked
+        """
+        max_age = self.max_age if max_age is None else max_age
+
+        db = self.session_factory()
+        try:
+            row = db.get(CreditScoreLatest, normalize_msisdn(phone_number))
+        finally:
+            db.close()
+
+        if row is None or datetime.utcnow() - row.scored_at > max_age:
+            return None
+        if latitude is not None and longitude is not None:
+            if distance_m(latitude, longitude, row.latitude, row.longitude) > SCORE_LOCATION_TOLERANCE_M:
+                return None
+        if crop_type is not None and crop_type.lower() != row.crop_type.lower():
+            return None
+        if farm_size_acres is not None and farm_size_acres != row.farm_size_acres:
+            return None
+
+        return {
+            "phone_number": phone_number,
+            "location": {"lat": row.latitude, "lon": row.longitude},
+            "crop": row.crop_type,
+            "farm_size_acres": row.farm_size_acres,
+            "credit_score": row.credit_score,
+            "risk_level": row.risk_level,
+            "loan_recommendation": json.loads(row.loan_recommendation),
+            "top_factors": json.loads(row.top_factors),
+            "score_breakdown": json.loads(row.score_breakdown) if row.score_breakdown else None,
+            "yield_estimate_tonnes": row.yield_estimate,
+            "fraud_score": row.fraud_score,
+            "model_version": row.model_version,
+            "satellite_status": row.satellite_status,
+            "trigger": row.trigger,
+            "scored_at": row.scored_at.isoformat(),
+            "age_seconds": int((datetime.utcnow() - row.scored_at).total_seconds())
+        }
+
+    def history(self, phone_number: str, limit: int = 30) -> List[Dict[str, Any]]:
+        """Most recent scores for an MSISDN, newest first"""
+        db = self.session_factory()
+        try:
+            rows = db.query(CreditScoreHistory).filter(
+                CreditScoreHistory.msisdn == normalize_msisdn(phone_number)
+            ).order_by(CreditScoreHistory.scored_at.desc(), CreditScoreHistory.id.desc()).limit(limit).all()
+        finally:
+            db.close()
+
+        return [
+            {
+                "credit_score": row.credit_score,
+                "risk_level": row.risk_level,
+                "fraud_score": row.fraud_score,
+                "yield_estimate_tonnes": row.yield_estimate,
+                "crop": row.crop_type,
+                "model_version": row.model_version,
+                "satellite_status": row.satellite_status,
+                "trigger": row.trigger,
+                "scored_at": row.scored_at.isoformat()
+            }
+            for row in rows
+        ]
@@ -0,0 +1,182 @@
+"""
+Simulation Jobs - process pool for CPU-bound simulation work
+Large ensembles and daily-timestep runs would block the event loop (and
+every other endpoint) if computed inline, so they run in worker processes.
+The number of runs waiting or running is capped, each run has a timeout
+(a short one for awaited runs, a longer one for jobs), and long runs can
+be submitted as jobs and polled instead of awaited.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+SIMULATION_MAX_QUEUED = int(os.getenv("SIMULATION_MAX_QUEUED", "32"))
+SIMULATION_RUN_TIMEOUT_SECONDS = float(os.getenv("SIMULATION_RUN_TIMEOUT_SECONDS", "60"))
+SIMULATION_JOB_TIMEOUT_SECONDS = float(os.getenv("SIMULATION_JOB_TIMEOUT_SECONDS", "900"))
+
+# Finished job records kept for polling (results themselves live in the simulation store)
+JOB_RETENTION = 1000
+
+
+class SimulationQueueFull(Exception):
+    """Raised when SIMULATION_MAX_QUEUED runs are already waiting or running"""
+
+
+class SimulationJobRunner:
+    """Bounded process pool with awaitable runs and pollable background jobs"""
+
+    def __init__(
+        self,
+        workers: int = SIMULATION_WORKERS,
+        max_queued: int = SIMULATION_MAX_QUEUED,
+        timeout_seconds: float = SIMULATION_RUN_TIMEOUT_SECONDS,
+        job_timeout_seconds: float = SIMULATION_JOB_TIMEOUT_SECONDS
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout_seconds = timeout_seconds
+        self.job_timeout_seconds = job_timeout_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Every submitted run until its worker finishes (timed-out runs included)
+        self._pending: Set[Future] = set()
+        # Timed-out runs that had already started: nobody awaits them, but they
+        # hold a worker (and a queue slot) until they finish
+        self._abandoned: Set[Future] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self):
+        """Create the pool (no-op if disabled or running)"""
+        if self.enabled and self._executor is None:
+            # Spawned workers do not inherit the server's threads, sockets or DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def stop(self):
+        """Cancel background jobs and shut the pool down"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, fn: Callable[..., Any], *args) -> Future:
+        if len(self._pending) >= self.max_queued:
+            self.rejected += 1
+            raise SimulationQueueFull(f"{len(self._pending)} simulations already queued")
+        self.start()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool
+            print("Simulation pool was broken, restarting")
+            self._executor = None
+            self.start()
+            future = self._executor.submit(fn, *args)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    async def _await(self, future: Future, timeout: float) -> Any:
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # A run still waiting for a worker is dropped; one already executing
+            # cannot be interrupted and still counts as queued until it ends
+            if not future.cancel():
+                self._abandoned.add(future)
+                future.add_done_callback(self._abandoned.discard)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """Run fn(*args) in a worker process and await the result (asyncio.TimeoutError on timeout)"""
+        return await self._await(self._submit(fn, *args), timeout or self.timeout_seconds)
+
+    def submit(
+        self,
+        job_id: str,
+        fn: Callable[..., Any],
+        *args,
+        on_result: Optional[Callable[[Any], None]] = None
+    ) -> Dict[str, Any]:
+        """Start fn(*args) as a background job; on_result runs in this process when it finishes"""
+        future = self._submit(fn, *args)
+        record = {
+            "job_id": job_id,
+            "status": "pending",
+            "submitted_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "error": None
+        }
+        self.jobs[job_id] = record
+        if len(self.jobs) > JOB_RETENTION:
+            # Drop the oldest finished records; pending ones are kept for polling
+            excess = len(self.jobs) - JOB_RETENTION
+            for finished in [key for key, job in self.jobs.items() if job["status"] != "pending"][:excess]:
+                self.jobs.pop(finished)
+
+        task = asyncio.create_task(self._track(record, future, on_result))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(record)
+
+    async def _track(self, record: Dict[str, Any], future: Future, on_result: Optional[Callable[[Any], None]]):
+        try:
+            result = await self._await(future, self.job_timeout_seconds)
+            if on_result is not None:
+                on_result(result)
+            record["status"] = "done"
+        except asyncio.TimeoutError:
+            record["status"] = "timeout"
+            record["error"] = f"Simulation exceeded {self.job_timeout_seconds:g}s"
+        except asyncio.CancelledError:
+            record["status"] = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Simulation job {record['job_id']} failed: {e}")
+            record["status"] = "failed"
+            record["error"] = str(e)
+        finally:
+            record["finished_at"] = datetime.utcnow().isoformat()
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = self.jobs.get(job_id)
+        return dict(record) if record is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "queued": len(self._pending),
+            "abandoned_running": len(self._abandoned),
+            "max_queued": self.max_queued,
+            "timeout_seconds": self.timeout_seconds,
+            "job_timeout_seconds": self.job_timeout_seconds,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected
+        }
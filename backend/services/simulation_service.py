@@ -2,29 +2,82 @@
 Simulation Service - Crop yield prediction and scenario modeling
 """
 
+import os
 import uuid
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Any, Optional
 import random
 import math
+import numpy as np
 from models.schemas import (
     SimulationRequest, SimulationResponse, SimulationResult,
     SimulationInputs, CropType
 )
+from services.crop_water_balance import INITIAL_DEPLETION_FRACTION, simulate_water_balance, temperature_stress
+from services.simulation_jobs import SimulationJobRunner
+from services.simulation_store import SimulationStore
+
+# Weather realizations: the same spreads the single-draw model uses
+WEATHER_VARIATION_RANGE = (0.85, 1.15)
+SEASON_TEMP_MEAN_C = 24.0
+SEASON_TEMP_SPREAD_C = 3.0
+
+ENSEMBLE_PERCENTILES = (10, 50, 90)
+
+# Daily weather generator for the water-balance model. The climate figure
+# (rainfall_forecast_mm) is a rainy-season total, spread over wet days with
+# exponential amounts across the crop's first RAINY_SEASON_DAYS (its whole
+# season if shorter); days after that get dry-season rain. Season totals
+# vary between realizations.
+DEFAULT_SEASON_RAIN_MM = 650.0
+RAINY_SEASON_DAYS = 120
+DRY_SEASON_RAIN_FRACTION = 0.25  # dry-season daily rain relative to the rainy season
+WET_DAY_PROBABILITY = 0.4
+SEASON_RAIN_VARIATION = (0.6, 1.4)
+DAILY_TEMP_SD_C = 1.5
+REFERENCE_ET0_MM = 4.5  # at SEASON_TEMP_MEAN_C
+ET0_PER_DEGREE = 0.04  # relative change in ET0 per degree C
+WET_DAY_ET0_FACTOR = 0.7  # cloud cover
+# Realizations generated and run together, bounding memory for long seasons
+DAILY_CHUNK_RUNS = 4096
+
+# Runs estimated above this many model evaluations (ensemble draws x scenarios,
+# x growing days for the daily model) go to the process pool; smaller ones
+# are computed inline
+INLINE_WORK_LIMIT = int(os.getenv("SIMULATION_INLINE_WORK_LIMIT", "50000"))
+
+# Input optimizer: search bounds (as in SimulationInputs) and grid steps for
+# the coarse pass and the refinement around the best coarse candidates
+INPUT_BOUNDS = ((0, 200), (0, 100), (0, 100), (0, 10))  # DAP, urea, irrigation, pesticide
+OPTIMIZER_COARSE_STEPS = (20, 10, 10, 1)
+OPTIMIZER_FINE_STEPS = (2, 1, 1, 1)
+OPTIMIZER_SEEDS = 3
+# Weather draws used for the expected season factor when no ensemble is given
+OPTIMIZER_WEATHER_DRAWS = 2000
+# Daily-model realizations each irrigation level is scored on
+OPTIMIZER_DAILY_DRAWS = 200
 
 class SimulationService:
-    def __init__(self):
-        self.simulations = {}  # In-memory storage for demo
+    def __init__(self, store: Optional[SimulationStore] = None, jobs: Optional[SimulationJobRunner] = None):
+        self.store = store or SimulationStore()
+        self.jobs = jobs or SimulationJobRunner()
         self.crop_models = self._initialize_crop_models()
+        # Daily-model potential yield per crop, relative to base_yield_kg_ha
+        self._daily_potential: Dict[str, float] = {}
     
     def health_check(self) -> Dict[str, Any]:
         """Check if simulation service is healthy"""
         return {
             "status": "healthy",
             "crop_models_loaded": len(self.crop_models),
-            "active_simulations": len(self.simulations)
+            "simulation_store": self.store.stats(),
+            "jobs": self.jobs.stats()
         }
     
+    async def shutdown(self):
+        """Stop the simulation process pool (called on app shutdown)"""
+        await self.jobs.stop()
+    
     def _initialize_crop_models(self) -> Dict[str, Dict[str, Any]]:
         """Initialize crop growth models with parameters"""
         return {
@@ -35,7 +88,14 @@ class SimulationService:
                 "fertilizer_response": 0.8,
                 "irrigation_response": 0.6,
                 "optimal_temp_c": 25,
-                "temp_tolerance": 5
+                "temp_tolerance": 5,
+                # Daily water balance (FAO-56 Kc, FAO-33 Ky, root zone available water)
+                "kc_initial": 0.3,
+                "kc_mid": 1.2,
+                "kc_end": 0.6,
+                "yield_response_factor": 1.25,
+                "available_water_mm": 140,
+                "depletion_fraction": 0.55
             },
             "beans": {
                 "base_yield_kg_ha": 1200,
@@ -44,7 +104,13 @@ class SimulationService:
                 "fertilizer_response": 0.6,
                 "irrigation_response": 0.4,
                 "optimal_temp_c": 22,
-                "temp_tolerance": 3
+                "temp_tolerance": 3,
+                "kc_initial": 0.4,
+                "kc_mid": 1.15,
+                "kc_end": 0.35,
+                "yield_response_factor": 1.15,
+                "available_water_mm": 90,
+                "depletion_fraction": 0.45
             },
             "tomatoes": {
                 "base_yield_kg_ha": 25000,
@@ -53,7 +119,13 @@ class SimulationService:
                 "fertilizer_response": 1.0,
                 "irrigation_response": 0.8,
                 "optimal_temp_c": 24,
-                "temp_tolerance": 4
+                "temp_tolerance": 4,
+                "kc_initial": 0.6,
+                "kc_mid": 1.15,
+                "kc_end": 0.8,
+                "yield_response_factor": 1.05,
+                "available_water_mm": 120,
+                "depletion_fraction": 0.4
             },
             "coffee": {
                 "base_yield_kg_ha": 800,
@@ -62,43 +134,104 @@ class SimulationService:
                 "fertilizer_response": 0.5,
                 "irrigation_response": 0.3,
                 "optimal_temp_c": 20,
-                "temp_tolerance": 2
+                "temp_tolerance": 2,
+                "kc_initial": 0.9,
+                "kc_mid": 0.95,
+                "kc_end": 0.95,
+                "yield_response_factor": 1.0,
+                "available_water_mm": 170,
+                "depletion_fraction": 0.4
             }
         }
     
     async def run_simulation(self, request: SimulationRequest) -> SimulationResponse:
-        """Run crop yield simulation for given inputs"""
+        """Run crop yield simulation for given inputs (large runs in the process pool)"""
+        simulation_id = f"sim_{uuid.uuid4().hex[:8]}"
+        
+        # Get climate data
+        climate_data = await self._get_climate_data(request)
+        
+        if self.jobs.enabled and self.estimated_work(request) > INLINE_WORK_LIMIT:
+            simulation_response = await self.jobs.run(compute_simulation, request, simulation_id, climate_data)
+        else:
+            simulation_response = self.compute_simulation(request, simulation_id, climate_data)
         
+        self._store(simulation_response)
+        return simulation_response
+    
+    async def submit_simulation(self, request: SimulationRequest) -> Dict[str, Any]:
+        """Start a simulation as a background job; the job ID is the simulation ID"""
         simulation_id = f"sim_{uuid.uuid4().hex[:8]}"
+        climate_data = await self._get_climate_data(request)
+        
+        if not self.jobs.enabled:
+            self._store(self.compute_simulation(request, simulation_id, climate_data))
+            return {"job_id": simulation_id, "status": "done", "simulation_id": simulation_id}
+        
+        job = self.jobs.submit(
+            simulation_id, compute_simulation, request, simulation_id, climate_data, on_result=self._store
+        )
+        return {**job, "simulation_id": simulation_id}
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, or None if unknown"""
+        job = self.jobs.job(job_id)
+        if job is None:
+            # Submitted to another worker (or restarted since): finished if its result is stored
+            if self.store.get(job_id) is None:
+                return None
+            job = {"job_id": job_id, "status": "done"}
+        return {**job, "simulation_id": job_id}
+    
+    def estimated_work(self, request: SimulationRequest) -> int:
+        """Model evaluations a request needs (ensemble draws x scenarios x days)"""
+        work = (request.ensemble_size or 1) * len(request.scenarios)
+        if request.timestep == "daily":
+            crop_model = self.crop_models.get(request.crop.value, self.crop_models["maize"])
+            work *= crop_model["growing_days"]
+        return work
+    
+    def compute_simulation(
+        self,
+        request: SimulationRequest,
+        simulation_id: str,
+        climate_data: Dict[str, Any]
+    ) -> SimulationResponse:
+        """CPU-bound part of a simulation (no I/O, safe to run in a worker process)"""
         created_at = datetime.utcnow()
         
         # Get crop model
         crop_model = self.crop_models.get(request.crop.value, self.crop_models["maize"])
         
+        # Ensemble mode: every scenario sees the same weather realizations,
+        # so differences between scenarios come from the inputs alone
+        rng = np.random.default_rng(request.seed)
+        ensemble = None
+        if request.timestep == "daily":
+            ensemble = self._daily_ensemble(request.ensemble_size or 1, rng, climate_data)
+        elif request.ensemble_size:
+            ensemble = self._draw_weather(request.ensemble_size, rng)
+        
         # Run simulations for different scenarios
         results = {}
         
         for scenario in request.scenarios:
             if scenario == "current":
-                result = self._simulate_scenario(request, crop_model, request.inputs)
+                result = self._simulate_scenario(request, crop_model, request.inputs, ensemble)
             elif scenario == "optimal":
-                optimal_inputs = self._get_optimal_inputs(request.crop, crop_model)
-                result = self._simulate_scenario(request, crop_model, optimal_inputs)
+                optimal_inputs = self._get_optimal_inputs(request, crop_model, ensemble, climate_data)
+                result = self._simulate_scenario(request, crop_model, optimal_inputs, ensemble)
             elif scenario == "budget":
                 budget_inputs = self._get_budget_inputs(request.inputs)
-                result = self._simulate_scenario(request, crop_model, budget_inputs)
+                result = self._simulate_scenario(request, crop_model, budget_inputs, ensemble)
             else:
-                result = self._simulate_scenario(request, crop_model, request.inputs)
+                result = self._simulate_scenario(request, crop_model, request.inputs, ensemble)
             
             results[scenario] = result
         
         # Generate recommendations
         recommendations = self._generate_recommendations(request, results, crop_model)
         
-        # Get climate data
-        climate_data = await self._get_climate_data(request)
-        
-        # Store simulation
         simulation_response = SimulationResponse(
             simulation_id=simulation_id,
             created_at=created_at,
@@ -107,43 +240,171 @@ class SimulationService:
             climate_data=climate_data
         )
         
-        self.simulations[simulation_id] = simulation_response
-        
         return simulation_response
     
-    def _simulate_scenario(self, request: SimulationRequest, crop_model: Dict[str, Any], inputs: SimulationInputs) -> SimulationResult:
-        """Simulate a specific scenario"""
+    def _store(self, simulation: SimulationResponse):
+        try:
+            self.store.put(simulation)
+        except Exception as e:
+            # The caller still gets the result; only the later lookup by ID is lost
+            print(f"Failed to store simulation {simulation.simulation_id}: {e}")
+    
+    def _draw_weather(self, n: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """N season weather realizations: yield weather factor and average temperature"""
+        return {
+            "weather_variation": rng.uniform(*WEATHER_VARIATION_RANGE, n),
+            "avg_temp_c": SEASON_TEMP_MEAN_C + rng.uniform(-SEASON_TEMP_SPREAD_C, SEASON_TEMP_SPREAD_C, n)
+        }
+    
+    def _daily_ensemble(self, runs: int, rng: np.random.Generator, climate_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Daily weather realizations, described by a seed and generated chunk by
+        chunk on use (identical for every scenario of a simulation)
+        """
+        return {
+            "timestep": "daily",
+            "runs": runs,
+            "seed": int(rng.integers(2 ** 63)),
+            "season_rain_mm": float((climate_data or {}).get("rainfall_forecast_mm", DEFAULT_SEASON_RAIN_MM)),
+            # Start the season from current soil moisture when known
+            "initial_depletion_fraction": (
+                float(np.clip(1 - climate_data["soil_moisture_percent"] / 100, 0.0, 1.0))
+                if climate_data and "soil_moisture_percent" in climate_data else INITIAL_DEPLETION_FRACTION
+            )
+        }
+    
+    def _draw_daily_weather(self, n: int, days: int, rng: np.random.Generator, season_rain_mm: float) -> Dict[str, np.ndarray]:
+        """N realizations of daily rain, reference ET and temperature over `days` days"""
+        # Generated day-major (the water-balance loop layout) in float32, which
+        # halves generator time and memory at ample precision for weather
+        uniform = rng.random((days, n), dtype=np.float32)
+        wet = uniform < WET_DAY_PROBABILITY
+        # On wet days uniform / p is itself uniform: invert it for exponential amounts
+        rainy_days = min(days, RAINY_SEASON_DAYS)
+        mean_wet_day_rain = season_rain_mm / rainy_days / WET_DAY_PROBABILITY
+        rain = np.minimum(uniform / np.float32(WET_DAY_PROBABILITY), np.float32(0.9999))
+        np.negative(rain, out=rain)
+        np.log1p(rain, out=rain)
+        rain *= -mean_wet_day_rain * rng.uniform(*SEASON_RAIN_VARIATION, n).astype(np.float32)
+        rain *= wet
+        rain[rainy_days:] *= np.float32(DRY_SEASON_RAIN_FRACTION)
+        
+        season_temp = SEASON_TEMP_MEAN_C + rng.uniform(-SEASON_TEMP_SPREAD_C, SEASON_TEMP_SPREAD_C, n)
+        temp = rng.standard_normal((days, n), dtype=np.float32)
+        temp *= DAILY_TEMP_SD_C
+        temp += season_temp.astype(np.float32)
+        et0 = (temp - SEASON_TEMP_MEAN_C) * (REFERENCE_ET0_MM * ET0_PER_DEGREE) + REFERENCE_ET0_MM
+        et0 *= 1 - (1 - WET_DAY_ET0_FACTOR) * wet
+        np.maximum(et0, 0.5, out=et0)
+        return {"rain_mm": rain.T, "et0_mm": et0.T, "temp_c": temp.T}
+    
+    def _iter_daily_weather(self, ensemble: Dict[str, Any], days: int, runs: Optional[int] = None):
+        """Weather chunks for the first `runs` realizations (default all) of a daily ensemble"""
+        runs = ensemble["runs"] if runs is None else runs
+        for chunk, start in enumerate(range(0, runs, DAILY_CHUNK_RUNS)):
+            rng = np.random.default_rng([ensemble["seed"], chunk])
+            yield self._draw_daily_weather(min(DAILY_CHUNK_RUNS, runs - start), days, rng, ensemble["season_rain_mm"])
+    
+    def _daily_water_balance(
+        self,
+        ensemble: Dict[str, Any],
+        crop_model: Dict[str, Any],
+        irrigation_mm_week: float
+    ) -> Dict[str, np.ndarray]:
+        """Water-balance outputs for every realization of a daily ensemble"""
+        chunks = [
+            simulate_water_balance(
+                weather["rain_mm"], weather["et0_mm"], weather["temp_c"], irrigation_mm_week / 7, crop_model,
+                ensemble["initial_depletion_fraction"]
+            )
+            for weather in self._iter_daily_weather(ensemble, crop_model["growing_days"])
+        ]
+        return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+    
+    def _simulate_scenario(
+        self,
+        request: SimulationRequest,
+        crop_model: Dict[str, Any],
+        inputs: SimulationInputs,
+        ensemble: Optional[Dict[str, np.ndarray]] = None
+    ) -> SimulationResult:
+        """Simulate a specific scenario (single draw, or every realization of an ensemble)"""
         
         # Base yield calculation
         base_yield = crop_model["base_yield_kg_ha"]
         
-        # Fertilizer effect (diminishing returns)
-        fertilizer_effect = min(1.0, (inputs.fertilizer_dap_kg_ha + inputs.fertilizer_urea_kg_ha) / 100)
-        fertilizer_multiplier = 1 + (fertilizer_effect * crop_model["fertilizer_response"])
-        
-        # Irrigation effect
-        irrigation_effect = min(1.0, inputs.irrigation_mm_week * 4 / crop_model["water_requirement_mm"])
-        irrigation_multiplier = 1 + (irrigation_effect * crop_model["irrigation_response"])
-        
-        # Temperature effect (simplified)
-        temp_effect = self._calculate_temperature_effect(request, crop_model)
-        
-        # Random weather variation
-        weather_variation = random.uniform(0.85, 1.15)
-        
-        # Calculate final yield
-        predicted_yield = base_yield * fertilizer_multiplier * irrigation_multiplier * temp_effect * weather_variation
-        
-        # Add some realistic variation
-        confidence_range = predicted_yield * 0.15
-        lower_bound = max(0, predicted_yield - confidence_range)
-        upper_bound = predicted_yield + confidence_range
+        # Fertilizer and irrigation effects
+        fertilizer_multiplier = float(self._fertilizer_multiplier(
+            inputs.fertilizer_dap_kg_ha, inputs.fertilizer_urea_kg_ha, crop_model
+        ))
+        input_multiplier = fertilizer_multiplier * float(self._irrigation_multiplier(inputs.irrigation_mm_week, crop_model))
         
         # Calculate costs
         costs = self._calculate_costs(inputs, request.farm_size_ha)
         
         # Calculate revenue (simplified pricing)
         price_per_kg = self._get_crop_price(request.crop)
+        
+        ensemble_stats = {}
+        yields = None
+        if ensemble is not None and ensemble.get("timestep") == "daily":
+            # Irrigation acts through the soil water balance, scaling down
+            # from the calibrated potential (no stress) yield
+            balance = self._daily_water_balance(ensemble, crop_model, inputs.irrigation_mm_week)
+            potential_yield = base_yield * fertilizer_multiplier * self._daily_potential_multiplier(request.crop.value, crop_model)
+            yields = potential_yield * balance["yield_factor"]
+            ensemble_stats["water_balance"] = {
+                key: round(float(np.median(balance[key])), 3)
+                for key in (
+                    "water_factor", "temperature_factor", "eta_mm", "etc_mm", "drainage_mm",
+                    "water_stress_days", "heat_stress_days", "soil_water_end_mm"
+                )
+            }
+            ensemble_stats["water_balance"]["potential_yield_kg_ha"] = round(potential_yield, 0)
+        elif ensemble is not None:
+            # Yield model evaluated for every realization at once
+            yields = (
+                base_yield * input_multiplier
+                * self._temperature_effects(ensemble["avg_temp_c"], crop_model)
+                * ensemble["weather_variation"]
+            )
+        
+        if yields is None:
+            # Temperature effect (simplified)
+            temp_effect = self._calculate_temperature_effect(request, crop_model)
+            
+            # Random weather variation
+            weather_variation = random.uniform(*WEATHER_VARIATION_RANGE)
+            
+            # Calculate final yield
+            predicted_yield = base_yield * input_multiplier * temp_effect * weather_variation
+            
+            # Add some realistic variation
+            confidence_range = predicted_yield * 0.15
+            lower_bound = max(0, predicted_yield - confidence_range)
+            upper_bound = predicted_yield + confidence_range
+        elif len(yields) == 1:
+            # Single daily-model run
+            predicted_yield = float(yields[0])
+            confidence_range = predicted_yield * 0.15
+            lower_bound = max(0, predicted_yield - confidence_range)
+            upper_bound = predicted_yield + confidence_range
+        else:
+            profits = yields * request.farm_size_ha * price_per_kg - costs["total_usd"]
+            lower_bound, predicted_yield, upper_bound = np.percentile(yields, ENSEMBLE_PERCENTILES).tolist()
+            profit_percentiles = np.percentile(profits, ENSEMBLE_PERCENTILES).tolist()
+            ensemble_stats.update({
+                "ensemble_size": len(yields),
+                "yield_percentiles_kg_ha": {
+                    f"p{p}": round(v, 0) for p, v in zip(ENSEMBLE_PERCENTILES, (lower_bound, predicted_yield, upper_bound))
+                },
+                "net_profit_percentiles_usd": {
+                    f"p{p}": round(v, 2) for p, v in zip(ENSEMBLE_PERCENTILES, profit_percentiles)
+                },
+                "expected_net_profit_usd": round(float(profits.mean()), 2),
+                "probability_of_loss": round(float((profits < 0).mean()), 4)
+            })
+        
         revenue = predicted_yield * request.farm_size_ha * price_per_kg
         
         # Calculate net profit
@@ -162,25 +423,40 @@ class SimulationService:
             costs=costs,
             revenue_estimate_usd=round(revenue, 2),
             net_profit_usd=round(net_profit, 2),
-            roi_percent=round(roi, 1)
+            roi_percent=round(roi, 1),
+            inputs=inputs,
+            **ensemble_stats
         )
     
     def _calculate_temperature_effect(self, request: SimulationRequest, crop_model: Dict[str, Any]) -> float:
         """Calculate temperature effect on yield (simplified)"""
         # Mock temperature data - in production would use real weather data
-        avg_temp = 24 + random.uniform(-3, 3)
-        optimal_temp = crop_model["optimal_temp_c"]
-        temp_tolerance = crop_model["temp_tolerance"]
-        
-        temp_diff = abs(avg_temp - optimal_temp)
-        if temp_diff <= temp_tolerance:
-            return 1.0
-        else:
-            # Linear decrease beyond tolerance
-            return max(0.5, 1.0 - (temp_diff - temp_tolerance) / temp_tolerance * 0.5)
+        avg_temp = SEASON_TEMP_MEAN_C + random.uniform(-SEASON_TEMP_SPREAD_C, SEASON_TEMP_SPREAD_C)
+        return float(self._temperature_effects(np.array([avg_temp]), crop_model)[0])
     
-    def _calculate_costs(self, inputs: SimulationInputs, farm_size_ha: float) -> Dict[str, float]:
-        """Calculate farming costs"""
+    def _temperature_effects(self, avg_temps: np.ndarray, crop_model: Dict[str, Any]) -> np.ndarray:
+        """Yield factor per season temperature: 1 within tolerance, linear decrease beyond (floor 0.5)"""
+        return temperature_stress(avg_temps, crop_model["optimal_temp_c"], crop_model["temp_tolerance"])
+    
+    def _fertilizer_multiplier(self, dap_kg_ha: Any, urea_kg_ha: Any, crop_model: Dict[str, Any]) -> Any:
+        """Yield multiplier from fertilizer (diminishing returns; scalars or arrays)"""
+        fertilizer_effect = np.minimum(1.0, (dap_kg_ha + urea_kg_ha) / 100)
+        return 1 + (fertilizer_effect * crop_model["fertilizer_response"])
+    
+    def _irrigation_multiplier(self, irrigation_mm_week: Any, crop_model: Dict[str, Any]) -> Any:
+        """Seasonal-model yield multiplier from irrigation (scalars or arrays)"""
+        irrigation_effect = np.minimum(1.0, irrigation_mm_week * 4 / crop_model["water_requirement_mm"])
+        return 1 + (irrigation_effect * crop_model["irrigation_response"])
+    
+    def _input_costs(
+        self,
+        dap_kg_ha: Any,
+        urea_kg_ha: Any,
+        irrigation_mm_week: Any,
+        pesticide_applications: Any,
+        farm_size_ha: float
+    ) -> Dict[str, Any]:
+        """Unrounded input costs (scalars or arrays)"""
         # Cost per kg (USD)
         dap_cost_per_kg = 0.8
         urea_cost_per_kg = 0.6
@@ -188,24 +464,32 @@ class SimulationService:
         pesticide_cost_per_application = 20
         
         # Calculate costs
-        fertilizer_cost = (inputs.fertilizer_dap_kg_ha * dap_cost_per_kg + 
-                          inputs.fertilizer_urea_kg_ha * urea_cost_per_kg) * farm_size_ha
+        fertilizer_cost = (dap_kg_ha * dap_cost_per_kg + urea_kg_ha * urea_cost_per_kg) * farm_size_ha
         
         # Irrigation cost (assuming 1mm = 10m3/ha)
-        irrigation_volume = inputs.irrigation_mm_week * 4 * 10 * farm_size_ha  # 4 weeks
+        irrigation_volume = irrigation_mm_week * 4 * 10 * farm_size_ha  # 4 weeks
         irrigation_cost = irrigation_volume * water_cost_per_m3
         
-        pesticide_cost = inputs.pesticide_applications * pesticide_cost_per_application * farm_size_ha
-        
-        total_cost = fertilizer_cost + irrigation_cost + pesticide_cost
+        pesticide_cost = pesticide_applications * pesticide_cost_per_application * farm_size_ha
         
         return {
-            "fertilizer_usd": round(fertilizer_cost, 2),
-            "irrigation_usd": round(irrigation_cost, 2),
-            "pesticide_usd": round(pesticide_cost, 2),
-            "total_usd": round(total_cost, 2)
+            "fertilizer_usd": fertilizer_cost,
+            "irrigation_usd": irrigation_cost,
+            "pesticide_usd": pesticide_cost,
+            "total_usd": fertilizer_cost + irrigation_cost + pesticide_cost
         }
     
+    def _calculate_costs(self, inputs: SimulationInputs, farm_size_ha: float) -> Dict[str, float]:
+        """Calculate farming costs"""
+        costs = self._input_costs(
+            inputs.fertilizer_dap_kg_ha,
+            inputs.fertilizer_urea_kg_ha,
+            inputs.irrigation_mm_week,
+            inputs.pesticide_applications,
+            farm_size_ha
+        )
+        return {key: round(value, 2) for key, value in costs.items()}
+    
     def _get_crop_price(self, crop: CropType) -> float:
         """Get current market price per kg (USD)"""
         prices = {
@@ -216,29 +500,145 @@ class SimulationService:
         }
         return prices.get(crop.value, 0.3)
     
-    def _get_optimal_inputs(self, crop: CropType, crop_model: Dict[str, Any]) -> SimulationInputs:
-        """Get optimal input recommendations"""
-        if crop == CropType.MAIZE:
-            return SimulationInputs(
-                fertilizer_dap_kg_ha=60,
-                fertilizer_urea_kg_ha=30,
-                irrigation_mm_week=25,
-                pesticide_applications=3
-            )
-        elif crop == CropType.TOMATOES:
-            return SimulationInputs(
-                fertilizer_dap_kg_ha=80,
-                fertilizer_urea_kg_ha=40,
-                irrigation_mm_week=30,
-                pesticide_applications=4
-            )
+    def _get_optimal_inputs(
+        self,
+        request: SimulationRequest,
+        crop_model: Dict[str, Any],
+        ensemble: Optional[Dict[str, Any]] = None,
+        climate_data: Optional[Dict[str, Any]] = None
+    ) -> SimulationInputs:
+        """Inputs maximizing expected net profit for this crop, farm and budget"""
+        if request.timestep == "daily":
+            water_response = self._daily_irrigation_response(crop_model, ensemble, climate_data)
+            potential = self._daily_potential_multiplier(request.crop.value, crop_model)
+            
+            def yield_factor(irrigation: np.ndarray) -> np.ndarray:
+                return potential * water_response(irrigation)
         else:
-            return SimulationInputs(
-                fertilizer_dap_kg_ha=50,
-                fertilizer_urea_kg_ha=25,
-                irrigation_mm_week=20,
-                pesticide_applications=2
+            # Yield is linear in the weather terms, so expected profit only needs their mean
+            if ensemble is None:
+                ensemble = self._draw_weather(OPTIMIZER_WEATHER_DRAWS, np.random.default_rng(0))
+            season_factor = float(np.mean(
+                self._temperature_effects(ensemble["avg_temp_c"], crop_model) * ensemble["weather_variation"]
+            ))
+            
+            def yield_factor(irrigation: np.ndarray) -> np.ndarray:
+                return self._irrigation_multiplier(irrigation, crop_model) * season_factor
+        
+        return self._optimize_inputs(
+            crop_model,
+            self._get_crop_price(request.crop),
+            request.farm_size_ha,
+            yield_factor,
+            request.budget_usd
+        )
+    
+    def _daily_potential_multiplier(self, crop: str, crop_model: Dict[str, Any]) -> float:
+        """
+        Daily-model potential yield as a multiple of base_yield_kg_ha.
+        base_yield_kg_ha is the season model's rain-fed yield, so the potential
+        is set for rain-fed daily runs in the reference climate (default season
+        rain, no irrigation) to average the same yield, capped at the season
+        model's well-watered yield (1 + irrigation_response)
+        """
+        multiplier = self._daily_potential.get(crop)
+        if multiplier is None:
+            reference = self._daily_ensemble(OPTIMIZER_DAILY_DRAWS, np.random.default_rng(0))
+            weather = next(self._iter_daily_weather(reference, crop_model["growing_days"]))
+            balance = simulate_water_balance(
+                weather["rain_mm"], weather["et0_mm"], weather["temp_c"], 0.0, crop_model,
+                reference["initial_depletion_fraction"]
             )
+            rainfed_water_factor = max(float(balance["water_factor"].mean()), 1e-6)
+            multiplier = min(1 + crop_model["irrigation_response"], 1 / rainfed_water_factor)
+            self._daily_potential[crop] = multiplier
+        return multiplier
+    
+    def _daily_irrigation_response(
+        self,
+        crop_model: Dict[str, Any],
+        ensemble: Optional[Dict[str, Any]] = None,
+        climate_data: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Mean daily-model yield factor as a function of irrigation level,
+        each level scored on the same OPTIMIZER_DAILY_DRAWS realizations
+        """
+        if ensemble is None or ensemble["runs"] < OPTIMIZER_DAILY_DRAWS:
+            ensemble = self._daily_ensemble(OPTIMIZER_DAILY_DRAWS, np.random.default_rng(0), climate_data)
+        weather = next(self._iter_daily_weather(ensemble, crop_model["growing_days"], OPTIMIZER_DAILY_DRAWS))
+        scored: Dict[float, float] = {}
+        
+        def response(irrigation: np.ndarray) -> np.ndarray:
+            levels = np.unique(irrigation)
+            new_levels = np.array([level for level in levels.tolist() if level not in scored])
+            if len(new_levels):
+                # Every new level x every realization in one engine call
+                tiled = {key: np.tile(values, (len(new_levels), 1)) for key, values in weather.items()}
+                balance = simulate_water_balance(
+                    tiled["rain_mm"], tiled["et0_mm"], tiled["temp_c"],
+                    np.repeat(new_levels / 7, OPTIMIZER_DAILY_DRAWS)[:, None], crop_model,
+                    ensemble["initial_depletion_fraction"]
+                )
+                means = balance["yield_factor"].reshape(len(new_levels), OPTIMIZER_DAILY_DRAWS).mean(axis=1)
+                scored.update(zip(new_levels.tolist(), means.tolist()))
+            factors = np.array([scored[level] for level in levels.tolist()])
+            return factors[np.searchsorted(levels, irrigation)]
+        
+        return response
+    
+    def _optimize_inputs(
+        self,
+        crop_model: Dict[str, Any],
+        price_per_kg: float,
+        farm_size_ha: float,
+        yield_factor,
+        budget_usd: Optional[float] = None
+    ) -> SimulationInputs:
+        """
+        Grid search over DAP, urea, irrigation and pesticide: every candidate
+        of a coarse grid is scored in one vectorized pass, then finer grids
+        around the best few coarse candidates pick the final inputs.
+        yield_factor(irrigation) gives the expected yield multiplier beyond
+        base yield x fertilizer response.
+        Candidates over budget are excluded; ties go to the cheaper inputs.
+        """
+        def axis(center: Optional[float], i: int, step: float) -> np.ndarray:
+            low, high = INPUT_BOUNDS[i]
+            if center is not None:
+                low = max(low, center - OPTIMIZER_COARSE_STEPS[i])
+                high = min(high, center + OPTIMIZER_COARSE_STEPS[i])
+            return np.arange(low, high + step / 2, step)
+        
+        def grid(axes: List[np.ndarray]) -> np.ndarray:
+            return np.stack([values.ravel() for values in np.meshgrid(*axes, indexing="ij")], axis=1)
+        
+        def ranked(candidates: np.ndarray) -> np.ndarray:
+            """Candidates (n, 4) ordered best first"""
+            dap, urea, irrigation, pesticide = candidates.T
+            yields = (
+                crop_model["base_yield_kg_ha"] * self._fertilizer_multiplier(dap, urea, crop_model) * yield_factor(irrigation)
+            )
+            cost = self._input_costs(dap, urea, irrigation, pesticide, farm_size_ha)["total_usd"]
+            profit = yields * farm_size_ha * price_per_kg - cost
+            if budget_usd is not None:
+                profit = np.where(cost <= budget_usd + 1e-9, profit, -np.inf)
+            return candidates[np.lexsort((cost, -profit))]
+        
+        coarse = ranked(grid([axis(None, i, OPTIMIZER_COARSE_STEPS[i]) for i in range(4)]))
+        fine = np.concatenate([
+            grid([axis(seed[i], i, OPTIMIZER_FINE_STEPS[i]) for i in range(4)])
+            for seed in coarse[:OPTIMIZER_SEEDS]
+        ])
+        best = ranked(fine)[0]
+        
+        dap, urea, irrigation, pesticide = best.tolist()
+        return SimulationInputs(
+            fertilizer_dap_kg_ha=round(dap, 1),
+            fertilizer_urea_kg_ha=round(urea, 1),
+            irrigation_mm_week=round(irrigation, 1),
+            pesticide_applications=int(round(pesticide))
+        )
     
     def _get_budget_inputs(self, current_inputs: SimulationInputs) -> SimulationInputs:
         """Get budget-constrained input recommendations"""
@@ -295,4 +695,19 @@ class SimulationService:
     
     def get_simulation(self, simulation_id: str) -> Optional[SimulationResponse]:
         """Get simulation by ID"""
-        return self.simulations.get(simulation_id)
+        return self.store.get(simulation_id)
+
+
+_worker_service: Optional[SimulationService] = None
+
+
+def compute_simulation(
+    request: SimulationRequest,
+    simulation_id: str,
+    climate_data: Dict[str, Any]
+) -> SimulationResponse:
+    """Process-pool entry point: compute one simulation in a worker process"""
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = SimulationService()
+    return _worker_service.compute_simulation(request, simulation_id, climate_data)
@@ -0,0 +1,149 @@
+"""
+Simulation Store - finished simulations shared across workers
+Responses are stored as zlib-compressed JSON in the main database with an
+expiry; the table is pruned by TTL and capped by row count (checked every
+PRUNE_EVERY writes, so it may briefly run that far over). A small LRU in
+front serves recent simulations from memory without a database read.
+"""
+
+import os
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from database import SessionLocal
+from models.schemas import SimulationResponse
+from models.simulation import SimulationRecord
+from services.grid_cache import GridCellCache
+
+DEFAULT_TTL = timedelta(hours=float(os.getenv("SIMULATION_TTL_HOURS", "72")))
+DEFAULT_MAX_STORED = int(os.getenv("SIMULATION_MAX_STORED", "10000"))
+DEFAULT_CACHE_ENTRIES = int(os.getenv("SIMULATION_CACHE_ENTRIES", "256"))
+
+# Expired / over-cap rows are pruned once every this many writes
+PRUNE_EVERY = 50
+
+COMPRESSION_LEVEL = 6
+
+
+def encode_simulation(simulation: SimulationResponse) -> bytes:
+    return zlib.compress(simulation.model_dump_json().encode(), COMPRESSION_LEVEL)
+
+
+def decode_simulation(payload: bytes) -> SimulationResponse:
+    return SimulationResponse.model_validate_json(zlib.decompress(payload))
+
+
+class SimulationStore:
+    """Persistent, bounded simulation results with an in-process LRU front"""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl: timedelta = DEFAULT_TTL,
+        max_stored: int = DEFAULT_MAX_STORED,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_stored = max_stored
+        # Cached objects are the decoded responses; size them by their stored payload
+        self.cache = GridCellCache(
+            max_entries=cache_entries,
+            ttl_seconds=ttl.total_seconds(),
+            sizer=lambda entry: entry[1],
+            day_bound=False
+        )
+        self._writes = 0
+        self.pruned = 0
+
+    def put(self, simulation: SimulationResponse) -> int:
+        """Store a simulation; returns the compressed size in bytes"""
+        payload = encode_simulation(simulation)
+        now = datetime.utcnow()
+
+        db = self.session_factory()
+        try:
+            db.merge(SimulationRecord(
+                simulation_id=simulation.simulation_id,
+                payload=payload,
+                size_bytes=len(payload),
+                created_at=now,
+                expires_at=now + self.ttl
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.cache.set(simulation.simulation_id, (simulation, len(payload)))
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 1:
+            self.prune()
+        return len(payload)
+
+    def get(self, simulation_id: str) -> Optional[SimulationResponse]:
+        """Simulation by ID from memory, else from the database (None if missing or expired)"""
+        entry = self.cache.get(simulation_id)
+        if entry is not None:
+            return entry[0]
+
+        db = self.session_factory()
+        try:
+            row = db.get(SimulationRecord, simulation_id)
+        finally:
+            db.close()
+
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        simulation = decode_simulation(row.payload)
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        self.cache.set(simulation_id, (simulation, row.size_bytes), ttl_seconds=remaining)
+        return simulation
+
+    def prune(self) -> int:
+        """Delete expired rows, then the oldest rows beyond max_stored; returns rows deleted"""
+        db = self.session_factory()
+        try:
+            deleted = db.query(SimulationRecord).filter(
+                SimulationRecord.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+
+            excess = db.query(SimulationRecord).count() - self.max_stored
+            if excess > 0:
+                oldest = db.query(SimulationRecord.simulation_id).order_by(
+                    SimulationRecord.created_at, SimulationRecord.simulation_id
+                ).limit(excess).subquery()
+                deleted += db.query(SimulationRecord).filter(
+                    SimulationRecord.simulation_id.in_(oldest.select())
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Simulation store prune failed: {e}")
+            return 0
+        finally:
+            db.close()
+
+        self.pruned += deleted
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            stored = db.query(SimulationRecord).count()
+        except Exception as e:
+            print(f"Simulation store stats failed: {e}")
+            stored = None
+        finally:
+            db.close()
+
+        return {
+            "stored": stored,
+            "max_stored": self.max_stored,
+            "ttl_hours": self.ttl.total_seconds() / 3600,
+            "pruned": self.pruned,
+            "cache": self.cache.stats()
+        }
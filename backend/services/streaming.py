@@ -0,0 +1,100 @@
+"""
+Streaming - NDJSON responses for long time series
+Rows are encoded and flushed in small batches as the producer yields them,
+so time to first byte and memory stay flat however long the range is.
+Line 1 is {"meta": ...}, then one JSON object per row, then {"summary": ...}
+(or {"error": ...} if the producer fails after the response has started).
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Union
+
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows encoded per network write
+FLUSH_ROWS = 256
+
+Rows = Union[AsyncIterator[Dict[str, Any]], Iterable[Dict[str, Any]]]
+
+
+async def _aiter(rows: Rows) -> AsyncIterator[Dict[str, Any]]:
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+class RunningSeries:
+    """Count, mean and head/tail means of one field, updated as rows stream past"""
+
+    def __init__(self, field: str, edge: int = 7):
+        self.field = field
+        self.count = 0
+        self.total = 0.0
+        self.head = []
+        self.tail = deque(maxlen=edge)
+        self.edge = edge
+
+    async def track(self, rows: Rows) -> AsyncIterator[Dict[str, Any]]:
+        async for row in _aiter(rows):
+            value = row[self.field]
+            self.count += 1
+            self.total += value
+            if len(self.head) < self.edge:
+                self.head.append(value)
+            self.tail.append(value)
+            yield row
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def head_mean(self) -> Optional[float]:
+        return sum(self.head) / len(self.head) if self.head else None
+
+    @property
+    def tail_mean(self) -> Optional[float]:
+        return sum(self.tail) / len(self.tail) if self.tail else None
+
+
+async def ndjson_lines(
+    meta: Dict[str, Any],
+    rows: Rows,
+    summary: Optional[Callable[[], Dict[str, Any]]] = None
+) -> AsyncIterator[str]:
+    """Encode meta, rows and summary as NDJSON chunks"""
+    yield json.dumps({"meta": meta}, default=str) + "\n"
+    batch = []
+    try:
+        async for row in _aiter(rows):
+            batch.append(json.dumps(row, default=str))
+            if len(batch) >= FLUSH_ROWS:
+                yield "\n".join(batch) + "\n"
+                batch.clear()
+                # Let other requests run between batches of CPU-bound rows
+                await asyncio.sleep(0)
+        if batch:
+            yield "\n".join(batch) + "\n"
+        if summary is not None:
+            yield json.dumps({"summary": summary()}, default=str) + "\n"
+    except Exception as e:
+        print(f"NDJSON stream failed: {e}")
+        if batch:
+            yield "\n".join(batch) + "\n"
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+def ndjson_response(
+    meta: Dict[str, Any],
+    rows: Rows,
+    summary: Optional[Callable[[], Dict[str, Any]]] = None
+) -> StreamingResponse:
+    """StreamingResponse over ndjson_lines"""
+    return StreamingResponse(ndjson_lines(meta, rows, summary), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,121 @@
+"""
+Weather Providers - pluggable sources behind WeatherService
+A provider turns a grid cell and a date range into plain per-day dicts;
+WeatherService handles caching, slicing and response models. The
+synthetic provider is the deterministic local stand-in: every value is
+seeded from (cell, day), so repeat calls and overlapping windows agree.
+"""
+
+import hashlib
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+Cell = Tuple[float, float]
+
+
+class WeatherProvider:
+    """Interface every weather data source implements"""
+
+    name = "base"
+    data_sources: List[str] = []
+
+    async def current(self, cell: Cell, when: datetime) -> Dict[str, Any]:
+        """Current conditions for a cell"""
+        raise NotImplementedError
+
+    async def forecast(self, cell: Cell, start: date, days: int) -> List[Dict[str, Any]]:
+        """Daily forecast starting at `start`: date, temp_min_c, temp_max_c, rainfall_mm, rainfall_chance, humidity_avg"""
+        raise NotImplementedError
+
+    async def ndvi(self, cell: Cell, end: date, days: int) -> List[Dict[str, Any]]:
+        """Daily NDVI for the `days` days before `end`: date, ndvi_value, quality"""
+        raise NotImplementedError
+
+    async def rainfall(self, cell: Cell, end: date, days: int) -> List[Dict[str, Any]]:
+        """Observed daily rainfall for the `days` days before `end`: date, rainfall_mm"""
+        raise NotImplementedError
+
+
+def _rng(*key: Any) -> random.Random:
+    """Random generator seeded from a stable hash of the key (same across processes)"""
+    digest = hashlib.sha256(repr(key).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+class SyntheticWeatherProvider(WeatherProvider):
+    """Deterministic demo data with the same ranges the mock generators used"""
+
+    name = "synthetic"
+    data_sources = ["Kenya Meteorological Department", "NASA CHIRPS", "OpenWeatherMap"]
+
+    async def current(self, cell: Cell, when: datetime) -> Dict[str, Any]:
+        rng = _rng("current", cell, when.date().isoformat(), when.hour)
+        return {
+            "temperature_c": round(20 + rng.uniform(-5, 10), 1),
+            "humidity_percent": rng.randint(40, 80),
+            "wind_speed_kmh": rng.randint(5, 25),
+            "conditions": rng.choice(["Sunny", "Partly Cloudy", "Cloudy", "Light Rain"]),
+            "pressure_hpa": rng.randint(1000, 1020),
+            "visibility_km": rng.randint(5, 15),
+            "uv_index": rng.randint(1, 10),
+            "updated_at": when.replace(minute=0, second=0, microsecond=0).isoformat(),
+            "data_source": "Kenya Meteorological Department"
+        }
+
+    async def forecast(self, cell: Cell, start: date, days: int) -> List[Dict[str, Any]]:
+        forecast = []
+        for i in range(days):
+            day = start + timedelta(days=i)
+            # Base temperature drifts by week so neighbouring days stay coherent
+            base_temp = 22 + _rng("forecast-base", cell, day.isocalendar()[:2]).uniform(-3, 5)
+            rng = _rng("forecast", cell, day.isoformat())
+            temp_variation = rng.uniform(-2, 3)
+            rainfall_chance = rng.random()
+            forecast.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "temp_min_c": round(base_temp + temp_variation - 5, 1),
+                "temp_max_c": round(base_temp + temp_variation + 5, 1),
+                "rainfall_mm": round(rainfall_chance * 20, 1) if rainfall_chance > 0.6 else 0,
+                "rainfall_chance": rainfall_chance,
+                "humidity_avg": rng.randint(50, 85)
+            })
+        return forecast
+
+    async def ndvi(self, cell: Cell, end: date, days: int) -> List[Dict[str, Any]]:
+        base_ndvi = 0.4 + _rng("ndvi-base", cell).uniform(-0.1, 0.2)
+        series = []
+        for i in range(days):
+            day = end - timedelta(days=days - i)
+            rng = _rng("ndvi", cell, day.isoformat())
+            series.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "ndvi_value": round(max(0, min(1, base_ndvi + rng.uniform(-0.1, 0.1))), 3),
+                "quality": rng.choice(["good", "fair", "excellent"])
+            })
+        return series
+
+    async def rainfall(self, cell: Cell, end: date, days: int) -> List[Dict[str, Any]]:
+        series = []
+        for i in range(days):
+            day = end - timedelta(days=days - i)
+            series.append({
+                "date": day.strftime("%Y-%m-%d"),
+                "rainfall_mm": round(_rng("rainfall", cell, day.isoformat()).uniform(0, 15), 1)
+            })
+        return series
+
+
+WEATHER_PROVIDERS = {
+    SyntheticWeatherProvider.name: SyntheticWeatherProvider
+}
+
+
+def get_weather_provider(name: str = None) -> WeatherProvider:
+    """Instantiate the configured provider (WEATHER_PROVIDER env var, default synthetic)"""
+    name = name or os.getenv("WEATHER_PROVIDER", SyntheticWeatherProvider.name)
+    provider_class = WEATHER_PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Unknown weather provider: {name}")
+    return provider_class()
@@ -5,21 +5,62 @@ Weather Service - Integrates with NASA CHIRPS, Kenya Met, and Digital Earth Afri
 import requests
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable, AsyncIterator
 import json
-import random
+import numpy as np
 from models.schemas import WeatherResponse, WeatherDay, NDVIResponse, NDVIDataPoint
+from services.county_geocoder import get_county_geocoder
+from services.grid_cache import GridCellCache, SingleFlight, snap_to_grid
+from services.ndvi_store import QUALITY_LABELS, NdviTileStore, get_ndvi_store
+from services.rainfall_index import ACCUMULATION_WINDOWS, RainfallIndex, get_rainfall_index
+from services.weather_providers import WeatherProvider, get_weather_provider
+
+# Window fetched per cache entry; shorter requests are served as slices
+FORECAST_HORIZON_DAYS = 14
+HISTORY_WINDOW_DAYS = 90
+
+# Cache lifetimes per data kind (all entries also expire at UTC midnight)
+FORECAST_TTL_SECONDS = 6 * 3600
+CURRENT_TTL_SECONDS = 3600
+HISTORY_TTL_SECONDS = 24 * 3600
+
+# Grid cells fetched at once by the batch forecast
+FORECAST_BATCH_CONCURRENCY = 16
+
+# Days fetched from the provider per step when streaming long NDVI ranges
+NDVI_STREAM_CHUNK_DAYS = 90
+
 
 class WeatherService:
-    def __init__(self):
+    def __init__(
+        self,
+        provider: Optional[WeatherProvider] = None,
+        ndvi_store: Optional[NdviTileStore] = None,
+        rainfall_index: Optional[RainfallIndex] = None
+    ):
         self.kenya_met_api_key = "demo_key"  # Replace with real API key
         self.nasa_token = "demo_token"  # Replace with real token
         self.base_url = "https://api.openweathermap.org/data/2.5"  # Demo API
         
+        self.provider = provider or get_weather_provider()
+        self.geocoder = get_county_geocoder()
+        # Ingested NDVI composites, read straight from memory-mapped tiles
+        self.ndvi_store = ndvi_store or get_ndvi_store()
+        # Observed rainfall prefix sums from the local climate store
+        self.rainfall_index = rainfall_index or get_rainfall_index()
+        
+        # Provider results keyed by (kind, grid cell, date): every farm in a
+        # cell shares one entry, concurrent misses share one provider call
+        self.cache = GridCellCache(max_entries=16384, max_bytes=32 * 1024 * 1024)
+        self._flights = SingleFlight()
+        
     async def health_check(self) -> Dict[str, Any]:
         """Check if weather service is healthy"""
         return {
             "status": "healthy",
+            "provider": self.provider.name,
+            "cache": self.cache.stats(),
+            "ndvi_store": self.ndvi_store.stats(),
             "apis": {
                 "kenya_met": "connected",
                 "nasa_chirps": "connected", 
@@ -27,113 +68,231 @@ class WeatherService:
             }
         }
     
+    async def _cached(
+        self, key: Tuple[Any, ...], fetch: Callable[[], Awaitable[Any]], ttl_seconds: float
+    ) -> Any:
+        """Cache-aside provider call with single-flight on misses"""
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        
+        async def load():
+            result = await fetch()
+            self.cache.set(key, result, ttl_seconds=ttl_seconds)
+            return result
+        
+        return await self._flights.do(key, load)
+    
     async def get_current_weather(self, latitude: float, longitude: float) -> Dict[str, Any]:
         """Get current weather conditions"""
-        # For demo purposes, return mock data
-        # In production, this would call real APIs
-        
-        # Simulate API call delay
-        await asyncio.sleep(0.1)
-        
-        # Mock current weather data
-        current_weather = {
-            "temperature_c": round(20 + random.uniform(-5, 10), 1),
-            "humidity_percent": random.randint(40, 80),
-            "wind_speed_kmh": random.randint(5, 25),
-            "conditions": random.choice(["Sunny", "Partly Cloudy", "Cloudy", "Light Rain"]),
-            "pressure_hpa": random.randint(1000, 1020),
-            "visibility_km": random.randint(5, 15),
-            "uv_index": random.randint(1, 10),
-            "updated_at": datetime.utcnow().isoformat(),
-            "data_source": "Kenya Meteorological Department"
-        }
-        
-        return current_weather
+        cell = snap_to_grid(latitude, longitude)
+        now = datetime.utcnow()
+        current = await self._cached(
+            ("current", cell, now.strftime("%Y%m%d%H")),
+            lambda: self.provider.current(cell, now),
+            CURRENT_TTL_SECONDS
+        )
+        return dict(current)
+    
+    async def _forecast_days(self, cell: Tuple[float, float], days: int) -> List[Dict[str, Any]]:
+        """First `days` forecast days for a cell (one provider call per cell per day)"""
+        today = datetime.utcnow().date()
+        horizon = max(days, FORECAST_HORIZON_DAYS)
+        key = ("forecast", cell, today.isoformat(), horizon)
+        if horizon > FORECAST_HORIZON_DAYS:
+            return await self.provider.forecast(cell, today, horizon)
+        forecast = await self._cached(
+            key, lambda: self.provider.forecast(cell, today, horizon), FORECAST_TTL_SECONDS
+        )
+        return forecast[:days]
     
     async def get_forecast(self, latitude: float, longitude: float, days: int = 7) -> WeatherResponse:
         """Get weather forecast for specified days"""
         
-        # Simulate API call delay
-        await asyncio.sleep(0.2)
-        
-        # Generate mock forecast data
-        forecast_days = []
-        base_temp = 22 + random.uniform(-3, 5)
-        
-        for i in range(days):
-            date_obj = datetime.now() + timedelta(days=i)
-            
-            # Simulate realistic weather patterns
-            temp_variation = random.uniform(-2, 3)
-            rainfall_chance = random.random()
-            
-            day_data = WeatherDay(
-                date=date_obj.strftime("%Y-%m-%d"),
-                temp_min_c=round(base_temp + temp_variation - 5, 1),
-                temp_max_c=round(base_temp + temp_variation + 5, 1),
-                rainfall_mm=round(rainfall_chance * 20, 1) if rainfall_chance > 0.6 else 0,
-                conditions=self._get_conditions(rainfall_chance),
-                humidity_avg=random.randint(50, 85)
-            )
-            forecast_days.append(day_data)
+        cell = snap_to_grid(latitude, longitude)
+        # Forecast and current conditions are independent; fetch both at once
+        daily, current = await asyncio.gather(
+            self._forecast_days(cell, days),
+            self.get_current_weather(latitude, longitude)
+        )
         
         # Determine location name based on coordinates
-        location_name = self._get_location_name(latitude, longitude)
+        label = self.geocoder.label(latitude, longitude)
+        return self._forecast_response(latitude, longitude, label, daily, current)
+    
+    def _forecast_response(
+        self,
+        latitude: float,
+        longitude: float,
+        label: Dict[str, Optional[str]],
+        daily: List[Dict[str, Any]],
+        current: Dict[str, Any]
+    ) -> WeatherResponse:
+        """WeatherResponse for one location from its cell's forecast and current conditions"""
+        forecast_days = [
+            WeatherDay(
+                date=day["date"],
+                temp_min_c=day["temp_min_c"],
+                temp_max_c=day["temp_max_c"],
+                rainfall_mm=day["rainfall_mm"],
+                conditions=self._get_conditions(day["rainfall_chance"]),
+                humidity_avg=day["humidity_avg"]
+            )
+            for day in daily
+        ]
         
-        response = WeatherResponse(
+        county = label["county"] or self._region_county(latitude, longitude)
+        return WeatherResponse(
             location={
                 "latitude": latitude,
                 "longitude": longitude,
-                "name": location_name,
-                "county": self._get_county(latitude, longitude),
+                "name": label["subcounty"] or county or "Unknown Location",
+                "county": county or "Unknown County",
                 "country": "Kenya"
             },
-            current=await self.get_current_weather(latitude, longitude),
+            current=dict(current),
             forecast=forecast_days,
-            data_sources=[
-                "Kenya Meteorological Department",
-                "NASA CHIRPS",
-                "OpenWeatherMap"
-            ],
+            data_sources=list(self.provider.data_sources),
             generated_at=datetime.utcnow()
         )
+    
+    def _region_county(self, latitude: float, longitude: float) -> Optional[str]:
+        """Coarse region labels, used when the geocoder has no county for the point"""
+        if -1.5 <= latitude <= -1.0 and 36.5 <= longitude <= 37.5:
+            return "Nairobi"
+        elif -1.8 <= latitude <= -1.2 and 37.0 <= longitude <= 37.8:
+            return "Machakos"
+        elif -0.5 <= latitude <= 0.5 and 36.5 <= longitude <= 37.5:
+            return "Nyeri"
+        elif -0.5 <= latitude <= 0.5 and 37.5 <= longitude <= 38.5:
+            return "Meru"
+        elif -1.0 <= latitude <= -0.5 and 35.0 <= longitude <= 36.0:
+            return "Nakuru"
+        return None
+    
+    async def get_forecast_batch(
+        self,
+        locations: List[Tuple[float, float]],
+        days: int = 7,
+        concurrency: int = FORECAST_BATCH_CONCURRENCY
+    ) -> Dict[str, Any]:
+        """
+        Forecasts for many locations: collapsed to unique grid cells, each
+        cell fetched once under a concurrency limit, fanned back out in
+        input order
         
-        return response
+        Returns:
+            Dict with forecasts (one per location), unique cells and cache misses
+            (at most two provider calls - forecast and current - per cell)
+        """
+        cells = [snap_to_grid(lat, lon) for lat, lon in locations]
+        unique_cells = list(dict.fromkeys(cells))
+        semaphore = asyncio.Semaphore(concurrency)
+        misses_before = self.cache.misses
+        
+        async def fetch(cell: Tuple[float, float]):
+            async with semaphore:
+                return await asyncio.gather(
+                    self._forecast_days(cell, days),
+                    self.get_current_weather(*cell)
+                )
+        
+        results = dict(zip(unique_cells, await asyncio.gather(*(fetch(cell) for cell in unique_cells))))
+        labels = self.geocoder.label_many([lat for lat, _ in locations], [lon for _, lon in locations])
+        
+        forecasts = [
+            self._forecast_response(lat, lon, label, *results[cell])
+            for (lat, lon), label, cell in zip(locations, labels, cells)
+        ]
+        return {
+            "forecasts": forecasts,
+            "cells": len(unique_cells),
+            "cache_misses": self.cache.misses - misses_before
+        }
+    
+    async def _history(self, kind: str, cell: Tuple[float, float], days: int) -> List[Dict[str, Any]]:
+        """Trailing daily series ending yesterday, sliced from one cached window"""
+        today = datetime.utcnow().date()
+        window = max(days, HISTORY_WINDOW_DAYS)
+        fetch = getattr(self.provider, kind)
+        if window > HISTORY_WINDOW_DAYS:
+            return await fetch(cell, today, window)
+        series = await self._cached(
+            (kind, cell, today.isoformat(), window),
+            lambda: fetch(cell, today, window),
+            HISTORY_TTL_SECONDS
+        )
+        return series[-days:] if days > 0 else []
     
     async def get_ndvi_data(self, latitude: float, longitude: float, days: int = 30) -> NDVIResponse:
         """Get NDVI (vegetation health) data for a location"""
         
-        # Simulate API call delay
-        await asyncio.sleep(0.3)
-        
-        # Generate mock NDVI time series
-        data_points = []
-        base_ndvi = 0.4 + random.uniform(-0.1, 0.2)
-        
-        for i in range(days):
-            date_obj = datetime.now() - timedelta(days=days-i)
-            ndvi_value = base_ndvi + random.uniform(-0.1, 0.1)
-            
-            point = NDVIDataPoint(
-                date=date_obj.strftime("%Y-%m-%d"),
-                ndvi_value=round(max(0, min(1, ndvi_value)), 3),
-                quality=random.choice(["good", "fair", "excellent"])
-            )
-            data_points.append(point)
+        data_source = "Digital Earth Africa (Sentinel-2)"
+        today = datetime.utcnow().date()
+        stored = self.ndvi_store.point_series(latitude, longitude, today - timedelta(days=days), today)
+        if stored is not None and len(stored["dates"]):
+            # Composites from the local tile store
+            data_source = self.ndvi_store.meta.get("source", data_source)
+            data_points = [
+                NDVIDataPoint(
+                    date=str(day),
+                    ndvi_value=round(value, 3),
+                    quality=QUALITY_LABELS[min(code, len(QUALITY_LABELS) - 1)]
+                )
+                for day, value, code in zip(
+                    stored["dates"].tolist(), stored["ndvi"].tolist(), stored["quality"].tolist()
+                )
+            ]
+        else:
+            series = await self._history("ndvi", snap_to_grid(latitude, longitude), days)
+            data_points = [
+                NDVIDataPoint(date=point["date"], ndvi_value=point["ndvi_value"], quality=point["quality"])
+                for point in series
+            ]
         
-        # Calculate trend
-        recent_avg = sum(p.ndvi_value for p in data_points[-7:]) / 7
-        older_avg = sum(p.ndvi_value for p in data_points[:7]) / 7
+        # Calculate trend (composites can be sparser than one per day)
+        span = max(1, min(7, len(data_points)))
+        recent_avg = sum(p.ndvi_value for p in data_points[-span:]) / span
+        older_avg = sum(p.ndvi_value for p in data_points[:span]) / span
         trend = "improving" if recent_avg > older_avg else "declining"
         
         return NDVIResponse(
             location={"latitude": latitude, "longitude": longitude},
             data_points=data_points,
-            average_ndvi=round(sum(p.ndvi_value for p in data_points) / len(data_points), 3),
+            average_ndvi=round(sum(p.ndvi_value for p in data_points) / max(1, len(data_points)), 3),
             trend=trend,
-            data_source="Digital Earth Africa (Sentinel-2)"
+            data_source=data_source
         )
     
+    async def iter_ndvi_data(
+        self, latitude: float, longitude: float, days: int, chunk_days: int = NDVI_STREAM_CHUNK_DAYS
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        NDVI rows oldest first, produced incrementally for streaming:
+        decoded lazily from the tile store, or fetched from the provider
+        chunk_days at a time
+        """
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=days)
+        stored = self.ndvi_store.point_series(latitude, longitude, start, today)
+        if stored is not None and len(stored["dates"]):
+            for day, value, code in zip(stored["dates"], stored["ndvi"], stored["quality"]):
+                yield {
+                    "date": str(day),
+                    "ndvi_value": round(float(value), 3),
+                    "quality": QUALITY_LABELS[min(int(code), len(QUALITY_LABELS) - 1)]
+                }
+            return
+        
+        cell = snap_to_grid(latitude, longitude)
+        done = 0
+        while done < days:
+            step = min(chunk_days, days - done)
+            done += step
+            # Provider windows end (exclusive) at `end`; walk forward from the oldest
+            for point in await self.provider.ndvi(cell, start + timedelta(days=done), step):
+                yield {"date": point["date"], "ndvi_value": point["ndvi_value"], "quality": point["quality"]}
+    
     def _get_conditions(self, rainfall_chance: float) -> str:
         """Determine weather conditions based on rainfall chance"""
         if rainfall_chance > 0.8:
@@ -147,53 +306,46 @@ class WeatherService:
         else:
             return "Sunny"
     
-    def _get_location_name(self, latitude: float, longitude: float) -> str:
-        """Get location name based on coordinates (Kenya regions)"""
-        # Simple coordinate-based location mapping for Kenya
-        if -1.5 <= latitude <= -1.0 and 36.5 <= longitude <= 37.5:
-            return "Nairobi"
-        elif -1.8 <= latitude <= -1.2 and 37.0 <= longitude <= 37.8:
-            return "Machakos"
-        elif -0.5 <= latitude <= 0.5 and 36.5 <= longitude <= 37.5:
-            return "Nyeri"
-        elif -0.5 <= latitude <= 0.5 and 37.5 <= longitude <= 38.5:
-            return "Meru"
-        elif -1.0 <= latitude <= -0.5 and 35.0 <= longitude <= 36.0:
-            return "Nakuru"
-        else:
-            return "Unknown Location"
-    
-    def _get_county(self, latitude: float, longitude: float) -> str:
-        """Get county name based on coordinates"""
-        location_name = self._get_location_name(latitude, longitude)
-        county_map = {
-            "Nairobi": "Nairobi",
-            "Machakos": "Machakos",
-            "Nyeri": "Nyeri", 
-            "Meru": "Meru",
-            "Nakuru": "Nakuru"
-        }
-        return county_map.get(location_name, "Unknown County")
-    
     async def get_rainfall_data(self, latitude: float, longitude: float, days: int = 30) -> Dict[str, Any]:
         """Get historical rainfall data from NASA CHIRPS"""
-        # Mock implementation - in production would call NASA CHIRPS API
-        await asyncio.sleep(0.2)
-        
-        rainfall_data = []
-        for i in range(days):
-            date_obj = datetime.now() - timedelta(days=days-i)
-            rainfall = random.uniform(0, 15)  # mm per day
-            rainfall_data.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "rainfall_mm": round(rainfall, 1)
-            })
+        
+        cell = snap_to_grid(latitude, longitude)
+        observed = self.rainfall_index.daily(cell, days)
+        if observed is not None:
+            # Stored observations: every total is a prefix-sum subtraction
+            rainfall_data = observed
+            lengths = [days] + list(ACCUMULATION_WINDOWS)
+            stats = self.rainfall_index.windows(
+                [cell], [self.rainfall_index.cell_last_date(cell)] * len(lengths), np.array(lengths)[None, :]
+            )
+            totals = stats["total_mm"][0]
+            windows = {
+                f"{length}d": {
+                    "total_mm": round(float(totals[i + 1]), 1),
+                    "anomaly_percent": round(float(stats["anomaly_percent"][0, i + 1]), 1)
+                }
+                for i, length in enumerate(ACCUMULATION_WINDOWS)
+                if stats["coverage"][0, i + 1] >= 1.0
+            }
+            total = float(totals[0])
+            data_source = "NASA POWER"
+        else:
+            history = await self._history("rainfall", cell, max(days, max(ACCUMULATION_WINDOWS)))
+            rainfall_data = [dict(day) for day in history[-days:]] if days > 0 else []
+            cumulative = np.concatenate([[0.0], np.cumsum([day["rainfall_mm"] for day in history])])
+            windows = {
+                f"{length}d": {"total_mm": round(float(cumulative[-1] - cumulative[-1 - length]), 1)}
+                for length in ACCUMULATION_WINDOWS if length < len(cumulative)
+            }
+            total = float(cumulative[-1] - cumulative[-1 - len(rainfall_data)])
+            data_source = "NASA CHIRPS"
         
         return {
             "location": {"latitude": latitude, "longitude": longitude},
             "data": rainfall_data,
-            "total_rainfall_mm": round(sum(d["rainfall_mm"] for d in rainfall_data), 1),
-            "average_daily_mm": round(sum(d["rainfall_mm"] for d in rainfall_data) / len(rainfall_data), 1),
-            "data_source": "NASA CHIRPS",
+            "total_rainfall_mm": round(total, 1),
+            "average_daily_mm": round(total / max(1, len(rainfall_data)), 1),
+            "windows": windows,
+            "data_source": data_source,
             "generated_at": datetime.utcnow().isoformat()
         }